@@ -0,0 +1,297 @@
+"""
+Contenedor de Servicios
+Crea la conexión, los repositorios, los servicios y la instrumentación de
+una aplicación la primera vez que se usan, no al importar main.py: un worker
+arranca sin tocar la base de datos y cada create_app() tiene los suyos.
+
+Las vistas llegan a los componentes de la aplicación en curso con
+componente('docente_service'), un proxy que lo resuelve en cada acceso.
+
+Uso:
+    servicios = ContenedorServicios(app.config, app.static_folder)
+    app.extensions[EXTENSION] = servicios
+    servicios.docente_service.obtener_resumen_dashboard(1)   # crea lo que necesite
+"""
+
+import threading
+from datetime import date
+from typing import Callable, List, Mapping
+
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from application.patterns.observer import NotificacionObserver
+from application.patterns.singleton import VERSION_ESQUEMA, DatabaseConnection
+from application.repositories.usuario_repository import UsuarioRepository
+from application.repositories.materia_repository import MateriaRepository, HorarioRepository
+from application.repositories.preferencia_repository import PreferenciaRepository
+from application.repositories.notificacion_repository import NotificacionRepository
+from application.repositories.busqueda_repository import BusquedaRepository
+from application.repositories.versiones import VersionRegistry
+from application.models.preferencia import EstadoPreferencia
+from application.services.auth_service import AuthService
+from application.services.docente_service import DocenteService
+from application.services.administrativo_service import AdministrativoService
+from application.services.autocompletado_service import AutocompletadoService
+from application.services.busqueda_service import BusquedaService
+from application.services.disponibilidad_service import DisponibilidadService
+from application.services.calendario_service import CalendarioService
+from application.services.calendario_ics_service import CalendarioIcsService
+from application.services.revision_preferencias_service import RevisionPreferenciasService
+from application.services.demanda_service import DemandaService
+from application.utils.consultas_sql import ContadorSQL
+from application.utils.metricas import LIMITES_SQL, RegistroMetricas
+from application.utils.ocurrencias import PeriodoAcademico
+from application.utils.perfilado import PerfiladorPeticiones
+from application.utils.recursos_estaticos import ManifiestoRecursos
+from application.utils.trazas import Trazador
+
+EXTENSION = 'servicios'
+OPERACIONES_SQL = {'SELECT', 'INSERT', 'UPDATE', 'DELETE'}
+
+
+def componente(nombre: str) -> LocalProxy:
+    """Proxy al componente `nombre` del contenedor de la aplicación en curso"""
+    return LocalProxy(lambda: getattr(current_app.extensions[EXTENSION], nombre))
+
+
+class perezoso:
+    """
+    Atributo que se calcula con `fabrica(contenedor)` en el primer acceso y
+    queda guardado en la instancia; los accesos siguientes no pasan por aquí.
+    """
+
+    def __init__(self, fabrica: Callable):
+        self._fabrica = fabrica
+        self._nombre = fabrica.__name__
+        self.__doc__ = fabrica.__doc__
+
+    def __set_name__(self, propietario, nombre: str):
+        self._nombre = nombre
+
+    def __get__(self, contenedor, propietario=None):
+        if contenedor is None:
+            return self
+        # RLock: crear un servicio crea antes sus repositorios
+        with contenedor._lock:
+            if self._nombre not in contenedor.__dict__:
+                contenedor.__dict__[self._nombre] = self._fabrica(contenedor)
+        return contenedor.__dict__[self._nombre]
+
+
+class MetricasAplicacion:
+    """Métricas que registran los hooks de main.py y la conexión"""
+
+    def __init__(self, directorio, servicios: 'ContenedorServicios'):
+        self.registro = RegistroMetricas(directorio)
+        self.peticiones = self.registro.histograma(
+            'http_peticiones_duracion_segundos', 'Duración de las peticiones HTTP por ruta y estado',
+            ('ruta', 'metodo', 'estado'))
+        self.en_curso = self.registro.medidor('http_peticiones_en_curso', 'Peticiones HTTP en curso')
+        self.sql = self.registro.histograma(
+            'sql_sentencias_duracion_segundos', 'Duración de execute/executemany por tipo de sentencia',
+            ('operacion',), limites=LIMITES_SQL)
+        self.espera = self.registro.histograma(
+            'sql_espera_conexion_segundos', 'Espera para abrir una transacción en la conexión compartida',
+            limites=LIMITES_SQL)
+        self.cache = self.registro.contador('cache_consultas_total', 'Consultas a cachés por resultado',
+                                            ('cache', 'resultado'))
+        self.registro.medidor('notificaciones_no_leidas', 'Notificaciones pendientes de leer',
+                              funcion=lambda: servicios.notificacion_repo.contar_no_leidas())
+        self.registro.medidor('preferencias_pendientes', 'Preferencias en la cola de revisión',
+                              funcion=lambda: servicios.preferencia_repo.contar_por_estado(
+                                  EstadoPreferencia.PENDIENTE))
+
+    def medir_sentencia(self, sentencia: str, segundos: float):
+        operacion = sentencia.lstrip()[:6].upper()
+        self.sql.observar(segundos, operacion=operacion if operacion in OPERACIONES_SQL else 'OTRA')
+
+
+class ContenedorServicios:
+    """
+    Dependencias de una aplicación, creadas bajo demanda.
+
+    Patrón: Service Locator con inicialización perezosa (Lazy Initialization)
+    Principio SRP: Única responsabilidad de construir y conectar los
+    componentes; qué hace cada uno es cosa suya.
+    """
+
+    def __init__(self, config: Mapping, directorio_static: str):
+        """
+        Args:
+            config: Configuración de la aplicación (app.config)
+            directorio_static: Carpeta de los recursos estáticos
+        """
+        self._config = config
+        self._directorio_static = directorio_static
+        self._lock = threading.RLock()
+
+    @classmethod
+    def componentes(cls) -> List[str]:
+        return sorted(nombre for nombre, valor in vars(cls).items() if isinstance(valor, perezoso))
+
+    def creados(self) -> List[str]:
+        """Nombres de los componentes ya creados"""
+        return [nombre for nombre in self.componentes() if nombre in self.__dict__]
+
+    def precargar(self):
+        """Crea todos los componentes y llena las cachés de catálogo de los servicios"""
+        for nombre in self.componentes():
+            getattr(self, nombre)
+        self.autocompletado_service.precargar()
+        self.disponibilidad_service.precargar()
+        self.demanda_service.precargar()
+
+    # ---- Ciclo de vida con fork (gunicorn --preload, ver gunicorn.conf.py) ----
+
+    def antes_de_fork(self):
+        """En el proceso maestro: ningún worker debe heredar la conexión abierta"""
+        if 'db' in self.__dict__:
+            self.db.close()
+
+    def tras_fork(self):
+        """En cada worker: su propia conexión; el resto de componentes se comparte"""
+        if 'db' in self.__dict__:
+            self.db.connect(self._config['DATABASE'])
+            self._instalar_contador(self.db)
+
+    def sincronizar_versiones(self):
+        """Al empezar cada petición: las versiones que escribieron otros workers"""
+        self.versiones.sincronizar()
+
+    def _instalar_contador(self, db: DatabaseConnection):
+        # El trace callback es de cada conexión: se instala de nuevo al reconectar
+        if self._config['VERIFICAR_PRESUPUESTO_SQL']:
+            self.contador_sql.instalar(db.get_connection())
+
+    # ---- Infraestructura ----
+
+    @perezoso
+    def db(self) -> DatabaseConnection:
+        """Conexión de esta aplicación: otra create_app() con otra DATABASE tiene la suya"""
+        db = DatabaseConnection.nueva()
+        db.connect(self._config['DATABASE'])
+        # Los triggers FTS y la tabla versiones deben existir antes de la
+        # primera escritura; una base restaurada de la plantilla ya los trae
+        # (basta user_version)
+        if db.version_esquema() != VERSION_ESQUEMA:
+            BusquedaRepository(db).asegurar_esquema()
+            VersionRegistry.asegurar_esquema(db)
+        db.instrumentar(al_ejecutar=self.metricas.medir_sentencia, al_esperar=self.metricas.espera.observar)
+        self._instalar_contador(db)
+        return db
+
+    @perezoso
+    def versiones(self) -> VersionRegistry:
+        """Versiones de los datos de esta aplicación; sus observers son los servicios de este contenedor"""
+        return VersionRegistry(self.db)
+
+    @perezoso
+    def contador_sql(self) -> ContadorSQL:
+        return ContadorSQL()
+
+    @perezoso
+    def metricas(self) -> MetricasAplicacion:
+        return MetricasAplicacion(self._config['METRICAS_DIR'], self)
+
+    @perezoso
+    def trazador(self) -> Trazador:
+        return Trazador(self._config['TRAZAS_ARCHIVO'], self._config['TRAZAS_MUESTREO'],
+                        forzadas_por_segundo=self._config['TRAZAS_FORZADAS_POR_SEGUNDO'],
+                        max_bytes=self._config['TRAZAS_MAX_BYTES'], copias=self._config['TRAZAS_COPIAS'])
+
+    @perezoso
+    def perfilador(self) -> PerfiladorPeticiones:
+        return PerfiladorPeticiones(self._config['PERFILES_DIR'], cada_n=self._config['PERFILAR_CADA_N'],
+                                    maximo=self._config['PERFILES_MAXIMO'])
+
+    @perezoso
+    def manifiesto_recursos(self) -> ManifiestoRecursos:
+        return ManifiestoRecursos(self._directorio_static)
+
+    @perezoso
+    def periodo_academico(self):
+        """Periodo configurado (PERIODO_INICIO/PERIODO_FIN) o None para el semestre en curso"""
+        if not (self._config['PERIODO_INICIO'] and self._config['PERIODO_FIN']):
+            return None
+        return PeriodoAcademico(date.fromisoformat(self._config['PERIODO_INICIO']),
+                                date.fromisoformat(self._config['PERIODO_FIN']),
+                                self._config['DIAS_FESTIVOS'])
+
+    # ---- Repositorios ----
+
+    @perezoso
+    def usuario_repo(self) -> UsuarioRepository:
+        return UsuarioRepository(self.db, self.versiones)
+
+    @perezoso
+    def materia_repo(self) -> MateriaRepository:
+        return MateriaRepository(self.db, self.versiones)
+
+    @perezoso
+    def horario_repo(self) -> HorarioRepository:
+        return HorarioRepository(self.db, self.versiones)
+
+    @perezoso
+    def preferencia_repo(self) -> PreferenciaRepository:
+        return PreferenciaRepository(self.db, self.versiones)
+
+    @perezoso
+    def notificacion_repo(self) -> NotificacionRepository:
+        return NotificacionRepository(self.db, self.versiones)
+
+    @perezoso
+    def busqueda_repo(self) -> BusquedaRepository:
+        return BusquedaRepository(self.db)
+
+    # ---- Servicios ----
+
+    @perezoso
+    def auth_service(self) -> AuthService:
+        return AuthService(self.usuario_repo)
+
+    @perezoso
+    def calendario_service(self) -> CalendarioService:
+        return CalendarioService(self.horario_repo, self.periodo_academico, self._config['DIAS_FESTIVOS'])
+
+    @perezoso
+    def docente_service(self) -> DocenteService:
+        return DocenteService(self.usuario_repo, self.materia_repo, self.preferencia_repo,
+                              self.horario_repo, self.notificacion_repo, self.calendario_service)
+
+    @perezoso
+    def administrativo_service(self) -> AdministrativoService:
+        return AdministrativoService(self.usuario_repo, self.materia_repo,
+                                     self.preferencia_repo, self.notificacion_repo, self.horario_repo,
+                                     self.revision_preferencias_service, self.notificacion_observer)
+
+    @perezoso
+    def revision_preferencias_service(self) -> RevisionPreferenciasService:
+        return RevisionPreferenciasService(self.preferencia_repo, self.notificacion_repo,
+                                           self.notificacion_observer)
+
+    @perezoso
+    def notificacion_observer(self) -> NotificacionObserver:
+        """Uno para todos los servicios: un lote() abierto agrupa las notificaciones de todos"""
+        return NotificacionObserver(self.notificacion_repo)
+
+    @perezoso
+    def autocompletado_service(self) -> AutocompletadoService:
+        return AutocompletadoService(self.usuario_repo, self.materia_repo)
+
+    @perezoso
+    def busqueda_service(self) -> BusquedaService:
+        return BusquedaService(self.busqueda_repo)
+
+    @perezoso
+    def disponibilidad_service(self) -> DisponibilidadService:
+        return DisponibilidadService(self.usuario_repo, self.materia_repo, self.horario_repo)
+
+    @perezoso
+    def demanda_service(self) -> DemandaService:
+        return DemandaService(self.preferencia_repo, self.materia_repo)
+
+    @perezoso
+    def calendario_ics_service(self) -> CalendarioIcsService:
+        return CalendarioIcsService(self.usuario_repo, self.horario_repo, self.calendario_service,
+                                    self._config['SECRET_KEY'])
@@ -0,0 +1,207 @@
+"""
+API REST v1
+Blueprint /api/v1 con los datos de docentes, materias, horarios,
+preferencias y notificaciones en JSON, sobre la capa de servicios.
+
+Parámetros comunes de los listados:
+    fields  Campos a devolver, separados por comas (?fields=id,nombre)
+    limit   Tamaño de página (por defecto 50, máximo 200)
+    cursor  Cursor devuelto en next_cursor por la página anterior
+
+Las respuestas GET llevan ETag débil y responden 304 con If-None-Match
+mientras no cambie la versión de los datos de los que dependen.
+POST /lote ejecuta varias operaciones administrativas en una transacción.
+"""
+
+from flask import Blueprint, Response, request
+from application.services.auth_service import AuthService
+from application.services.docente_service import DocenteService
+from application.services.administrativo_service import AdministrativoService
+from application.utils.consultas_sql import presupuesto_sql
+from application.utils.serializacion import (ErrorConsulta, a_json, decodificar_cursor, paginar,
+                                             parsear_campos, proyectar, proyectar_filas)
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+MAXIMO_OPERACIONES_LOTE = 200
+
+CAMPOS_DOCENTE = ('id', 'nombre_completo', 'email', 'telefono', 'oficina', 'departamento',
+                  'especialidad', 'biografia', 'rol', 'activo')
+CAMPOS_MATERIA = ('id', 'nombre', 'codigo', 'aula', 'creditos', 'descripcion', 'docente_id')
+CAMPOS_PREFERENCIA_DOCENTE = ('id', 'materia', 'dia', 'horario', 'estado')
+CAMPOS_PREFERENCIA_PENDIENTE = ('id', 'docente_id', 'docente_nombre', 'materia_nombre',
+                                'dia', 'horario', 'estado')
+CAMPOS_NOTIFICACION = ('id', 'usuario_id', 'titulo', 'mensaje', 'tipo', 'leida', 'fecha_creacion')
+
+
+def respuesta_json(datos, status: int = 200) -> Response:
+    return Response(a_json(datos), status=status, mimetype='application/json')
+
+
+def error_json(mensaje: str, status: int) -> Response:
+    return respuesta_json({'error': mensaje}, status)
+
+
+def _limite() -> int:
+    try:
+        limite = int(request.args.get('limit', LIMITE_POR_DEFECTO))
+    except ValueError:
+        raise ErrorConsulta('limit debe ser un entero')
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def _entero_opcional(nombre: str):
+    valor = request.args.get(nombre)
+    if valor is None:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorConsulta(f'{nombre} debe ser un entero')
+
+
+def _operaciones_del_lote() -> int:
+    """Operaciones del cuerpo de POST /lote: su presupuesto SQL es por operación"""
+    cuerpo = request.get_json(silent=True)
+    operaciones = cuerpo.get('operaciones') if isinstance(cuerpo, dict) else None
+    return len(operaciones) if isinstance(operaciones, list) else 0
+
+
+def _pagina(consulta):
+    """
+    Pide a la consulta (despues_de, limite) -> registros la página del cursor
+    recibido, con un registro de más para saber si hay otra.
+    """
+    limite = _limite()
+    return consulta(decodificar_cursor(request.args.get('cursor')), limite + 1), limite
+
+
+def listado(consulta, disponibles) -> Response:
+    """Página de diccionarios con selección de campos"""
+    campos = parsear_campos(request.args.get('fields'), disponibles)
+    pagina, siguiente = paginar(*_pagina(consulta))
+    return respuesta_json({'data': proyectar(pagina, campos), 'next_cursor': siguiente})
+
+
+def listado_filas(consulta, columnas) -> Response:
+    """Página de filas (tuplas) con selección de campos; el id es la primera columna"""
+    campos = parsear_campos(request.args.get('fields'), columnas)
+    pagina, siguiente = paginar(*_pagina(consulta), id_de=lambda fila: fila[0])
+    return respuesta_json({'data': proyectar_filas(columnas, pagina, campos), 'next_cursor': siguiente})
+
+
+def crear_api_v1(auth_service: AuthService, docente_service: DocenteService,
+                 administrativo_service: AdministrativoService, condicional) -> Blueprint:
+    """
+    Construye el blueprint con los servicios de la aplicación.
+
+    Args:
+        condicional: Decorador de GET condicional por versión (condicional_por_version)
+    """
+    api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+    def usuario_actual() -> dict:
+        return auth_service.obtener_usuario_actual()
+
+    def es_administrativo() -> bool:
+        return auth_service.tiene_rol('administrativo')
+
+    @api.before_request
+    def autenticar():
+        if not auth_service.esta_autenticado():
+            return error_json('No autenticado', 401)
+
+    @api.errorhandler(ErrorConsulta)
+    def consulta_invalida(error):
+        return error_json(str(error), 400)
+
+    @api.route('/docentes')
+    @presupuesto_sql(3)
+    @condicional('docentes')
+    def docentes():
+        if not es_administrativo():
+            return error_json('Acceso denegado', 403)
+        return listado(lambda desde, limite: [d.to_dict() for d in administrativo_service.listar_docentes(
+            desde, limite)], CAMPOS_DOCENTE)
+
+    @api.route('/docentes/<int:docente_id>')
+    @presupuesto_sql(3)
+    @condicional('docentes')
+    def docente(docente_id):
+        usuario = usuario_actual()
+        if not es_administrativo() and usuario['id'] != docente_id:
+            return error_json('Acceso denegado', 403)
+        perfil = docente_service.obtener_perfil(docente_id)
+        if perfil is None:
+            return error_json('Docente no encontrado', 404)
+        campos = parsear_campos(request.args.get('fields'), CAMPOS_DOCENTE)
+        return respuesta_json({'data': proyectar([perfil.to_dict()], campos)[0]})
+
+    @api.route('/materias')
+    @presupuesto_sql(3)
+    @condicional('materias')
+    def materias():
+        docente_id = _entero_opcional('docente_id')
+
+        def consulta(desde, limite):
+            if docente_id is None:
+                materias = administrativo_service.obtener_materias(desde, limite)
+            else:
+                materias = docente_service.obtener_materias_asignadas(docente_id, desde, limite)
+            return [m.to_dict() for m in materias]
+        return listado(consulta, CAMPOS_MATERIA)
+
+    @api.route('/horarios')
+    @presupuesto_sql(3)
+    @condicional('horarios', 'materias')
+    def horarios():
+        docente_id = _entero_opcional('docente_id')
+        if not es_administrativo():
+            # Un docente solo consulta su propio horario
+            if docente_id not in (None, usuario_actual()['id']):
+                return error_json('Acceso denegado', 403)
+            docente_id = usuario_actual()['id']
+        return listado_filas(lambda desde, limite: docente_service.obtener_horarios(docente_id, desde, limite),
+                             DocenteService.COLUMNAS_HORARIO)
+
+    @api.route('/preferencias')
+    @presupuesto_sql(3)
+    @condicional('preferencias', 'materias')
+    def preferencias():
+        if es_administrativo():
+            return listado(administrativo_service.obtener_preferencias_pendientes,
+                           CAMPOS_PREFERENCIA_PENDIENTE)
+        docente_id = usuario_actual()['id']
+        return listado(lambda desde, limite: docente_service.obtener_preferencias(docente_id, desde, limite),
+                       CAMPOS_PREFERENCIA_DOCENTE)
+
+    @api.route('/notificaciones')
+    @presupuesto_sql(3)
+    @condicional('notificaciones:{id}')
+    def notificaciones():
+        docente_id = usuario_actual()['id']
+        return listado(lambda desde, limite: docente_service.obtener_pagina_notificaciones(
+            docente_id, desde, limite), CAMPOS_NOTIFICACION)
+
+    @api.route('/lote', methods=['POST'])
+    @presupuesto_sql(2, por_elemento=8, elementos=_operaciones_del_lote)
+    def lote():
+        """
+        Varias operaciones administrativas en una transacción (todo o nada):
+        {"operaciones": [{"op": "asignar", "materia_id": 1, "docente_id": 2}, ...]}
+        """
+        if not es_administrativo():
+            return error_json('Acceso denegado', 403)
+        cuerpo = request.get_json(silent=True) or {}
+        operaciones = cuerpo.get('operaciones') if isinstance(cuerpo, dict) else None
+        if not isinstance(operaciones, list) or not operaciones:
+            return error_json('Se esperaba una lista "operaciones"', 400)
+        if len(operaciones) > MAXIMO_OPERACIONES_LOTE:
+            return error_json(f'Máximo {MAXIMO_OPERACIONES_LOTE} operaciones por lote', 400)
+        if not all(isinstance(operacion, dict) for operacion in operaciones):
+            return error_json('Cada operación debe ser un objeto', 400)
+
+        aplicado, resultados = administrativo_service.ejecutar_lote(operaciones)
+        return respuesta_json({'aplicado': aplicado, 'resultados': resultados}, 200 if aplicado else 422)
+
+    return api
@@ -0,0 +1,69 @@
+"""
+Rutas Diferidas
+Las vistas y hooks de main.py se declaran a nivel de módulo, como antes,
+pero no se atan a una aplicación al importar: create_app() las registra en
+cada aplicación que construye. A diferencia de un Blueprint, los endpoints
+conservan su nombre ('docente_dashboard', no 'web.docente_dashboard'), así
+que url_for y las plantillas no cambian.
+
+Uso:
+    rutas = RutasDiferidas()
+
+    @rutas.route('/docente/dashboard')
+    def docente_dashboard(): ...
+
+    rutas.registrar(app)
+"""
+
+from typing import Callable, List
+
+from flask import Flask
+
+
+class RutasDiferidas:
+    """
+    Registro de rutas y hooks pendientes de aplicar a una aplicación.
+
+    Patrón: Command (cada declaración se guarda y se ejecuta en registrar)
+    Principio SRP: Única responsabilidad de recordar qué se declaró y en qué
+    orden; el orden de los hooks se conserva.
+    """
+
+    def __init__(self):
+        self._pendientes: List[Callable[[Flask], None]] = []
+
+    def route(self, regla: str, **opciones) -> Callable:
+        def decorador(vista):
+            endpoint = opciones.pop('endpoint', vista.__name__)
+            self._pendientes.append(lambda app: app.add_url_rule(regla, endpoint, vista, **opciones))
+            return vista
+        return decorador
+
+    def _hook(self, nombre: str) -> Callable:
+        def decorador(funcion):
+            self._pendientes.append(lambda app: getattr(app, nombre)(funcion))
+            return funcion
+        return decorador
+
+    @property
+    def before_request(self) -> Callable:
+        return self._hook('before_request')
+
+    @property
+    def after_request(self) -> Callable:
+        return self._hook('after_request')
+
+    @property
+    def teardown_request(self) -> Callable:
+        return self._hook('teardown_request')
+
+    def template_global(self) -> Callable:
+        def decorador(funcion):
+            self._pendientes.append(lambda app: app.add_template_global(funcion))
+            return funcion
+        return decorador
+
+    def registrar(self, app: Flask):
+        """Aplica a `app` todo lo declarado, en el orden de declaración"""
+        for pendiente in self._pendientes:
+            pendiente(app)
@@ -94,7 +94,7 @@ class UsuarioFactory:
             Instancia de Usuario
         """
         if tipo.lower() == 'docente':
-            return Docente(
+            usuario = Docente(
                 id=row[0],
                 nombre_completo=row[1],
                 email=row[2],
@@ -106,7 +106,7 @@ class UsuarioFactory:
                 biografia=row[8] or ''
             )
         elif tipo.lower() == 'administrativo':
-            return Administrativo(
+            usuario = Administrativo(
                 id=row[0],
                 nombre_completo=row[1],
                 email=row[2],
@@ -120,6 +120,11 @@ class UsuarioFactory:
         else:
             raise ValueError(f"Tipo de usuario no válido: {tipo}")
 
+        # Columna 'activo' (presente en las filas completas de docentes/administrativos)
+        if len(row) > 9 and row[9] is not None:
+            usuario.activo = bool(row[9])
+        return usuario
+
 
 # Ejemplo de uso:
 """
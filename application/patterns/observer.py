@@ -15,10 +15,15 @@ Uso en el sistema:
 - Alertas de cambios en preferencias
 """
 
+import logging
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from threading import local
 from typing import List, Dict
 from application.models.notificacion import Notificacion, TipoNotificacion
 
+logger = logging.getLogger(__name__)
+
 
 class Observer(ABC):
     """
@@ -68,15 +73,42 @@ class NotificacionObserver(Observer):
     Observer concreto que maneja notificaciones.
     Se encarga de crear notificaciones cuando ocurren eventos.
 
+    Dentro de lote() las notificaciones se acumulan y al cerrar se agrupan por
+    docente y evento (una notificación que enumera todas las materias) y se
+    guardan con una sola inserción. Cada hilo tiene su propio lote: los
+    eventos de otras peticiones se guardan como siempre.
+
     Principio SRP: Única responsabilidad de manejar notificaciones.
     """
 
+    # evento -> (título, mensaje con una materia, mensaje con varias, tipo)
+    MENSAJES = {
+        "asignacion_creada": ("Nueva Asignación de Materia",
+                              "Se te ha asignado la materia: {}",
+                              "Se te han asignado las materias: {}",
+                              TipoNotificacion.EXITO),
+        "asignacion_modificada": ("Asignación Modificada",
+                                  "Tu asignación de {} ha sido modificada",
+                                  "Tus asignaciones de {} han sido modificadas",
+                                  TipoNotificacion.INFO),
+        "preferencia_aprobada": ("Preferencia Aprobada",
+                                 "Tu preferencia para {} ha sido aprobada",
+                                 "Tus preferencias para {} han sido aprobadas",
+                                 TipoNotificacion.EXITO),
+        "preferencia_rechazada": ("Preferencia Rechazada",
+                                  "Tu preferencia para {} ha sido rechazada",
+                                  "Tus preferencias para {} han sido rechazadas",
+                                  TipoNotificacion.ADVERTENCIA),
+    }
+
     def __init__(self, notificacion_repository):
         """
         Args:
             notificacion_repository: Repositorio para persistir notificaciones
         """
         self._notificacion_repository = notificacion_repository
+        # lote: (docente_id, evento) -> [materias] mientras el hilo tiene un lote abierto
+        self._hilo = local()
 
     def actualizar(self, evento: str, datos: Dict):
         """
@@ -86,58 +118,43 @@ class NotificacionObserver(Observer):
             evento: Tipo de evento
             datos: Datos del evento
         """
-        if evento == "asignacion_creada":
-            self._notificar_asignacion_creada(datos)
-        elif evento == "asignacion_modificada":
-            self._notificar_asignacion_modificada(datos)
-        elif evento == "preferencia_aprobada":
-            self._notificar_preferencia_aprobada(datos)
-        elif evento == "preferencia_rechazada":
-            self._notificar_preferencia_rechazada(datos)
-
-    def _notificar_asignacion_creada(self, datos: Dict):
-        """Crea notificación de nueva asignación"""
-        notificacion = Notificacion(
-            id=None,
-            usuario_id=datos['docente_id'],
-            titulo="Nueva Asignación de Materia",
-            mensaje=f"Se te ha asignado la materia: {datos['materia_nombre']}",
-            tipo=TipoNotificacion.EXITO
-        )
-        self._notificacion_repository.crear(notificacion)
-
-    def _notificar_asignacion_modificada(self, datos: Dict):
-        """Crea notificación de modificación de asignación"""
-        notificacion = Notificacion(
-            id=None,
-            usuario_id=datos['docente_id'],
-            titulo="Asignación Modificada",
-            mensaje=f"Tu asignación de {datos['materia_nombre']} ha sido modificada",
-            tipo=TipoNotificacion.INFO
-        )
-        self._notificacion_repository.crear(notificacion)
-
-    def _notificar_preferencia_aprobada(self, datos: Dict):
-        """Crea notificación de preferencia aprobada"""
-        notificacion = Notificacion(
-            id=None,
-            usuario_id=datos['docente_id'],
-            titulo="Preferencia Aprobada",
-            mensaje=f"Tu preferencia para {datos['materia_nombre']} ha sido aprobada",
-            tipo=TipoNotificacion.EXITO
-        )
-        self._notificacion_repository.crear(notificacion)
-
-    def _notificar_preferencia_rechazada(self, datos: Dict):
-        """Crea notificación de preferencia rechazada"""
-        notificacion = Notificacion(
+        if evento not in self.MENSAJES:
+            return
+        lote = getattr(self._hilo, 'lote', None)
+        if lote is not None:
+            lote.setdefault((datos['docente_id'], evento), []).append(datos['materia_nombre'])
+        else:
+            self._notificacion_repository.crear(
+                self._crear_notificacion(datos['docente_id'], evento, [datos['materia_nombre']]))
+
+    @contextmanager
+    def lote(self):
+        """
+        Acumula las notificaciones del bloque y las guarda agrupadas al salir
+        sin errores. Un lote anidado en el mismo hilo forma parte del exterior.
+        """
+        if getattr(self._hilo, 'lote', None) is not None:
+            yield
+            return
+        self._hilo.lote = lote = {}
+        try:
+            yield
+            notificaciones = [self._crear_notificacion(docente_id, evento, materias)
+                              for (docente_id, evento), materias in lote.items()]
+            self._notificacion_repository.crear_lote(notificaciones)
+        finally:
+            self._hilo.lote = None
+
+    def _crear_notificacion(self, docente_id: int, evento: str, materias: List[str]) -> Notificacion:
+        titulo, singular, plural, tipo = self.MENSAJES[evento]
+        mensaje = singular if len(materias) == 1 else plural
+        return Notificacion(
             id=None,
-            usuario_id=datos['docente_id'],
-            titulo="Preferencia Rechazada",
-            mensaje=f"Tu preferencia para {datos['materia_nombre']} ha sido rechazada",
-            tipo=TipoNotificacion.ADVERTENCIA
+            usuario_id=docente_id,
+            titulo=titulo,
+            mensaje=mensaje.format(', '.join(materias)),
+            tipo=tipo
         )
-        self._notificacion_repository.crear(notificacion)
 
 
 class LogObserver(Observer):
@@ -149,7 +166,7 @@ class LogObserver(Observer):
 
     def actualizar(self, evento: str, datos: Dict):
         """Registra el evento en el log"""
-        print(f"[LOG] Evento: {evento} | Datos: {datos}")
+        logger.info("Evento: %s | Datos: %s", evento, datos)
 
 
 class AsignacionSubject(Subject):
@@ -17,12 +17,29 @@ Uso en el sistema:
 """
 
 from abc import ABC, abstractmethod
+from functools import wraps
 from typing import List, Optional, Generic, TypeVar
+from application.utils.trazas import trazar_clase
 
 
 T = TypeVar('T')
 
 
+def escritura(metodo):
+    """
+    Decorador de los métodos de un repositorio que escriben: los ejecuta en
+    DatabaseConnection.transaccion(), de modo que las sentencias, la versión
+    (_marcar_cambio) y el COMMIT van juntos y no se intercalan con la
+    transacción que otro hilo tenga abierta. Dentro de una transacción del
+    mismo hilo la escritura forma parte de ella.
+    """
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self._db.transaccion():
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
 class IRepository(ABC, Generic[T]):
     """
     Interfaz genérica de Repository.
@@ -66,14 +83,33 @@ class BaseRepository(IRepository[T], ABC):
 
     Principio SRP: Responsabilidad de operaciones CRUD básicas.
     Template Method: Define estructura que subclases implementan.
+
+    Cada método público (los de aquí y los de las subclases) abre un span
+    cuando la petición en curso se está trazando (utils/trazas.py).
     """
 
-    def __init__(self, db_connection):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trazar_clase('repositorio')(cls)
+
+    def __init__(self, db_connection, versiones):
         """
         Args:
-            db_connection: Conexión a la base de datos (Singleton)
+            db_connection: Conexión a la base de datos de la aplicación
+            versiones: VersionRegistry de la aplicación (repositories/versiones.py)
         """
         self._db = db_connection
+        self._versiones = versiones
+
+    @property
+    def versiones(self):
+        """Registro de versiones al que se suscriben los servicios que usan el repositorio"""
+        return self._versiones
+
+    @property
+    def db(self):
+        """Conexión del repositorio, para las transacciones que abarcan varios repositorios"""
+        return self._db
 
     @abstractmethod
     def _get_table_name(self) -> str:
@@ -99,6 +135,30 @@ class BaseRepository(IRepository[T], ABC):
         row = cursor.fetchone()
         return self._map_to_entity(row) if row else None
 
+    @staticmethod
+    def _keyset(despues_de: Optional[int], limite: Optional[int]) -> tuple:
+        """
+        Parámetros de la paginación por cursor (keyset) en SQL:
+        '... id > ? ORDER BY id LIMIT ?'. Sin cursor empieza por el principio
+        y sin límite devuelve todas las filas (LIMIT -1).
+        """
+        return (despues_de or 0, -1 if limite is None else limite)
+
+    def _marcar_cambio(self, *claves: str, **datos):
+        """
+        Incrementa la versión de los grupos de datos modificados. Se llama
+        desde un método @escritura: la versión se escribe en la misma
+        transacción que los datos.
+
+        Args:
+            claves: Grupos afectados ('materias', 'horarios', ...)
+            datos: Identificadores afectados, se envían a los observers
+        """
+        self._versiones.incrementar(claves, datos)
+
+
+trazar_clase('repositorio')(BaseRepository)
+
 
 # Este patrón se implementará completamente en los repositorios específicos
 # (repositories/usuario_repository.py, etc.)
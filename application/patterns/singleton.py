@@ -14,15 +14,89 @@ Uso en el sistema:
 - Configuración global de la aplicación
 """
 
+import logging
+import os
 import sqlite3
-from typing import Optional
-from threading import Lock
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Optional
+from threading import Lock, RLock, local
+from flask import has_request_context, session as sesion_flask
+from application.utils.consultas_sql import una_sentencia
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA user_version de una base de datos con el esquema completo (tablas,
+# índices, FTS y triggers, tabla versiones); lo fija database/plantilla.py.
+# Súbela al cambiar el esquema para que las plantillas antiguas se reconstruyan.
+VERSION_ESQUEMA = 3
+
+
+class _CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que informa de la duración de cada sentencia al observador de su
+    conexión (ver DatabaseConnection.instrumentar). Un executemany cuenta como
+    una sentencia en ContadorSQL, aunque SQLite registre cada fila.
+    """
+
+    def execute(self, sql, parametros=()):
+        observador = self.connection.al_ejecutar
+        if observador is None:
+            return super().execute(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            observador(sql, time.perf_counter() - inicio)
+
+    def executemany(self, sql, filas):
+        observador = self.connection.al_ejecutar
+        with una_sentencia():
+            if observador is None:
+                return super().executemany(sql, filas)
+            inicio = time.perf_counter()
+            try:
+                return super().executemany(sql, filas)
+            finally:
+                observador(sql, time.perf_counter() - inicio)
+
+
+class _ConexionMedida(sqlite3.Connection):
+    """
+    Conexión cuyos cursores son _CursorMedido. Connection.execute y
+    executemany crean su cursor sin pasar por cursor(), así que se redefinen.
+    """
+
+    al_ejecutar: Optional[Callable[[str, float], None]] = None
+
+    def cursor(self, factory=_CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, filas):
+        return self.cursor().executemany(sql, filas)
+
+
+class _EstadoHilo(local):
+    """Transacción del hilo actual (ver DatabaseConnection.transaccion)"""
+
+    def __init__(self):
+        self.profundidad = 0       # transacciones anidadas abiertas
+        self.al_confirmar = []     # acciones diferidas hasta el COMMIT
 
 
 class DatabaseConnection:
     """
     Singleton para la conexión a la base de datos.
 
+    DatabaseConnection() devuelve la conexión del proceso (scripts de
+    database/ y benchmarks/); cada aplicación crea la suya con
+    DatabaseConnection.nueva(), que no comparte la base de datos, las
+    transacciones ni las funciones de medición con ninguna otra.
+
     Patrón: Singleton (Thread-Safe)
     Principios SOLID aplicados:
     - SRP: Única responsabilidad de gestionar la conexión a BD
@@ -32,6 +106,8 @@ class DatabaseConnection:
     _instance: Optional['DatabaseConnection'] = None
     _lock: Lock = Lock()
     _connection: Optional[sqlite3.Connection] = None
+    # Todas las instancias del proceso, para apartar sus conexiones tras un fork
+    _instancias: 'weakref.WeakSet[DatabaseConnection]' = weakref.WeakSet()
 
     def __new__(cls):
         """
@@ -51,6 +127,19 @@ class DatabaseConnection:
         if self._connection is None:
             self._connection = None
             self._db_path = "database/universidad.db"
+        if not hasattr(self, '_hilo'):
+            self._hilo = _EstadoHilo()
+            self._lock_transaccion = RLock()
+            self._al_ejecutar: Optional[Callable[[str, float], None]] = None
+            self._al_esperar: Optional[Callable[[float], None]] = None
+            DatabaseConnection._instancias.add(self)
+
+    @classmethod
+    def nueva(cls) -> 'DatabaseConnection':
+        """Una conexión propia, independiente de la instancia única del proceso"""
+        instancia = super().__new__(cls)
+        instancia.__init__()
+        return instancia
 
     def connect(self, db_path: str = "database/universidad.db"):
         """
@@ -58,12 +147,23 @@ class DatabaseConnection:
 
         Args:
             db_path: Ruta al archivo de base de datos SQLite
+
+        Raises:
+            RuntimeError: Si ya está conectada a otra base de datos
         """
         if self._connection is None:
             self._db_path = db_path
-            self._connection = sqlite3.connect(db_path, check_same_thread=False)
+            self._connection = sqlite3.connect(db_path, check_same_thread=False, factory=_ConexionMedida)
             self._connection.row_factory = sqlite3.Row
-            print(f"[OK] Conexion establecida con la base de datos: {db_path}")
+            self._connection.al_ejecutar = self._al_ejecutar
+            logger.info("Conexión establecida con la base de datos: %s", db_path)
+        elif os.path.realpath(db_path) != os.path.realpath(self._db_path):
+            raise RuntimeError(f"La conexión ya está abierta con {self._db_path}; "
+                               f"para {db_path} usa DatabaseConnection.nueva()")
+
+    def version_esquema(self) -> int:
+        """PRAGMA user_version de la base de datos conectada (0 si nadie la fijó)"""
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
 
     def get_connection(self) -> sqlite3.Connection:
         """
@@ -79,12 +179,88 @@ class DatabaseConnection:
             raise RuntimeError("No se ha establecido conexión con la base de datos")
         return self._connection
 
+    def instrumentar(self, al_ejecutar: Optional[Callable[[str, float], None]] = None,
+                     al_esperar: Optional[Callable[[float], None]] = None):
+        """
+        Registra funciones de medición (p. ej. métricas) de esta conexión.
+
+        Args:
+            al_ejecutar: Recibe (sentencia, segundos) tras cada execute/executemany
+            al_esperar: Recibe los segundos de espera para abrir una transacción,
+                        que comparten todas las peticiones de la conexión
+        """
+        self._al_ejecutar = al_ejecutar
+        self._al_esperar = al_esperar
+        if self._connection is not None:
+            self._connection.al_ejecutar = al_ejecutar
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varias escrituras de los repositorios en una sola transacción.
+
+        Dentro del bloque confirmar() no hace COMMIT y las acciones de
+        al_confirmar() se guardan: al salir sin errores se confirma todo y se
+        ejecutan; si hay una excepción se deshace todo y se descartan.
+        Los bloques anidados forman parte de la transacción exterior.
+
+        La profundidad y las acciones pendientes son de cada hilo. La conexión
+        es compartida, así que mientras un hilo tiene una transacción abierta
+        los demás esperan para abrir la suya; las escrituras de los
+        repositorios abren siempre una (ver escritura en patterns/repository.py)
+        y nunca se mezclan con el COMMIT o el ROLLBACK de otro hilo.
+
+        Uso:
+            with db.transaccion():
+                materia_repo.asignar_docente(1, 2)
+                preferencia_repo.aprobar_preferencia(5)
+        """
+        conn = self.get_connection()
+        estado = self._hilo
+        inicio = time.perf_counter()
+        with self._lock_transaccion:
+            if estado.profundidad == 0 and self._al_esperar is not None:
+                self._al_esperar(time.perf_counter() - inicio)
+            estado.profundidad += 1
+            try:
+                yield conn
+            except BaseException:
+                estado.profundidad -= 1
+                if estado.profundidad == 0:
+                    conn.rollback()
+                    estado.al_confirmar = []
+                raise
+            estado.profundidad -= 1
+            if estado.profundidad == 0:
+                conn.commit()
+                acciones, estado.al_confirmar = estado.al_confirmar, []
+                for accion in acciones:
+                    accion()
+
+    @property
+    def en_transaccion(self) -> bool:
+        """Si el hilo actual tiene una transacción abierta"""
+        return self._hilo.profundidad > 0
+
+    def confirmar(self):
+        """COMMIT de una escritura suelta; dentro de transaccion() lo hace el bloque"""
+        if self._hilo.profundidad == 0:
+            self.get_connection().commit()
+
+    def al_confirmar(self, accion: Callable[[], None]):
+        """Ejecuta la acción tras el COMMIT (en el momento si el hilo no tiene una transacción abierta)"""
+        estado = self._hilo
+        if estado.profundidad == 0:
+            accion()
+        else:
+            estado.al_confirmar.append(accion)
+
     def close(self):
         """Cierra la conexión a la base de datos"""
         if self._connection:
             self._connection.close()
             self._connection = None
-            print("[OK] Conexion a base de datos cerrada")
+            logger.info("Conexión a la base de datos cerrada")
 
     @classmethod
     def reset_instance(cls):
@@ -94,6 +270,28 @@ class DatabaseConnection:
                 cls._instance._connection.close()
             cls._instance = None
 
+    @classmethod
+    def _tras_fork(cls):
+        """
+        En el proceso hijo de un fork. Una conexión SQLite no se puede usar a
+        ambos lados de un fork. Si el padre no la cerró antes, el hijo la
+        aparta sin usarla ni cerrarla (cerrarla podría deshacer una
+        transacción del padre), y tiene que volver a llamar a connect().
+        """
+        cls._lock = Lock()
+        for instancia in list(cls._instancias):
+            if instancia._connection is not None:
+                _conexiones_heredadas.append(instancia._connection)
+                instancia._connection = None
+            instancia._hilo = _EstadoHilo()
+            instancia._lock_transaccion = RLock()
+
+
+# Conexiones del proceso padre: se mantienen referenciadas para que el
+# recolector no las cierre en el hijo
+_conexiones_heredadas = []
+os.register_at_fork(after_in_child=DatabaseConnection._tras_fork)
+
 
 class SessionManager:
     """
@@ -126,13 +324,21 @@ class SessionManager:
         """
         Crea una nueva sesión para un usuario.
 
+        Dentro de una petición los datos se guardan en la sesión de Flask
+        (cookie firmada del propio cliente): con un único usuario actual en
+        memoria, las peticiones concurrentes de distintos usuarios se
+        mezclarían, y los ids de docentes y administrativos coinciden.
+
         Args:
             user_id: ID del usuario
             user_data: Datos del usuario a almacenar en sesión
         """
-        self._sessions[user_id] = user_data
-        self._current_user_id = user_id
-        print(f"[OK] Sesion creada para usuario: {user_data.get('nombre_completo')}")
+        if has_request_context():
+            sesion_flask['usuario'] = user_data
+        else:
+            self._sessions[user_id] = user_data
+            self._current_user_id = user_id
+        logger.info("Sesión creada para el usuario %s (%s)", user_id, user_data.get('rol'))
 
     def obtener_sesion_actual(self) -> Optional[dict]:
         """
@@ -141,6 +347,8 @@ class SessionManager:
         Returns:
             Datos del usuario en sesión o None
         """
+        if has_request_context():
+            return sesion_flask.get('usuario')
         if self._current_user_id:
             return self._sessions.get(self._current_user_id)
         return None
@@ -152,16 +360,20 @@ class SessionManager:
         Returns:
             ID del usuario o None
         """
-        return self._current_user_id
+        sesion = self.obtener_sesion_actual()
+        return sesion['id'] if sesion else None
 
     def cerrar_sesion(self):
         """Cierra la sesión actual"""
-        if self._current_user_id:
-            user_data = self._sessions.get(self._current_user_id)
-            if user_data:
-                print(f"[OK] Sesion cerrada para: {user_data.get('nombre_completo')}")
-            del self._sessions[self._current_user_id]
+        if has_request_context():
+            user_data = sesion_flask.pop('usuario', None)
+        elif self._current_user_id:
+            user_data = self._sessions.pop(self._current_user_id, None)
             self._current_user_id = None
+        else:
+            user_data = None
+        if user_data:
+            logger.info("Sesión cerrada para el usuario %s (%s)", user_data.get('id'), user_data.get('rol'))
 
     def hay_sesion_activa(self) -> bool:
         """
@@ -170,7 +382,7 @@ class SessionManager:
         Returns:
             True si hay sesión activa, False en caso contrario
         """
-        return self._current_user_id is not None
+        return self.obtener_sesion_actual() is not None
 
     @classmethod
     def reset_instance(cls):
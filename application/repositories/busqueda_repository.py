@@ -0,0 +1,163 @@
+"""
+Repositorio de Búsqueda
+Búsqueda de texto completo con SQLite FTS5 sobre docentes, materias y
+notificaciones.
+
+Las tablas FTS son de contenido externo (content='docentes', ...): no
+duplican el texto, solo el índice invertido. Los triggers mantienen el
+índice sincronizado con cada INSERT, UPDATE y DELETE de las tablas base.
+"""
+
+import re
+from typing import Dict, List
+from application.utils.trazas import trazar_clase
+
+
+# Marcadores internos para los fragmentos; se convierten a <mark> tras escapar HTML
+MARCA_INICIO = '\x02'
+MARCA_FIN = '\x03'
+
+
+# (tabla_fts, tabla_base, columnas)
+_TABLAS_FTS = [
+    ('docentes_fts', 'docentes', ['nombre_completo', 'especialidad', 'biografia', 'departamento']),
+    ('materias_fts', 'materias', ['nombre', 'codigo', 'descripcion']),
+    # usuario_id se indexa para filtrar por usuario dentro del propio MATCH
+    ('notificaciones_fts', 'notificaciones', ['titulo', 'mensaje', 'usuario_id']),
+]
+
+
+def _ddl_tabla_fts(tabla_fts: str, tabla: str, columnas: List[str]) -> List[str]:
+    """Genera la tabla FTS5 y los triggers que la sincronizan"""
+    cols = ', '.join(columnas)
+    nuevos = ', '.join(f'new.{c}' for c in columnas)
+    viejos = ', '.join(f'old.{c}' for c in columnas)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {tabla_fts} USING fts5(
+                {cols}, content='{tabla}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2')""",
+        f"""CREATE TRIGGER IF NOT EXISTS {tabla}_ai AFTER INSERT ON {tabla} BEGIN
+                INSERT INTO {tabla_fts}(rowid, {cols}) VALUES (new.id, {nuevos});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {tabla}_ad AFTER DELETE ON {tabla} BEGIN
+                INSERT INTO {tabla_fts}({tabla_fts}, rowid, {cols})
+                VALUES ('delete', old.id, {viejos});
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {tabla}_au AFTER UPDATE OF {cols} ON {tabla} BEGIN
+                INSERT INTO {tabla_fts}({tabla_fts}, rowid, {cols})
+                VALUES ('delete', old.id, {viejos});
+                INSERT INTO {tabla_fts}(rowid, {cols}) VALUES (new.id, {nuevos});
+            END""",
+    ]
+
+
+@trazar_clase('repositorio')
+class BusquedaRepository:
+    """
+    Repositorio de búsqueda de texto completo.
+
+    Patrón: Repository (solo lectura sobre los índices FTS5)
+    Principio SRP: Única responsabilidad de consultar los índices de búsqueda.
+    """
+
+    def __init__(self, db_connection):
+        """
+        Args:
+            db_connection: Conexión a la base de datos (Singleton)
+        """
+        self._db = db_connection
+
+    def asegurar_esquema(self):
+        """
+        Crea las tablas FTS5 y sus triggers si no existen.
+        Si una tabla se crea en este momento, se indexan los datos existentes.
+        """
+        conn = self._db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'")
+        existentes = {row[0] for row in cursor.fetchall()}
+
+        for tabla_fts, tabla, columnas in _TABLAS_FTS:
+            for sentencia in _ddl_tabla_fts(tabla_fts, tabla, columnas):
+                cursor.execute(sentencia)
+            if tabla_fts not in existentes:
+                cursor.execute(f"INSERT INTO {tabla_fts}({tabla_fts}) VALUES ('rebuild')")
+
+        self._db.confirmar()
+
+    @staticmethod
+    def construir_consulta(texto: str) -> str:
+        """
+        Convierte el texto del usuario en una consulta FTS5 segura.
+        Cada palabra se busca como prefijo y todas deben aparecer (AND).
+
+        Returns:
+            Consulta FTS5 o cadena vacía si no hay términos válidos
+        """
+        terminos = re.findall(r'\w+', texto or '')
+        return ' '.join(f'"{t}"*' for t in terminos if len(t) >= 2)
+
+    def buscar_docentes(self, consulta: str, limite: int = 10) -> List[Dict]:
+        """Busca docentes activos ordenados por bm25"""
+        cursor = self._db.get_connection().cursor()
+        cursor.execute(f"""
+            SELECT d.id, d.nombre_completo, d.email, d.departamento, d.especialidad,
+                   snippet(docentes_fts, -1, '{MARCA_INICIO}', '{MARCA_FIN}', '…', 12)
+            FROM docentes_fts
+            JOIN docentes d ON d.id = docentes_fts.rowid
+            WHERE docentes_fts MATCH ? AND d.activo = 1
+            ORDER BY bm25(docentes_fts, 10.0, 4.0, 1.0, 2.0)
+            LIMIT ?
+        """, (consulta, limite))
+        return [{
+            'id': row[0],
+            'nombre_completo': row[1],
+            'email': row[2],
+            'departamento': row[3],
+            'especialidad': row[4],
+            'fragmento': row[5]
+        } for row in cursor.fetchall()]
+
+    def buscar_materias(self, consulta: str, limite: int = 10) -> List[Dict]:
+        """Busca materias ordenadas por bm25"""
+        cursor = self._db.get_connection().cursor()
+        cursor.execute(f"""
+            SELECT m.id, m.nombre, m.codigo, m.aula, m.docente_id,
+                   snippet(materias_fts, -1, '{MARCA_INICIO}', '{MARCA_FIN}', '…', 12)
+            FROM materias_fts
+            JOIN materias m ON m.id = materias_fts.rowid
+            WHERE materias_fts MATCH ?
+            ORDER BY bm25(materias_fts, 10.0, 8.0, 1.0)
+            LIMIT ?
+        """, (consulta, limite))
+        return [{
+            'id': row[0],
+            'nombre': row[1],
+            'codigo': row[2],
+            'aula': row[3],
+            'docente_id': row[4],
+            'fragmento': row[5]
+        } for row in cursor.fetchall()]
+
+    def buscar_notificaciones(self, consulta: str, usuario_id: int,
+                              limite: int = 10) -> List[Dict]:
+        """Busca en las notificaciones de un usuario ordenadas por bm25"""
+        consulta_usuario = f'usuario_id : "{int(usuario_id)}" AND {{titulo mensaje}} : ({consulta})'
+        cursor = self._db.get_connection().cursor()
+        cursor.execute(f"""
+            SELECT n.id, n.titulo, n.tipo, n.leida, n.fecha_creacion,
+                   snippet(notificaciones_fts, 1, '{MARCA_INICIO}', '{MARCA_FIN}', '…', 12)
+            FROM notificaciones_fts
+            JOIN notificaciones n ON n.id = notificaciones_fts.rowid
+            WHERE notificaciones_fts MATCH ?
+            ORDER BY bm25(notificaciones_fts, 5.0, 1.0, 0.0)
+            LIMIT ?
+        """, (consulta_usuario, limite))
+        return [{
+            'id': row[0],
+            'titulo': row[1],
+            'tipo': row[2],
+            'leida': bool(row[3]),
+            'fecha_creacion': row[4],
+            'fragmento': row[5]
+        } for row in cursor.fetchall()]
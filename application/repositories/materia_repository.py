@@ -3,11 +3,27 @@ Repositorio de Materias
 Implementa patrón Repository para materias y horarios.
 """
 
-from typing import List, Optional
-from application.patterns.repository import BaseRepository
+from typing import Dict, List, Optional, Tuple
+from application.patterns.repository import BaseRepository, escritura
 from application.models.materia import Materia, HorarioClase
 
 
+def clave_horario_docente(docente_id: int) -> str:
+    """Clave del VersionRegistry para el horario semanal de un docente"""
+    return f"horario_docente:{docente_id}"
+
+
+def _claves_horario(*docente_ids: Optional[int]) -> List[str]:
+    """Claves de versión de horario de los docentes afectados (sin repetir ni None)"""
+    return [clave_horario_docente(d) for d in sorted({d for d in docente_ids if d is not None})]
+
+
+def _docente_de_materia(cursor, materia_id: int) -> Optional[int]:
+    cursor.execute("SELECT docente_id FROM materias WHERE id = ?", (materia_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
 class MateriaRepository(BaseRepository[Materia]):
     """Repositorio para gestionar materias"""
 
@@ -15,7 +31,7 @@ class MateriaRepository(BaseRepository[Materia]):
         return "materias"
 
     def _map_to_entity(self, row) -> Materia:
-        return Materia(
+        materia = Materia(
             id=row[0],
             nombre=row[1],
             codigo=row[2],
@@ -23,7 +39,10 @@ class MateriaRepository(BaseRepository[Materia]):
             creditos=row[4],
             descripcion=row[5] or ""
         )
+        materia.docente_id = row[6]
+        return materia
 
+    @escritura
     def crear(self, materia: Materia) -> Materia:
         conn = self._db.get_connection()
         cursor = conn.cursor()
@@ -32,50 +51,92 @@ class MateriaRepository(BaseRepository[Materia]):
             VALUES (?, ?, ?, ?, ?, ?)
         """, (materia.nombre, materia.codigo, materia.aula, materia.creditos,
               materia.descripcion, materia.docente_id))
-        conn.commit()
         materia.id = cursor.lastrowid
+        self._marcar_cambio('materias', 'catalogo', *_claves_horario(materia.docente_id), materia_id=materia.id)
         return materia
 
+    @escritura
     def actualizar(self, materia: Materia) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        docente_anterior = _docente_de_materia(cursor, materia.id)
         cursor.execute("""
             UPDATE materias
             SET nombre = ?, codigo = ?, aula = ?, creditos = ?, descripcion = ?, docente_id = ?
             WHERE id = ?
         """, (materia.nombre, materia.codigo, materia.aula, materia.creditos,
               materia.descripcion, materia.docente_id, materia.id))
-        conn.commit()
+        self._marcar_cambio('materias', 'catalogo', *_claves_horario(docente_anterior, materia.docente_id),
+                            materia_id=materia.id)
         return cursor.rowcount > 0
 
+    @escritura
     def eliminar(self, id: int) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        docente_anterior = _docente_de_materia(cursor, id)
         cursor.execute("DELETE FROM materias WHERE id = ?", (id,))
-        conn.commit()
+        self._marcar_cambio('materias', 'catalogo', *_claves_horario(docente_anterior), materia_id=id)
         return cursor.rowcount > 0
 
+    @escritura
     def asignar_docente(self, materia_id: int, docente_id: Optional[int]) -> bool:
         """Asigna o desasigna un docente a una materia"""
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        docente_anterior = _docente_de_materia(cursor, materia_id)
         cursor.execute("UPDATE materias SET docente_id = ? WHERE id = ?",
                       (docente_id, materia_id))
-        conn.commit()
+        self._marcar_cambio('materias', 'catalogo', *_claves_horario(docente_anterior, docente_id),
+                            materia_id=materia_id)
         return cursor.rowcount > 0
 
+    def obtener_pagina(self, despues_de: Optional[int], limite: Optional[int],
+                       docente_id: Optional[int] = None) -> List[Materia]:
+        """
+        Materias en orden de id, paginadas por cursor (keyset) en la consulta.
+
+        Args:
+            despues_de: Cursor: solo las de id mayor (None = desde el principio)
+            limite: Máximo de materias (None = todas)
+            docente_id: Solo las asignadas a ese docente (None = todas)
+        """
+        cursor = self._db.get_connection().cursor()
+        if docente_id is None:
+            cursor.execute("SELECT * FROM materias WHERE id > ? ORDER BY id LIMIT ?",
+                           self._keyset(despues_de, limite))
+        else:
+            cursor.execute("SELECT * FROM materias WHERE docente_id = ? AND id > ? ORDER BY id LIMIT ?",
+                           (docente_id, *self._keyset(despues_de, limite)))
+        return [self._map_to_entity(row) for row in cursor.fetchall()]
+
     def obtener_por_docente(self, docente_id: int) -> List[Materia]:
         """Obtiene todas las materias asignadas a un docente"""
         cursor = self._db.get_connection().cursor()
         cursor.execute("SELECT * FROM materias WHERE docente_id = ?", (docente_id,))
         return [self._map_to_entity(row) for row in cursor.fetchall()]
 
+    def contar_por_docente(self) -> Dict[int, int]:
+        """Número de materias asignadas a cada docente, en una sola consulta"""
+        cursor = self._db.get_connection().cursor()
+        cursor.execute("""
+            SELECT docente_id, COUNT(*) FROM materias
+            WHERE docente_id IS NOT NULL GROUP BY docente_id
+        """)
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
     def obtener_sin_asignar(self) -> List[Materia]:
         """Obtiene materias sin docente asignado"""
         cursor = self._db.get_connection().cursor()
         cursor.execute("SELECT * FROM materias WHERE docente_id IS NULL")
         return [self._map_to_entity(row) for row in cursor.fetchall()]
 
+    def obtener_aulas(self) -> List[str]:
+        """Obtiene la lista de aulas distintas usadas por las materias"""
+        cursor = self._db.get_connection().cursor()
+        cursor.execute("SELECT DISTINCT aula FROM materias ORDER BY aula")
+        return [row[0] for row in cursor.fetchall()]
+
 
 class HorarioRepository(BaseRepository[HorarioClase]):
     """Repositorio para gestionar horarios de clases"""
@@ -92,6 +153,7 @@ class HorarioRepository(BaseRepository[HorarioClase]):
             hora_fin=row[4]
         )
 
+    @escritura
     def crear(self, horario: HorarioClase) -> HorarioClase:
         conn = self._db.get_connection()
         cursor = conn.cursor()
@@ -99,10 +161,12 @@ class HorarioRepository(BaseRepository[HorarioClase]):
             INSERT INTO horarios (materia_id, dia_semana, hora_inicio, hora_fin)
             VALUES (?, ?, ?, ?)
         """, (horario.materia_id, horario.dia_semana, horario.hora_inicio, horario.hora_fin))
-        conn.commit()
         horario.id = cursor.lastrowid
+        docente_id = _docente_de_materia(cursor, horario.materia_id)
+        self._marcar_cambio('horarios', 'catalogo', *_claves_horario(docente_id), materia_id=horario.materia_id)
         return horario
 
+    @escritura
     def actualizar(self, horario: HorarioClase) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
@@ -111,15 +175,26 @@ class HorarioRepository(BaseRepository[HorarioClase]):
             SET dia_semana = ?, hora_inicio = ?, hora_fin = ?
             WHERE id = ?
         """, (horario.dia_semana, horario.hora_inicio, horario.hora_fin, horario.id))
-        conn.commit()
-        return cursor.rowcount > 0
+        actualizado = cursor.rowcount > 0
+        docente_id = _docente_de_materia(cursor, horario.materia_id)
+        self._marcar_cambio('horarios', 'catalogo', *_claves_horario(docente_id), materia_id=horario.materia_id)
+        return actualizado
 
+    @escritura
     def eliminar(self, id: int) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        cursor.execute("""
+            SELECT h.materia_id, m.docente_id
+            FROM horarios h LEFT JOIN materias m ON m.id = h.materia_id
+            WHERE h.id = ?
+        """, (id,))
+        row = cursor.fetchone()
         cursor.execute("DELETE FROM horarios WHERE id = ?", (id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        eliminado = cursor.rowcount > 0
+        if row:
+            self._marcar_cambio('horarios', 'catalogo', *_claves_horario(row[1]), materia_id=row[0])
+        return eliminado
 
     def obtener_por_materia(self, materia_id: int) -> List[HorarioClase]:
         """Obtiene todos los horarios de una materia"""
@@ -132,3 +207,62 @@ class HorarioRepository(BaseRepository[HorarioClase]):
         cursor = self._db.get_connection().cursor()
         cursor.execute("SELECT * FROM horarios WHERE dia_semana = ?", (dia_semana,))
         return [self._map_to_entity(row) for row in cursor.fetchall()]
+
+    def obtener_por_docente(self, docente_id: int) -> List[Tuple[HorarioClase, Materia]]:
+        """
+        Obtiene los horarios de todas las materias de un docente en una sola consulta.
+
+        Returns:
+            Lista de tuplas (horario, materia)
+        """
+        cursor = self._db.get_connection().cursor()
+        cursor.execute("""
+            SELECT h.id, h.materia_id, h.dia_semana, h.hora_inicio, h.hora_fin,
+                   m.nombre, m.codigo, m.aula, m.creditos, m.descripcion
+            FROM horarios h
+            JOIN materias m ON m.id = h.materia_id
+            WHERE m.docente_id = ?
+            ORDER BY h.hora_inicio
+        """, (docente_id,))
+        resultado = []
+        for row in cursor.fetchall():
+            materia = Materia(id=row[1], nombre=row[5], codigo=row[6], aula=row[7],
+                              creditos=row[8], descripcion=row[9] or "")
+            materia.docente_id = docente_id
+            resultado.append((self._map_to_entity(row), materia))
+        return resultado
+
+    def obtener_ocupacion(self, materia_id: Optional[int] = None, docente_id: Optional[int] = None,
+                          despues_de: Optional[int] = None, limite: Optional[int] = None) -> List[tuple]:
+        """
+        Obtiene los horarios junto con el docente y el aula de su materia, en
+        orden de id.
+
+        Args:
+            materia_id: Limita el resultado a una materia (None = todas)
+            docente_id: Limita el resultado a un docente (None = todos)
+            despues_de: Cursor: solo los de id mayor (None = desde el principio)
+            limite: Máximo de horarios (None = todos)
+
+        Returns:
+            Lista de tuplas (horario_id, materia_id, dia_semana, hora_inicio,
+            hora_fin, docente_id, aula)
+        """
+        desde, maximo = self._keyset(despues_de, limite)
+        filtros, valores = ['h.id > ?'], [desde]
+        if materia_id is not None:
+            filtros.append('h.materia_id = ?')
+            valores.append(materia_id)
+        if docente_id is not None:
+            filtros.append('m.docente_id = ?')
+            valores.append(docente_id)
+        cursor = self._db.get_connection().cursor()
+        cursor.execute(f"""
+            SELECT h.id, h.materia_id, h.dia_semana, h.hora_inicio, h.hora_fin,
+                   m.docente_id, m.aula
+            FROM horarios h
+            JOIN materias m ON m.id = h.materia_id
+            WHERE {' AND '.join(filtros)}
+            ORDER BY h.id LIMIT ?
+        """, (*valores, maximo))
+        return [tuple(row) for row in cursor.fetchall()]
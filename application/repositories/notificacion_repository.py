@@ -4,11 +4,16 @@ Gestiona las notificaciones del sistema.
 """
 
 from typing import List, Optional
-from application.patterns.repository import BaseRepository
+from application.patterns.repository import BaseRepository, escritura
 from application.models.notificacion import Notificacion, TipoNotificacion
 from datetime import datetime
 
 
+def clave_notificaciones_usuario(usuario_id: int) -> str:
+    """Clave del VersionRegistry para las notificaciones de un usuario"""
+    return f"notificaciones:{usuario_id}"
+
+
 class NotificacionRepository(BaseRepository[Notificacion]):
     """Repositorio para gestionar notificaciones"""
 
@@ -27,6 +32,17 @@ class NotificacionRepository(BaseRepository[Notificacion]):
         notif._fecha_creacion = datetime.fromisoformat(row[6]) if row[6] else datetime.now()
         return notif
 
+    def _marcar_notificaciones(self, *usuarios: Optional[int]):
+        claves = [clave_notificaciones_usuario(u) for u in sorted(set(usuarios) - {None})]
+        if claves:
+            self._marcar_cambio(*claves)
+
+    def _usuario_de_notificacion(self, cursor, id: int) -> Optional[int]:
+        cursor.execute("SELECT usuario_id FROM notificaciones WHERE id = ?", (id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    @escritura
     def crear(self, notificacion: Notificacion) -> Notificacion:
         conn = self._db.get_connection()
         cursor = conn.cursor()
@@ -35,25 +51,52 @@ class NotificacionRepository(BaseRepository[Notificacion]):
             VALUES (?, ?, ?, ?, ?, ?)
         """, (notificacion.usuario_id, notificacion.titulo, notificacion.mensaje,
               notificacion.tipo.value, 0, notificacion.fecha_creacion.isoformat()))
-        conn.commit()
         notificacion.id = cursor.lastrowid
+        self._marcar_notificaciones(notificacion.usuario_id)
         return notificacion
 
+    @escritura
+    def crear_lote(self, notificaciones: List[Notificacion]) -> int:
+        """
+        Inserta varias notificaciones con un solo executemany y marca una vez
+        la versión de cada destinatario.
+
+        Returns:
+            Número de notificaciones insertadas
+        """
+        if not notificaciones:
+            return 0
+        conn = self._db.get_connection()
+        conn.executemany("""
+            INSERT INTO notificaciones (usuario_id, titulo, mensaje, tipo, leida, fecha_creacion)
+            VALUES (?, ?, ?, ?, 0, ?)
+        """, [(n.usuario_id, n.titulo, n.mensaje, n.tipo.value, n.fecha_creacion.isoformat())
+              for n in notificaciones])
+        self._marcar_notificaciones(*(n.usuario_id for n in notificaciones))
+        return len(notificaciones)
+
+    @escritura
     def actualizar(self, notificacion: Notificacion) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             UPDATE notificaciones SET leida = ? WHERE id = ?
         """, (1 if notificacion.leida else 0, notificacion.id))
-        conn.commit()
-        return cursor.rowcount > 0
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            self._marcar_notificaciones(self._usuario_de_notificacion(cursor, notificacion.id))
+        return actualizado
 
+    @escritura
     def eliminar(self, id: int) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        usuario_id = self._usuario_de_notificacion(cursor, id)
         cursor.execute("DELETE FROM notificaciones WHERE id = ?", (id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        eliminado = cursor.rowcount > 0
+        if eliminado:
+            self._marcar_notificaciones(usuario_id)
+        return eliminado
 
     def obtener_por_usuario(self, usuario_id: int) -> List[Notificacion]:
         """Obtiene todas las notificaciones de un usuario"""
@@ -63,6 +106,21 @@ class NotificacionRepository(BaseRepository[Notificacion]):
         """, (usuario_id,))
         return [self._map_to_entity(row) for row in cursor.fetchall()]
 
+    def obtener_pagina(self, usuario_id: int, despues_de: Optional[int],
+                       limite: Optional[int]) -> List[Notificacion]:
+        """
+        Notificaciones de un usuario en orden de id, paginadas por cursor
+        (keyset) en la consulta.
+
+        Args:
+            despues_de: Cursor: solo las de id mayor (None = desde el principio)
+            limite: Máximo de notificaciones (None = todas)
+        """
+        cursor = self._db.get_connection().cursor()
+        cursor.execute("SELECT * FROM notificaciones WHERE usuario_id = ? AND id > ? ORDER BY id LIMIT ?",
+                       (usuario_id, *self._keyset(despues_de, limite)))
+        return [self._map_to_entity(row) for row in cursor.fetchall()]
+
     def obtener_no_leidas(self, usuario_id: int) -> List[Notificacion]:
         """Obtiene notificaciones no leídas de un usuario"""
         cursor = self._db.get_connection().cursor()
@@ -73,19 +131,31 @@ class NotificacionRepository(BaseRepository[Notificacion]):
         """, (usuario_id,))
         return [self._map_to_entity(row) for row in cursor.fetchall()]
 
+    def contar_no_leidas(self) -> int:
+        """Notificaciones sin leer de todos los usuarios"""
+        cursor = self._db.get_connection().cursor()
+        cursor.execute("SELECT COUNT(*) FROM notificaciones WHERE leida = 0")
+        return cursor.fetchone()[0]
+
+    @escritura
     def marcar_como_leida(self, id: int) -> bool:
         """Marca una notificación como leída"""
         conn = self._db.get_connection()
         cursor = conn.cursor()
         cursor.execute("UPDATE notificaciones SET leida = 1 WHERE id = ?", (id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            self._marcar_notificaciones(self._usuario_de_notificacion(cursor, id))
+        return actualizado
 
+    @escritura
     def marcar_todas_leidas(self, usuario_id: int) -> bool:
         """Marca todas las notificaciones de un usuario como leídas"""
         conn = self._db.get_connection()
         cursor = conn.cursor()
         cursor.execute("UPDATE notificaciones SET leida = 1 WHERE usuario_id = ?",
                       (usuario_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            self._marcar_notificaciones(usuario_id)
+        return actualizado
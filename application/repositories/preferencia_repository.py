@@ -3,11 +3,16 @@ Repositorio de Preferencias
 Gestiona las preferencias de enseñanza de los docentes.
 """
 
-from typing import List, Optional
-from application.patterns.repository import BaseRepository
+from typing import Dict, Iterable, List, Optional
+from application.patterns.repository import BaseRepository, escritura
 from application.models.preferencia import PreferenciaEnsenanza, EstadoPreferencia
 
 
+def clave_preferencias_docente(docente_id: int) -> str:
+    """Clave del VersionRegistry para las preferencias de un docente"""
+    return f"preferencias:{docente_id}"
+
+
 class PreferenciaRepository(BaseRepository[PreferenciaEnsenanza]):
     """Repositorio para gestionar preferencias de enseñanza"""
 
@@ -25,36 +30,103 @@ class PreferenciaRepository(BaseRepository[PreferenciaEnsenanza]):
             estado=estado
         )
 
+    def _marcar_preferencias(self, docentes: Iterable[Optional[int]], cambios: List[tuple]):
+        """
+        Args:
+            docentes: Docentes cuyas preferencias cambian
+            cambios: Pares (anterior, nueva) de filas de demanda (ver
+                _filas_demanda); None en un lado si la preferencia se crea o
+                se elimina. Los observers los aplican como deltas sin releer
+                la tabla.
+        """
+        claves = ['preferencias']
+        claves.extend(clave_preferencias_docente(d) for d in sorted(set(docentes) - {None}))
+        self._marcar_cambio(*claves, cambios=cambios)
+
+    def _filas_demanda(self, cursor, ids: List[int]) -> Dict[int, tuple]:
+        """{id: (docente_id, materia_id, dia_semana, horario, estado)} de las preferencias indicadas"""
+        if not ids:
+            return {}
+        cursor.execute(f"""
+            SELECT id, docente_id, materia_id, dia_semana, horario, estado
+            FROM preferencias WHERE id IN ({', '.join('?' * len(ids))})
+        """, ids)
+        return {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+    @escritura
+    def _cambiar_estado(self, id: int, estado: EstadoPreferencia) -> bool:
+        conn = self._db.get_connection()
+        cursor = conn.cursor()
+        anterior = self._filas_demanda(cursor, [id]).get(id)
+        cursor.execute("UPDATE preferencias SET estado = ? WHERE id = ?", (estado.value, id))
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            self._marcar_preferencias([anterior[0]], [(anterior, anterior[:4] + (estado.value,))])
+        return actualizado
+
+    @escritura
     def crear(self, preferencia: PreferenciaEnsenanza) -> PreferenciaEnsenanza:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        nueva = (preferencia.docente_id, preferencia.materia_id, preferencia.dia_semana,
+                 preferencia.horario, preferencia.estado.value)
         cursor.execute("""
             INSERT INTO preferencias (docente_id, materia_id, dia_semana, horario, estado)
             VALUES (?, ?, ?, ?, ?)
-        """, (preferencia.docente_id, preferencia.materia_id, preferencia.dia_semana,
-              preferencia.horario, preferencia.estado.value))
-        conn.commit()
+        """, nueva)
         preferencia.id = cursor.lastrowid
+        self._marcar_preferencias([preferencia.docente_id], [(None, nueva)])
         return preferencia
 
+    @escritura
+    def crear_lote(self, preferencias: List[PreferenciaEnsenanza]) -> int:
+        """
+        Inserta varias preferencias con un solo executemany y marca una vez
+        la versión de cada docente.
+
+        Returns:
+            Número de preferencias insertadas
+        """
+        if not preferencias:
+            return 0
+        filas = [(p.docente_id, p.materia_id, p.dia_semana, p.horario, p.estado.value)
+                 for p in preferencias]
+        conn = self._db.get_connection()
+        conn.executemany("""
+            INSERT INTO preferencias (docente_id, materia_id, dia_semana, horario, estado)
+            VALUES (?, ?, ?, ?, ?)
+        """, filas)
+        self._marcar_preferencias([fila[0] for fila in filas], [(None, fila) for fila in filas])
+        return len(filas)
+
+    @escritura
     def actualizar(self, preferencia: PreferenciaEnsenanza) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        anterior = self._filas_demanda(cursor, [preferencia.id]).get(preferencia.id)
         cursor.execute("""
             UPDATE preferencias
             SET materia_id = ?, dia_semana = ?, horario = ?, estado = ?
             WHERE id = ?
         """, (preferencia.materia_id, preferencia.dia_semana, preferencia.horario,
               preferencia.estado.value, preferencia.id))
-        conn.commit()
-        return cursor.rowcount > 0
+        actualizado = cursor.rowcount > 0
+        if actualizado:
+            nueva = (anterior[0], preferencia.materia_id, preferencia.dia_semana,
+                     preferencia.horario, preferencia.estado.value)
+            self._marcar_preferencias([anterior[0]], [(anterior, nueva)])
+        return actualizado
 
+    @escritura
     def eliminar(self, id: int) -> bool:
         conn = self._db.get_connection()
         cursor = conn.cursor()
+        anterior = self._filas_demanda(cursor, [id]).get(id)
         cursor.execute("DELETE FROM preferencias WHERE id = ?", (id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        eliminado = cursor.rowcount > 0
+        if eliminado:
+            self._marcar_preferencias([anterior[0]], [(anterior, None)])
+        return eliminado
 
     def obtener_por_docente(self, docente_id: int) -> List[PreferenciaEnsenanza]:
         """Obtiene todas las preferencias de un docente"""
@@ -68,20 +140,70 @@ class PreferenciaRepository(BaseRepository[PreferenciaEnsenanza]):
         cursor.execute("SELECT * FROM preferencias WHERE estado = ?", (estado.value,))
         return [self._map_to_entity(row) for row in cursor.fetchall()]
 
+    def contar_por_estado(self, estado: EstadoPreferencia) -> int:
+        """Número de preferencias en un estado"""
+        cursor = self._db.get_connection().cursor()
+        cursor.execute("SELECT COUNT(*) FROM preferencias WHERE estado = ?", (estado.value,))
+        return cursor.fetchone()[0]
+
     def aprobar_preferencia(self, id: int) -> bool:
         """Aprueba una preferencia"""
-        conn = self._db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE preferencias SET estado = ? WHERE id = ?",
-                      (EstadoPreferencia.APROBADA.value, id))
-        conn.commit()
-        return cursor.rowcount > 0
+        return self._cambiar_estado(id, EstadoPreferencia.APROBADA)
 
     def rechazar_preferencia(self, id: int) -> bool:
         """Rechaza una preferencia"""
+        return self._cambiar_estado(id, EstadoPreferencia.RECHAZADA)
+
+    def obtener_con_detalle(self, estados: Iterable[EstadoPreferencia],
+                            docente_id: Optional[int] = None, despues_de: Optional[int] = None,
+                            limite: Optional[int] = None) -> List[tuple]:
+        """
+        Preferencias con el nombre del docente y la materia y el aula, en una
+        sola consulta y en orden de id.
+
+        Args:
+            estados: Estados a incluir
+            docente_id: Limita el resultado a un docente (None = todos)
+            despues_de: Cursor: solo las de id mayor (None = desde el principio)
+            limite: Máximo de preferencias (None = todas)
+
+        Returns:
+            Lista de tuplas (id, docente_id, materia_id, dia_semana, horario,
+            estado, docente_nombre, materia_nombre, aula)
+        """
+        valores = [estado.value for estado in estados]
+        marcadores = ', '.join('?' * len(valores))
+        filtro_docente = ''
+        if docente_id is not None:
+            filtro_docente = 'AND p.docente_id = ?'
+            valores.append(docente_id)
+        cursor = self._db.get_connection().cursor()
+        cursor.execute(f"""
+            SELECT p.id, p.docente_id, p.materia_id, p.dia_semana, p.horario, p.estado,
+                   d.nombre_completo, m.nombre, m.aula
+            FROM preferencias p
+            LEFT JOIN docentes d ON d.id = p.docente_id
+            LEFT JOIN materias m ON m.id = p.materia_id
+            WHERE p.estado IN ({marcadores}) {filtro_docente} AND p.id > ?
+            ORDER BY p.id LIMIT ?
+        """, (*valores, *self._keyset(despues_de, limite)))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    @escritura
+    def cambiar_estado_lote(self, ids: List[int], estado: EstadoPreferencia) -> int:
+        """
+        Cambia el estado de varias preferencias con un solo executemany.
+
+        Returns:
+            Número de preferencias actualizadas
+        """
+        if not ids:
+            return 0
         conn = self._db.get_connection()
         cursor = conn.cursor()
-        cursor.execute("UPDATE preferencias SET estado = ? WHERE id = ?",
-                      (EstadoPreferencia.RECHAZADA.value, id))
-        conn.commit()
-        return cursor.rowcount > 0
+        anteriores = self._filas_demanda(cursor, ids)
+        cursor.executemany("UPDATE preferencias SET estado = ? WHERE id = ?",
+                           [(estado.value, id) for id in ids])
+        self._marcar_preferencias([anterior[0] for anterior in anteriores.values()],
+                                  [(anterior, anterior[:4] + (estado.value,)) for anterior in anteriores.values()])
+        return cursor.rowcount
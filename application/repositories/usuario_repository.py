@@ -5,7 +5,7 @@ Aplica principios SOLID (SRP, DIP, ISP).
 """
 
 from typing import List, Optional
-from application.patterns.repository import BaseRepository
+from application.patterns.repository import BaseRepository, escritura
 from application.patterns.factory import UsuarioFactory
 from application.models.user import Usuario, Docente, Administrativo
 import hashlib
@@ -77,6 +77,7 @@ class UsuarioRepository(BaseRepository[Usuario]):
 
         return None
 
+    @escritura
     def crear(self, usuario: Usuario) -> Usuario:
         """
         Crea un nuevo usuario en la base de datos.
@@ -111,10 +112,11 @@ class UsuarioRepository(BaseRepository[Usuario]):
                   usuario.telefono, usuario.oficina, usuario.departamento,
                   usuario.cargo, usuario.biografia, 1))
 
-        conn.commit()
         usuario.id = cursor.lastrowid
+        self._marcar_usuario(usuario)
         return usuario
 
+    @escritura
     def actualizar(self, usuario: Usuario) -> bool:
         """
         Actualiza un usuario existente.
@@ -148,9 +150,16 @@ class UsuarioRepository(BaseRepository[Usuario]):
                   usuario.oficina, usuario.departamento, usuario.cargo,
                   usuario.biografia, usuario.id))
 
-        conn.commit()
+        self._marcar_usuario(usuario)
         return cursor.rowcount > 0
 
+    def _marcar_usuario(self, usuario: Usuario):
+        if isinstance(usuario, Docente):
+            self._marcar_cambio('docentes', 'catalogo', docente_id=usuario.id)
+        else:
+            self._marcar_cambio('catalogo', administrativo_id=usuario.id)
+
+    @escritura
     def actualizar_password(self, usuario_id: int, nueva_password: str, rol: str) -> bool:
         """
         Actualiza la contraseña de un usuario.
@@ -171,9 +180,9 @@ class UsuarioRepository(BaseRepository[Usuario]):
 
         cursor.execute(f"UPDATE {tabla} SET password = ? WHERE id = ?",
                       (password_hash, usuario_id))
-        conn.commit()
         return cursor.rowcount > 0
 
+    @escritura
     def eliminar(self, id: int, rol: str) -> bool:
         """
         Elimina (desactiva) un usuario.
@@ -190,7 +199,10 @@ class UsuarioRepository(BaseRepository[Usuario]):
 
         tabla = "docentes" if rol.lower() == "docente" else "administrativos"
         cursor.execute(f"UPDATE {tabla} SET activo = 0 WHERE id = ?", (id,))
-        conn.commit()
+        if tabla == "docentes":
+            self._marcar_cambio('docentes', 'catalogo', docente_id=id)
+        else:
+            self._marcar_cambio('catalogo', administrativo_id=id)
         return cursor.rowcount > 0
 
     def obtener_todos(self) -> List[Usuario]:
@@ -210,10 +222,18 @@ class UsuarioRepository(BaseRepository[Usuario]):
 
         return usuarios
 
-    def obtener_docentes(self) -> List[Docente]:
-        """Obtiene todos los docentes activos"""
+    def obtener_docentes(self, despues_de: Optional[int] = None,
+                         limite: Optional[int] = None) -> List[Docente]:
+        """
+        Obtiene los docentes activos en orden de id.
+
+        Args:
+            despues_de: Cursor: solo los de id mayor (None = desde el principio)
+            limite: Máximo de docentes (None = todos)
+        """
         cursor = self._db.get_connection().cursor()
-        cursor.execute("SELECT * FROM docentes WHERE activo = 1")
+        cursor.execute("SELECT * FROM docentes WHERE activo = 1 AND id > ? ORDER BY id LIMIT ?",
+                       self._keyset(despues_de, limite))
         return [UsuarioFactory.crear_desde_db('docente', row) for row in cursor.fetchall()]
 
     def obtener_administrativos(self) -> List[Administrativo]:
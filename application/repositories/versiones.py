@@ -0,0 +1,171 @@
+"""
+Registro de Versiones
+Un contador de versión por grupo de datos ('materias', 'catalogo',
+'horario_docente:3', ...). Los repositorios lo incrementan en cada escritura
+y las cachés en memoria (autocompletado, disponibilidad, calendario, feeds
+.ics, fragmentos de plantilla, ETag) lo comparan para saber si siguen
+vigentes sin consultar la base de datos.
+
+Las versiones se guardan en la tabla `versiones` de la propia base de datos
+y se incrementan en la misma transacción que la escritura, así que todos
+los workers de gunicorn ven las mismas. Cada worker guarda una copia en
+memoria y la pone al día al empezar cada petición (sincronizar): un
+PRAGMA data_version, que solo cambia cuando otra conexión confirma una
+transacción, y si cambió, las filas con versión mayor que la última leída.
+Un grupo que cambia en otro worker se notifica a los observers sin
+identificadores ({}): reconstruyen lo que tengan de ese grupo.
+
+Todas las versiones salen de un mismo contador creciente (la mayor de la
+tabla + 1), de modo que 'versión > última leída' encuentra todo lo nuevo.
+Si otro proceso incrementó un grupo y este lo vuelve a incrementar antes
+de sincronizar, la fila ya no muestra la versión ajena. Por eso cada fila
+guarda también la versión `anterior`: si es una que este proceso no había
+leído, el cambio se notifica sin identificadores, igual que en sincronizar.
+
+La fila '' guarda el origen del contador: al restaurar la base de datos
+desde la plantilla se mueve a la hora actual, y las versiones de antes no
+vuelven a repetirse.
+
+Cada aplicación (ContenedorServicios) tiene su registro y se lo pasa a sus
+repositorios; los servicios se suscriben al de los repositorios que reciben,
+así que los observers de una aplicación nunca reciben los eventos de otra.
+"""
+
+import time
+from threading import Lock
+from typing import Dict, Iterable, List
+from application.patterns.observer import Subject
+
+CLAVE_ORIGEN = ''
+
+_DDL = [
+    """CREATE TABLE IF NOT EXISTS versiones (
+            clave TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            anterior INTEGER
+        ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_versiones_version ON versiones(version)",
+]
+
+
+def origen_nuevo() -> int:
+    """Origen del contador: microsegundos desde epoch, mayor que cualquier versión anterior"""
+    return time.time_ns() // 1000
+
+
+class VersionRegistry(Subject):
+    """
+    Versiones de los grupos de datos de una aplicación, compartidas por
+    todos los procesos que usan la misma base de datos.
+
+    Además de versionar, notifica a sus observers cada cambio (evento = grupo)
+    para que los índices en memoria puedan aplicarlo de forma incremental.
+
+    Patrón: Observer (Subject)
+    Principio SRP: Única responsabilidad de versionar grupos de datos
+    """
+
+    def __init__(self, db_connection):
+        """
+        Args:
+            db_connection: Conexión a la base de datos (Singleton), con la
+                tabla versiones ya creada (asegurar_esquema)
+        """
+        super().__init__()
+        self._db = db_connection
+        self._versiones: Dict[str, int] = {}  # clave -> versión
+        self._origen = 0
+        self._ultima = 0      # mayor versión leída de la tabla
+        self._marca = None    # (conexión, PRAGMA data_version) de la última lectura
+        self._lock_versiones = Lock()
+        self.sincronizar()
+
+    @staticmethod
+    def asegurar_esquema(db_connection):
+        """Crea la tabla versiones y la fila de origen si no existen"""
+        conn = db_connection.get_connection()
+        for sentencia in _DDL:
+            conn.execute(sentencia)
+        columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(versiones)")}
+        if 'anterior' not in columnas:
+            conn.execute("ALTER TABLE versiones ADD COLUMN anterior INTEGER")
+        conn.execute("INSERT OR IGNORE INTO versiones (clave, version) VALUES (?, ?)",
+                     (CLAVE_ORIGEN, origen_nuevo()))
+        db_connection.confirmar()
+
+    @property
+    def origen(self) -> int:
+        """Identifica la base de datos: cambia si se restaura desde la plantilla"""
+        return self._origen
+
+    def obtener(self, clave: str) -> int:
+        """
+        Obtiene la versión de un grupo de datos (la copia en memoria; ver
+        sincronizar).
+
+        Args:
+            clave: Nombre del grupo (p. ej. 'materias')
+
+        Returns:
+            Versión actual (0 si nunca se ha modificado)
+        """
+        return self._versiones.get(clave, 0)
+
+    def sincronizar(self):
+        """
+        Trae las versiones que escribieron otros procesos y notifica a los
+        observers los grupos que cambiaron. Sin cambios cuesta un PRAGMA.
+        """
+        conn = self._db.get_connection()
+        marca = (id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+        if marca == self._marca:
+            return
+        filas = conn.execute("SELECT clave, version FROM versiones WHERE version > ?",
+                             (self._ultima,)).fetchall()
+        cambiadas = []
+        with self._lock_versiones:
+            for clave, version in filas:
+                self._ultima = max(self._ultima, version)
+                if clave == CLAVE_ORIGEN:
+                    self._origen = version
+                elif self._versiones.get(clave, 0) < version:
+                    self._versiones[clave] = version
+                    cambiadas.append(clave)
+            self._marca = marca
+        for clave in cambiadas:
+            self.notificar_observers(clave, {})
+
+    def incrementar(self, claves: Iterable[str], datos: dict):
+        """
+        Incrementa la versión de los grupos en la transacción en curso y,
+        cuando se confirma, actualiza la copia en memoria y notifica a los
+        observers.
+
+        Args:
+            claves: Grupos modificados
+            datos: Identificadores afectados (p. ej. {'materia_id': 3});
+                vacío si el cambio afecta a todo el grupo
+        """
+        claves = list(dict.fromkeys(claves))
+        if not claves:
+            return
+        filas: List[tuple] = self._db.get_connection().execute(f"""
+            INSERT INTO versiones (clave, version)
+            VALUES {', '.join(['(?, (SELECT MAX(version) + 1 FROM versiones))'] * len(claves))}
+            ON CONFLICT (clave) DO UPDATE SET anterior = versiones.version, version = excluded.version
+            RETURNING clave, version, anterior
+        """, claves).fetchall()
+
+        def aplicar():
+            # _ultima no avanza: una versión menor de otro proceso puede estar sin leer
+            ajenas = set()
+            with self._lock_versiones:
+                for clave, version, anterior in filas:
+                    if anterior is not None and anterior > self._versiones.get(clave, 0):
+                        ajenas.add(clave)
+                    self._versiones[clave] = max(self._versiones.get(clave, 0), version)
+            for clave in claves:
+                self.notificar_observers(clave, {} if clave in ajenas else datos)
+
+        # Dentro de una transacción los observers solo deben ver datos confirmados
+        self._db.al_confirmar(aplicar)
@@ -6,31 +6,50 @@ Aplica principios SOLID.
 
 from typing import List, Dict, Optional
 from application.repositories.usuario_repository import UsuarioRepository
-from application.repositories.materia_repository import MateriaRepository
+from application.repositories.materia_repository import MateriaRepository, HorarioRepository
 from application.repositories.preferencia_repository import PreferenciaRepository
 from application.patterns.observer import AsignacionSubject, PreferenciaSubject, NotificacionObserver
 from application.repositories.notificacion_repository import NotificacionRepository
 from application.models.user import Docente
+from application.models.materia import Materia, HorarioClase
+from application.services.revision_preferencias_service import RevisionPreferenciasService
+from application.utils.franjas import mascara_franja
+from application.utils.trazas import trazar_clase
 
 
+@trazar_clase('servicio')
 class AdministrativoService:
     """Servicio para operaciones administrativas - Principio SRP"""
 
     def __init__(self, usuario_repo: UsuarioRepository, materia_repo: MateriaRepository,
-                 preferencia_repo: PreferenciaRepository, notificacion_repo: NotificacionRepository):
+                 preferencia_repo: PreferenciaRepository, notificacion_repo: NotificacionRepository,
+                 horario_repo: Optional[HorarioRepository] = None,
+                 revision_service: Optional[RevisionPreferenciasService] = None,
+                 notif_observer: Optional[NotificacionObserver] = None):
+        """
+        Args:
+            revision_service: Servicio de revisión con el mismo notif_observer
+            notif_observer: Observer de notificaciones compartido con
+                revision_service, para que ejecutar_lote agrupe también las
+                notificaciones de las aprobaciones
+        """
         self._usuario_repo = usuario_repo
         self._materia_repo = materia_repo
         self._preferencia_repo = preferencia_repo
         self._notificacion_repo = notificacion_repo
+        self._horario_repo = horario_repo
+        self._notif_observer = notif_observer or NotificacionObserver(notificacion_repo)
+        # Las aprobaciones pasan por la misma comprobación de solapes que la cola de revisión
+        self._revision_service = revision_service or RevisionPreferenciasService(
+            preferencia_repo, notificacion_repo, self._notif_observer)
 
         # Patrón Observer: Configurar sujetos y observadores
         self._asignacion_subject = AsignacionSubject()
         self._preferencia_subject = PreferenciaSubject()
 
         # Agregar observers
-        notif_observer = NotificacionObserver(notificacion_repo)
-        self._asignacion_subject.agregar_observer(notif_observer)
-        self._preferencia_subject.agregar_observer(notif_observer)
+        self._asignacion_subject.agregar_observer(self._notif_observer)
+        self._preferencia_subject.agregar_observer(self._notif_observer)
 
     def obtener_resumen_dashboard(self) -> Dict:
         """Obtiene datos para el dashboard administrativo"""
@@ -50,22 +69,33 @@ class AdministrativoService:
     def obtener_docentes(self) -> List[Dict]:
         """Obtiene lista de docentes con sus asignaciones"""
         docentes = self._usuario_repo.obtener_docentes()
+        materias_por_docente = self._materia_repo.contar_por_docente()
         resultado = []
 
         for docente in docentes:
-            materias = self._materia_repo.obtener_por_docente(docente.id)
+            asignadas = materias_por_docente.get(docente.id, 0)
             resultado.append({
                 'id': docente.id,
                 'nombre': docente.nombre_completo,
                 'email': docente.email,
                 'usuario': docente.email.split('@')[0],
                 'clave': f"{docente.nombre_completo.split()[0].lower()}{docente.id}23",
-                'materias_asignadas': len(materias),
-                'estado': 'Modificado' if len(materias) > 0 else 'Pendiente'
+                'materias_asignadas': asignadas,
+                'estado': 'Modificado' if asignadas > 0 else 'Pendiente'
             })
 
         return resultado
 
+    def listar_docentes(self, despues_de: Optional[int] = None,
+                        limite: Optional[int] = None) -> List[Docente]:
+        """Obtiene los docentes con su perfil completo (en orden de id, desde un cursor)"""
+        return self._usuario_repo.obtener_docentes(despues_de, limite)
+
+    def obtener_materias(self, despues_de: Optional[int] = None,
+                         limite: Optional[int] = None) -> List[Materia]:
+        """Obtiene las materias del catálogo (en orden de id, desde un cursor)"""
+        return self._materia_repo.obtener_pagina(despues_de, limite)
+
     def obtener_materias_sin_asignar(self) -> List[Dict]:
         """Obtiene materias que no tienen docente asignado"""
         materias = self._materia_repo.obtener_sin_asignar()
@@ -98,47 +128,36 @@ class AdministrativoService:
 
         return (False, "Error al realizar asignación")
 
-    def obtener_preferencias_pendientes(self) -> List[Dict]:
-        """Obtiene preferencias pendientes de aprobación"""
+    def obtener_preferencias_pendientes(self, despues_de: Optional[int] = None,
+                                        limite: Optional[int] = None) -> List[Dict]:
+        """Obtiene preferencias pendientes de aprobación (en orden de id, desde un cursor)"""
         from application.models.preferencia import EstadoPreferencia
-        preferencias = self._preferencia_repo.obtener_por_estado(EstadoPreferencia.PENDIENTE)
-        resultado = []
-
-        for pref in preferencias:
-            docente = self._usuario_repo.obtener_por_id(pref.docente_id, 'docente')
-            materia = self._materia_repo.obtener_por_id(pref.materia_id)
-
-            resultado.append({
-                'id': pref.id,
-                'docente_nombre': docente.nombre_completo if docente else 'Desconocido',
-                'docente_id': pref.docente_id,
-                'materia_nombre': materia.nombre if materia else 'Desconocida',
-                'dia': pref.dia_semana,
-                'horario': pref.horario,
-                'estado': pref.estado.value
-            })
-
-        return resultado
+        filas = self._preferencia_repo.obtener_con_detalle([EstadoPreferencia.PENDIENTE],
+                                                           despues_de=despues_de, limite=limite)
+        return [{
+            'id': id,
+            'docente_nombre': docente_nombre or 'Desconocido',
+            'docente_id': docente_id,
+            'materia_nombre': materia_nombre or 'Desconocida',
+            'dia': dia_semana,
+            'horario': horario,
+            'estado': estado
+        } for (id, docente_id, _, dia_semana, horario, estado,
+               docente_nombre, materia_nombre, _) in filas]
 
     def aprobar_preferencia(self, preferencia_id: int) -> tuple[bool, str]:
         """
-        Aprueba una preferencia.
-        Usa patrón Observer para notificar al docente.
+        Aprueba una preferencia pendiente con RevisionPreferenciasService.revisar:
+        no se aprueba si se solapa con otra aprobada del docente o del aula
+        (dentro de ejecutar_lote, también con las aprobadas antes en el lote).
+        El docente recibe la notificación por el patrón Observer.
         """
-        pref = self._preferencia_repo.obtener_por_id(preferencia_id)
-        if not pref:
-            return (False, "Preferencia no encontrada")
-
-        if self._preferencia_repo.aprobar_preferencia(preferencia_id):
-            # Notificar usando patrón Observer
-            materia = self._materia_repo.obtener_por_id(pref.materia_id)
-            self._preferencia_subject.aprobar_preferencia(
-                docente_id=pref.docente_id,
-                materia_nombre=materia.nombre if materia else 'Desconocida'
-            )
+        resultado = self._revision_service.revisar([preferencia_id], aprobar=True)
+        if resultado['actualizadas']:
             return (True, "Preferencia aprobada")
-
-        return (False, "Error al aprobar preferencia")
+        if resultado['conflictos']:
+            return (False, resultado['conflictos'][0]['motivo'])
+        return (False, "Preferencia no encontrada o ya revisada")
 
     def rechazar_preferencia(self, preferencia_id: int) -> tuple[bool, str]:
         """
@@ -160,6 +179,80 @@ class AdministrativoService:
 
         return (False, "Error al rechazar preferencia")
 
+    # Operaciones admitidas por ejecutar_lote -> campos obligatorios
+    OPERACIONES_LOTE = {
+        'asignar': ('materia_id', 'docente_id'),
+        'desasignar': ('materia_id',),
+        'aprobar': ('preferencia_id',),
+        'rechazar': ('preferencia_id',),
+        'crear_horario': ('materia_id', 'dia_semana', 'hora_inicio', 'hora_fin'),
+    }
+
+    def ejecutar_lote(self, operaciones: List[Dict]) -> tuple[bool, List[Dict]]:
+        """
+        Ejecuta varias operaciones administrativas en una sola transacción.
+
+        Es todo o nada: si una operación falla se deshacen todas y no se
+        envían notificaciones. Si todas terminan bien, las notificaciones se
+        agrupan por docente y evento y se guardan con una sola inserción.
+
+        Args:
+            operaciones: Diccionarios con 'op' (ver OPERACIONES_LOTE) y sus campos
+
+        Returns:
+            Tupla (aplicado, resultados por operación en el mismo orden)
+        """
+        resultados = []
+        try:
+            with self._preferencia_repo.db.transaccion(), self._notif_observer.lote():
+                for indice, operacion in enumerate(operaciones):
+                    exito, mensaje = self._ejecutar_operacion(operacion)
+                    resultados.append({'indice': indice, 'op': operacion.get('op'),
+                                       'exito': exito, 'mensaje': mensaje})
+                    if not exito:
+                        raise _LoteFallido()
+        except _LoteFallido:
+            return (False, resultados)
+        return (True, resultados)
+
+    def _ejecutar_operacion(self, operacion: Dict) -> tuple[bool, str]:
+        tipo = operacion.get('op')
+        if tipo not in self.OPERACIONES_LOTE:
+            return (False, f"Operación desconocida: {tipo}")
+        faltantes = [c for c in self.OPERACIONES_LOTE[tipo] if operacion.get(c) in (None, '')]
+        if faltantes:
+            return (False, f"Faltan campos: {', '.join(faltantes)}")
+        no_enteros = [c for c in self.OPERACIONES_LOTE[tipo]
+                      if c.endswith('_id') and not isinstance(operacion[c], int)]
+        if no_enteros:
+            return (False, f"Deben ser enteros: {', '.join(no_enteros)}")
+
+        if tipo == 'asignar':
+            return self.asignar_materia_docente(operacion['materia_id'], operacion['docente_id'])
+        if tipo == 'desasignar':
+            return self.asignar_materia_docente(operacion['materia_id'], None)
+        if tipo == 'aprobar':
+            return self.aprobar_preferencia(operacion['preferencia_id'])
+        if tipo == 'rechazar':
+            return self.rechazar_preferencia(operacion['preferencia_id'])
+        return self.crear_horario(operacion['materia_id'], operacion['dia_semana'],
+                                  operacion['hora_inicio'], operacion['hora_fin'])
+
+    def crear_horario(self, materia_id: int, dia_semana: str,
+                      hora_inicio: str, hora_fin: str) -> tuple[bool, str]:
+        """Agrega un horario de clase a una materia"""
+        if self._horario_repo is None:
+            return (False, "Gestión de horarios no disponible")
+        if not self._materia_repo.obtener_por_id(materia_id):
+            return (False, "Materia no encontrada")
+        try:
+            mascara_franja(dia_semana, hora_inicio, hora_fin)
+        except ValueError as e:
+            return (False, str(e))
+
+        self._horario_repo.crear(HorarioClase(None, materia_id, dia_semana, hora_inicio, hora_fin))
+        return (True, "Horario creado correctamente")
+
     def crear_docente(self, datos: Dict) -> tuple[bool, str]:
         """Crea un nuevo docente en el sistema"""
         from application.patterns.factory import UsuarioFactory
@@ -181,3 +274,7 @@ class AdministrativoService:
         """Obtiene el conteo de notificaciones no leídas"""
         notificaciones = self._notificacion_repo.obtener_no_leidas(usuario_id)
         return len(notificaciones)
+
+
+class _LoteFallido(Exception):
+    """Interrumpe ejecutar_lote para deshacer la transacción"""
@@ -12,8 +12,10 @@ from typing import Optional, Dict
 from application.repositories.usuario_repository import UsuarioRepository
 from application.patterns.singleton import SessionManager
 from application.models.user import Usuario
+from application.utils.trazas import trazar_clase
 
 
+@trazar_clase('servicio')
 class AuthService:
     """
     Servicio de autenticación y gestión de sesiones.
@@ -0,0 +1,83 @@
+"""
+Servicio de Autocompletado
+Capa de Negocio - Sugerencias por prefijo para materias y docentes.
+
+Los catálogos se sirven desde índices en memoria (IndicePrefijos) que se
+reconstruyen solo cuando cambia la versión del grupo de datos en el
+VersionRegistry, así que una consulta no toca la base de datos.
+"""
+
+from threading import Lock
+from typing import Callable, Dict, List
+from application.repositories.usuario_repository import UsuarioRepository
+from application.repositories.materia_repository import MateriaRepository
+from application.utils.indice_prefijos import IndicePrefijos
+from application.utils.trazas import trazar_clase
+
+
+@trazar_clase('servicio')
+class AutocompletadoService:
+    """Servicio de autocompletado de catálogos - Principio SRP"""
+
+    LIMITE_MAXIMO = 50
+
+    def __init__(self, usuario_repo: UsuarioRepository, materia_repo: MateriaRepository):
+        self._usuario_repo = usuario_repo
+        self._materia_repo = materia_repo
+        self._versiones = materia_repo.versiones
+        self._indices: Dict[str, tuple] = {}  # grupo -> (version, indice)
+        self._lock = Lock()
+
+    def sugerir_materias(self, consulta: str, limite: int = 10) -> List[Dict]:
+        """Sugiere materias cuyo nombre o código empieza por la consulta"""
+        indice = self._obtener_indice('materias', self._documentos_materias)
+        return indice.buscar(consulta, self._limitar(limite))
+
+    def sugerir_docentes(self, consulta: str, limite: int = 10) -> List[Dict]:
+        """Sugiere docentes cuyo nombre o email empieza por la consulta"""
+        indice = self._obtener_indice('docentes', self._documentos_docentes)
+        return indice.buscar(consulta, self._limitar(limite))
+
+    def precargar(self):
+        """Construye los índices sin esperar a la primera consulta"""
+        self._obtener_indice('materias', self._documentos_materias)
+        self._obtener_indice('docentes', self._documentos_docentes)
+
+    def _limitar(self, limite: int) -> int:
+        return max(1, min(limite, self.LIMITE_MAXIMO))
+
+    def _obtener_indice(self, grupo: str, documentos: Callable) -> IndicePrefijos:
+        """Devuelve el índice del grupo, reconstruyéndolo si está desactualizado"""
+        version = self._versiones.obtener(grupo)
+        actual = self._indices.get(grupo)
+        if actual and actual[0] == version:
+            return actual[1]
+
+        with self._lock:
+            actual = self._indices.get(grupo)
+            if actual and actual[0] == version:
+                return actual[1]
+            indice = IndicePrefijos()
+            indice.construir(documentos())
+            self._indices[grupo] = (version, indice)
+            return indice
+
+    def _documentos_materias(self):
+        for materia in self._materia_repo.obtener_todos():
+            datos = {
+                'id': materia.id,
+                'nombre': materia.nombre,
+                'codigo': materia.codigo,
+                'aula': materia.aula
+            }
+            yield materia.id, datos, [(materia.codigo, 0), (materia.nombre, 0)]
+
+    def _documentos_docentes(self):
+        for docente in self._usuario_repo.obtener_docentes():
+            datos = {
+                'id': docente.id,
+                'nombre_completo': docente.nombre_completo,
+                'email': docente.email,
+                'departamento': docente.departamento
+            }
+            yield docente.id, datos, [(docente.nombre_completo, 0), (docente.email, 1)]
@@ -0,0 +1,68 @@
+"""
+Servicio de Búsqueda
+Capa de Negocio - Búsqueda de texto completo sobre docentes, materias y
+las notificaciones propias del usuario.
+"""
+
+from typing import Dict, List
+from markupsafe import Markup, escape
+from application.repositories.busqueda_repository import (
+    BusquedaRepository, MARCA_INICIO, MARCA_FIN
+)
+from application.utils.trazas import trazar_clase
+
+
+@trazar_clase('servicio')
+class BusquedaService:
+    """Servicio de búsqueda - Principio SRP"""
+
+    CATEGORIAS = ('docentes', 'materias', 'notificaciones')
+    # Los datos de contacto de los docentes solo los ven los administrativos
+    # (como en /api/autocompletar/docentes)
+    CATEGORIAS_POR_ROL = {
+        'docente': ('materias', 'notificaciones'),
+        'administrativo': CATEGORIAS,
+    }
+    LIMITE_MAXIMO = 50
+
+    def __init__(self, busqueda_repo: BusquedaRepository):
+        self._busqueda_repo = busqueda_repo
+
+    def buscar(self, texto: str, usuario_id: int, categorias=CATEGORIAS,
+               limite: int = 10) -> Dict[str, List[Dict]]:
+        """
+        Busca el texto en las categorías pedidas.
+
+        Args:
+            texto: Texto libre introducido por el usuario
+            usuario_id: Usuario actual (solo se buscan sus notificaciones)
+            categorias: Subconjunto de CATEGORIAS a consultar
+            limite: Resultados máximos por categoría
+
+        Returns:
+            Diccionario categoría -> resultados ordenados por relevancia
+        """
+        consulta = self._busqueda_repo.construir_consulta(texto)
+        limite = max(1, min(limite, self.LIMITE_MAXIMO))
+        resultados = {categoria: [] for categoria in categorias if categoria in self.CATEGORIAS}
+        if not consulta:
+            return resultados
+
+        if 'docentes' in resultados:
+            resultados['docentes'] = self._busqueda_repo.buscar_docentes(consulta, limite)
+        if 'materias' in resultados:
+            resultados['materias'] = self._busqueda_repo.buscar_materias(consulta, limite)
+        if 'notificaciones' in resultados:
+            resultados['notificaciones'] = self._busqueda_repo.buscar_notificaciones(
+                consulta, usuario_id, limite)
+
+        for filas in resultados.values():
+            for fila in filas:
+                fila['fragmento'] = self._resaltar(fila['fragmento'])
+        return resultados
+
+    @staticmethod
+    def _resaltar(fragmento: str) -> Markup:
+        """Escapa el fragmento y convierte los marcadores de coincidencia en <mark>"""
+        seguro = str(escape(fragmento or ''))
+        return Markup(seguro.replace(MARCA_INICIO, '<mark>').replace(MARCA_FIN, '</mark>'))
@@ -0,0 +1,138 @@
+"""
+Servicio de Calendario iCalendar
+Capa de Negocio - Suscripción .ics al horario de cada docente.
+
+Cada horario semanal se publica como un único VEVENT con RRULE semanal hasta
+el fin del periodo y EXDATE para los festivos. El feed generado se guarda en
+memoria junto con la versión del horario del docente (VersionRegistry): una
+consulta periódica sin cambios se responde desde la caché sin tocar los
+repositorios.
+
+Los clientes de calendario no envían cookies, así que la URL incluye un token
+HMAC del docente en lugar de exigir sesión.
+"""
+
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from application.patterns.observer import Observer
+from application.repositories.usuario_repository import UsuarioRepository
+from application.repositories.materia_repository import HorarioRepository, clave_horario_docente
+from application.services.calendario_service import CalendarioService
+from application.utils.franjas import DIAS
+from application.utils.ocurrencias import primera_fecha
+from application.utils.icalendar import (
+    construir_calendario, escapar_texto, formato_fecha_hora, formato_utc
+)
+from application.utils.trazas import trazar_clase
+
+
+class FeedCalendario:
+    """Feed .ics ya generado, listo para servir"""
+
+    __slots__ = ('contenido', 'etag', 'modificado')
+
+    def __init__(self, contenido: bytes, modificado: datetime):
+        self.contenido = contenido
+        self.etag = hashlib.sha1(contenido).hexdigest()
+        self.modificado = modificado
+
+
+@trazar_clase('servicio')
+class CalendarioIcsService(Observer):
+    """Servicio de suscripción iCalendar por docente - Principio SRP"""
+
+    LONGITUD_TOKEN = 32
+
+    def __init__(self, usuario_repo: UsuarioRepository, horario_repo: HorarioRepository,
+                 calendario_service: CalendarioService, clave_secreta: str):
+        self._usuario_repo = usuario_repo
+        self._horario_repo = horario_repo
+        self._calendario_service = calendario_service
+        self._clave = clave_secreta.encode('utf-8')
+        self._feeds: Dict[int, Tuple[tuple, FeedCalendario]] = {}
+        self._lock = Lock()
+
+        horario_repo.versiones.agregar_observer(self)
+
+    # ---------- Token de suscripción ----------
+
+    def generar_token(self, docente_id: int) -> str:
+        firma = hmac.new(self._clave, f'ics:{docente_id}'.encode('utf-8'), hashlib.sha256)
+        return firma.hexdigest()[:self.LONGITUD_TOKEN]
+
+    def verificar_token(self, docente_id: int, token: str) -> bool:
+        return hmac.compare_digest(self.generar_token(docente_id), token or '')
+
+    # ---------- Feed ----------
+
+    def obtener_feed(self, docente_id: int) -> Optional[FeedCalendario]:
+        """
+        Devuelve el feed del docente, regenerándolo solo si cambió su horario.
+
+        Returns:
+            El feed, o None si el docente no existe o está inactivo
+        """
+        periodo = self._calendario_service.periodo_actual()
+        version = (self._horario_repo.versiones.obtener(clave_horario_docente(docente_id)), periodo.clave)
+        cacheado = self._feeds.get(docente_id)
+        if cacheado and cacheado[0] == version:
+            return cacheado[1]
+
+        with self._lock:
+            cacheado = self._feeds.get(docente_id)
+            if cacheado and cacheado[0] == version:
+                return cacheado[1]
+            docente = self._usuario_repo.obtener_por_id(docente_id, 'docente')
+            if not docente or not docente.activo:
+                self._feeds.pop(docente_id, None)
+                return None
+            feed = self._generar(docente_id, docente.nombre_completo, periodo)
+            self._feeds[docente_id] = (version, feed)
+            return feed
+
+    def _generar(self, docente_id: int, nombre: str, periodo) -> FeedCalendario:
+        ahora = datetime.now(timezone.utc).replace(microsecond=0)
+        sello = formato_utc(ahora)
+        hasta = formato_fecha_hora(datetime.combine(periodo.fin, datetime.max.time()))
+
+        eventos = []
+        for horario, materia in self._horario_repo.obtener_por_docente(docente_id):
+            if horario.dia_semana not in DIAS:
+                continue
+            dia = primera_fecha(horario.dia_semana, periodo)
+            try:
+                inicio = datetime.combine(dia, datetime.strptime(horario.hora_inicio, '%H:%M').time())
+                fin = datetime.combine(dia, datetime.strptime(horario.hora_fin, '%H:%M').time())
+            except ValueError:
+                continue
+            evento = {
+                'UID': f'horario-{horario.id}@sistema-universitario',
+                'DTSTAMP': sello,
+                'DTSTART': formato_fecha_hora(inicio),
+                'DTEND': formato_fecha_hora(fin),
+                'RRULE': f'FREQ=WEEKLY;UNTIL={hasta}',
+                'SUMMARY': escapar_texto(f'{materia.nombre} ({materia.codigo})'),
+                'LOCATION': escapar_texto(materia.aula),
+            }
+            excluidas = sorted(f for f in periodo.festivos
+                               if dia <= f <= periodo.fin and f.weekday() == dia.weekday())
+            if excluidas:
+                evento['EXDATE'] = ','.join(
+                    formato_fecha_hora(datetime.combine(f, inicio.time())) for f in excluidas)
+            eventos.append(evento)
+
+        contenido = construir_calendario(f'Horario - {nombre}', eventos)
+        return FeedCalendario(contenido.encode('utf-8'), ahora)
+
+    def actualizar(self, evento: str, datos: Dict):
+        """Descarta el feed de un docente modificado (nombre o estado)"""
+        if evento != 'docentes':
+            return
+        with self._lock:
+            if 'docente_id' in datos:
+                self._feeds.pop(datos['docente_id'], None)
+            else:
+                self._feeds.clear()
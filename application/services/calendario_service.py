@@ -0,0 +1,151 @@
+"""
+Servicio de Calendario
+Capa de Negocio - Sesiones concretas de clase de cada docente.
+
+Por docente y periodo se mantiene un índice con las sesiones ordenadas por
+fecha de inicio; "las próximas N clases" y "las clases entre dos fechas" se
+resuelven con bisect sobre esos índices, pasando al periodo siguiente cuando
+el rango o la cantidad lo piden. Un índice se reconstruye solo cuando cambia
+la versión del horario del docente en el VersionRegistry.
+"""
+
+import calendar
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from application.repositories.materia_repository import HorarioRepository, clave_horario_docente
+from application.utils.ocurrencias import PeriodoAcademico, SesionClase, expandir
+from application.utils.trazas import trazar_clase
+
+
+class IndiceSesiones:
+    """Sesiones de un docente ordenadas por inicio - Principio SRP"""
+
+    def __init__(self, sesiones: List[SesionClase]):
+        self._sesiones = sesiones
+        self._inicios = [s.inicio for s in sesiones]
+
+    def siguientes(self, desde: datetime, cantidad: int) -> List[SesionClase]:
+        """Sesiones que empiezan a partir de 'desde'"""
+        posicion = bisect_left(self._inicios, desde)
+        return self._sesiones[posicion:posicion + cantidad]
+
+    def entre(self, desde: datetime, hasta: datetime) -> List[SesionClase]:
+        """Sesiones que empiezan en [desde, hasta)"""
+        return self._sesiones[bisect_left(self._inicios, desde):bisect_left(self._inicios, hasta)]
+
+    def __len__(self) -> int:
+        return len(self._sesiones)
+
+
+@trazar_clase('servicio')
+class CalendarioService:
+    """Servicio de sesiones de clase por docente - Principio SRP"""
+
+    MAX_DIAS_RANGO = 366
+    MAXIMO_PERIODOS = 4  # índices por docente (los periodos usados más recientemente)
+    MESES = ('Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+             'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre')
+
+    def __init__(self, horario_repo: HorarioRepository,
+                 periodo: Optional[PeriodoAcademico] = None, festivos=()):
+        """
+        Args:
+            horario_repo: Repositorio de horarios
+            periodo: Periodo académico fijo; si no se indica se usa el semestre en curso
+            festivos: Días sin clase cuando el periodo se calcula automáticamente
+        """
+        self._horario_repo = horario_repo
+        self._periodo = periodo
+        self._festivos = set(festivos)
+        # docente -> {clave del periodo: (versión del horario, índice)}
+        self._indices: Dict[int, Dict[tuple, Tuple[int, IndiceSesiones]]] = {}
+        self._lock = Lock()
+
+    def periodo_actual(self, hoy: Optional[date] = None) -> PeriodoAcademico:
+        if self._periodo is not None:
+            return self._periodo
+        return PeriodoAcademico.semestre_de(hoy or date.today(), self._festivos)
+
+    def dias_del_mes(self, hoy: Optional[date] = None) -> Dict:
+        """
+        Celdas del mes de 'hoy' en semanas de domingo a sábado, marcando el día
+        actual, los festivos del periodo y los días de los meses contiguos.
+        """
+        hoy = hoy or date.today()
+        festivos = self.periodo_actual(hoy).festivos
+        celdas = []
+        for semana in calendar.Calendar(firstweekday=6).monthdatescalendar(hoy.year, hoy.month):
+            for dia in semana:
+                if dia.month != hoy.month:
+                    marca = 'vacio'
+                elif dia == hoy:
+                    marca = 'hoy'
+                else:
+                    marca = 'evento' if dia in festivos else ''
+                celdas.append({'dia': dia.day, 'marca': marca})
+        return {'titulo': f"{self.MESES[hoy.month - 1]} {hoy.year}", 'hoy': hoy, 'celdas': celdas}
+
+    def proximas_clases(self, docente_id: int, cantidad: int = 4,
+                        desde: Optional[datetime] = None) -> List[SesionClase]:
+        """
+        Próximas sesiones del docente a partir de ahora (o de 'desde'). Si el
+        periodo termina antes de reunir 'cantidad', sigue en los siguientes
+        (hasta MAX_DIAS_RANGO días; con periodo fijo no hay siguiente).
+        """
+        desde = desde or datetime.now()
+        sesiones = self._obtener_indice(docente_id, desde.date()).siguientes(desde, cantidad)
+        if self._periodo is not None:
+            return sesiones
+        dia = self.periodo_actual(desde.date()).fin + timedelta(days=1)
+        while len(sesiones) < cantidad and (dia - desde.date()).days <= self.MAX_DIAS_RANGO:
+            sesiones += self._obtener_indice(docente_id, dia).siguientes(desde, cantidad - len(sesiones))
+            dia = self.periodo_actual(dia).fin + timedelta(days=1)
+        return sesiones
+
+    def sesiones_entre(self, docente_id: int, desde: date, hasta: date) -> List[SesionClase]:
+        """
+        Sesiones del docente entre dos fechas, ambas incluidas.
+
+        Raises:
+            ValueError: Si el rango está invertido o es demasiado largo
+        """
+        if hasta < desde:
+            raise ValueError("La fecha final es anterior a la inicial")
+        if (hasta - desde).days > self.MAX_DIAS_RANGO:
+            raise ValueError(f"El rango no puede superar {self.MAX_DIAS_RANGO} días")
+        inicio = datetime.combine(desde, datetime.min.time())
+        fin = datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+        if self._periodo is not None:
+            return self._obtener_indice(docente_id, desde).entre(inicio, fin)
+
+        # Sin periodo fijo el rango puede abarcar varios semestres
+        sesiones = []
+        dia = desde
+        while dia <= hasta:
+            periodo = self.periodo_actual(dia)
+            sesiones.extend(self._obtener_indice(docente_id, dia).entre(inicio, fin))
+            dia = periodo.fin + timedelta(days=1)
+        return sesiones
+
+    def _obtener_indice(self, docente_id: int, dia: date) -> IndiceSesiones:
+        """Índice del periodo que contiene 'dia'"""
+        periodo = self.periodo_actual(dia)
+        version = self._horario_repo.versiones.obtener(clave_horario_docente(docente_id))
+        cacheado = self._indices.get(docente_id, {}).get(periodo.clave)
+        if cacheado and cacheado[0] == version:
+            return cacheado[1]
+
+        with self._lock:
+            periodos = self._indices.get(docente_id, {})
+            cacheado = periodos.get(periodo.clave)
+            if cacheado and cacheado[0] == version:
+                return cacheado[1]
+            indice = IndiceSesiones(list(expandir(self._horario_repo.obtener_por_docente(docente_id),
+                                                  periodo)))
+            # Los índices de otra versión del horario ya no sirven
+            vigentes = {clave: valor for clave, valor in periodos.items() if valor[0] == version}
+            vigentes[periodo.clave] = (version, indice)
+            self._indices[docente_id] = dict(list(vigentes.items())[-self.MAXIMO_PERIODOS:])
+            return indice
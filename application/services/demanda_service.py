@@ -0,0 +1,175 @@
+"""
+Servicio de Demanda
+Capa de Negocio - Mapa de calor de la demanda de franjas en las preferencias.
+
+La semana se divide en celdas de una hora (Lunes a Sábado, de HORA_APERTURA
+a HORA_CIERRE) y cada preferencia pendiente o aprobada suma 1 en las celdas
+que toca su rango horario. Se llevan tres matrices de contadores: total,
+por materia y por docente.
+
+Los contadores se construyen con una sola consulta la primera vez que se usan
+y se mantienen como Observer del VersionRegistry: PreferenciaRepository
+notifica cada escritura con la fila anterior y la nueva, así que una
+escritura cuesta restar y sumar sus celdas (O(1)) y una lectura copia la
+matriz pedida (O(celdas)).
+
+Los deltas solo llegan de las escrituras de este proceso. Los contadores
+recuerdan las versiones de 'preferencias' y 'materias' con las que están al
+día; si antes de una lectura las versiones compartidas (VersionRegistry) son
+otras, otro worker escribió y se reconstruyen.
+"""
+
+from collections import Counter
+from threading import RLock
+from typing import Dict, List, Optional
+from application.models.preferencia import EstadoPreferencia
+from application.patterns.observer import Observer
+from application.repositories.preferencia_repository import PreferenciaRepository
+from application.repositories.materia_repository import MateriaRepository
+from application.utils.franjas import DIAS, HORA_APERTURA, HORA_CIERRE, a_minutos, parsear_rango
+from application.utils.trazas import trazar_clase
+
+HORAS = list(range(HORA_APERTURA, HORA_CIERRE))
+TOTAL_CELDAS = len(DIAS) * len(HORAS)
+ESTADOS_CON_DEMANDA = (EstadoPreferencia.PENDIENTE.value, EstadoPreferencia.APROBADA.value)
+
+
+def celdas_preferencia(dia_semana: str, horario: str) -> range:
+    """
+    Índices (dia * horas + hora) de las celdas que toca un rango horario de
+    preferencia ('08:00 - 10:00'). Vacío si el día o el rango no son válidos.
+    """
+    if dia_semana not in DIAS:
+        return range(0)
+    try:
+        inicio, fin = (a_minutos(hora) for hora in parsear_rango(horario))
+    except ValueError:
+        return range(0)
+    # Horas que se solapan con el rango, ajustadas al horario de apertura
+    primera = max(inicio // 60, HORA_APERTURA)
+    ultima = min((fin + 59) // 60, HORA_CIERRE)
+    base = DIAS.index(dia_semana) * len(HORAS) - HORA_APERTURA
+    return range(base + primera, base + max(primera, ultima))
+
+
+@trazar_clase('servicio')
+class DemandaService(Observer):
+    """Servicio del mapa de calor de preferencias - Principio SRP"""
+
+    def __init__(self, preferencia_repo: PreferenciaRepository, materia_repo: MateriaRepository):
+        self._preferencia_repo = preferencia_repo
+        self._materia_repo = materia_repo
+        self._lock = RLock()
+        self._construido = False
+        self._version = (0, 0)  # versiones de 'preferencias' y 'materias' de los contadores
+        self._totales: List[int] = []
+        self._por_materia: Dict[int, List[int]] = {}
+        self._por_docente: Dict[int, List[int]] = {}
+        self._demanda_materia: Counter = Counter()  # materia -> celdas solicitadas
+        self._nombres_materias: Dict[int, str] = {}
+
+        preferencia_repo.versiones.agregar_observer(self)
+
+    # ---------- Consultas ----------
+
+    def mapa_calor(self, materia_id: Optional[int] = None, docente_id: Optional[int] = None,
+                   top: int = 10) -> Dict:
+        """
+        Matriz día × hora con el número de preferencias por celda.
+
+        Args:
+            materia_id: Solo la demanda de esa materia
+            docente_id: Solo la demanda de ese docente (tiene prioridad)
+            top: Materias más solicitadas a incluir en el resumen
+
+        Returns:
+            {'dias', 'horas', 'celdas': [[n por hora] por día], 'maximo',
+             'materias': [{'id', 'nombre', 'demanda'}]}
+        """
+        with self._lock:
+            self._asegurar_contadores()
+            if docente_id is not None:
+                contadores = self._por_docente.get(docente_id)
+            elif materia_id is not None:
+                contadores = self._por_materia.get(materia_id)
+            else:
+                contadores = self._totales
+            contadores = list(contadores or [0] * TOTAL_CELDAS)
+            materias = [{'id': id, 'nombre': self._nombres_materias.get(id, 'Desconocida'), 'demanda': n}
+                        for id, n in self._demanda_materia.most_common(top)]
+
+        ancho = len(HORAS)
+        return {
+            'dias': list(DIAS),
+            'horas': [f"{hora:02d}:00" for hora in HORAS],
+            'celdas': [contadores[i:i + ancho] for i in range(0, TOTAL_CELDAS, ancho)],
+            'maximo': max(contadores),
+            'materias': materias
+        }
+
+    # ---------- Construcción y mantenimiento ----------
+
+    def precargar(self):
+        """Construye los contadores sin esperar a la primera consulta"""
+        with self._lock:
+            self._asegurar_contadores()
+
+    def _versiones_actuales(self) -> tuple:
+        versiones = self._preferencia_repo.versiones
+        return versiones.obtener('preferencias'), versiones.obtener('materias')
+
+    def _asegurar_contadores(self):
+        version = self._versiones_actuales()
+        if self._construido and self._version == version:
+            return
+        self._totales = [0] * TOTAL_CELDAS
+        self._por_materia = {}
+        self._por_docente = {}
+        self._demanda_materia = Counter()
+        self._nombres_materias = {m.id: m.nombre for m in self._materia_repo.obtener_todos()}
+        for preferencia in self._preferencia_repo.obtener_todos():
+            self._aplicar((preferencia.docente_id, preferencia.materia_id, preferencia.dia_semana,
+                           preferencia.horario, preferencia.estado.value), 1)
+        self._construido = True
+        self._version = version
+
+    def _aplicar(self, fila: Optional[tuple], delta: int):
+        """Suma delta en las celdas de una fila (docente, materia, día, horario, estado)"""
+        if fila is None:
+            return
+        docente_id, materia_id, dia_semana, horario, estado = fila
+        if estado not in ESTADOS_CON_DEMANDA:
+            return
+        celdas = celdas_preferencia(dia_semana, horario)
+        if not celdas:
+            return
+        por_materia = self._por_materia.setdefault(materia_id, [0] * TOTAL_CELDAS)
+        por_docente = self._por_docente.setdefault(docente_id, [0] * TOTAL_CELDAS)
+        for celda in celdas:
+            self._totales[celda] += delta
+            por_materia[celda] += delta
+            por_docente[celda] += delta
+        self._demanda_materia[materia_id] += delta * len(celdas)
+        if self._demanda_materia[materia_id] <= 0:
+            del self._demanda_materia[materia_id]
+
+    def actualizar(self, evento: str, datos: Dict):
+        """Aplica los deltas de las escrituras de este proceso (PreferenciaRepository)"""
+        if evento not in ('preferencias', 'materias'):
+            return
+        with self._lock:
+            if not self._construido:
+                return
+            if evento == 'materias' and 'materia_id' in datos:
+                materia = self._materia_repo.obtener_por_id(datos['materia_id'])
+                if materia:
+                    self._nombres_materias[materia.id] = materia.nombre
+            elif evento == 'preferencias' and 'cambios' in datos:
+                for anterior, nueva in datos['cambios']:
+                    self._aplicar(anterior, -1)
+                    self._aplicar(nueva, 1)
+            else:
+                # Cambio masivo o de otro worker: reconstruir en la próxima consulta
+                self._construido = False
+                return
+            self._version = self._versiones_actuales()
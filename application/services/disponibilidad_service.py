@@ -0,0 +1,258 @@
+"""
+Servicio de Disponibilidad
+Capa de Negocio - Índice de ocupación semanal (free/busy) de docentes y aulas.
+
+Cada entidad tiene una máscara semanal (ver utils/franjas.py). Además, por
+cada franja se guarda un bitset con las entidades ocupadas en ella, de modo
+que "¿quién está libre el Martes de 10:00 a 12:00?" se resuelve con un OR de
+8 enteros y un AND NOT, sin recorrer las entidades una por una.
+
+El índice se construye con una sola consulta la primera vez que se usa y se
+mantiene al día como Observer del VersionRegistry: cada escritura en
+horarios o materias recarga solo la materia afectada.
+"""
+
+from threading import RLock
+from typing import Dict, List, Optional
+from application.patterns.observer import Observer
+from application.repositories.usuario_repository import UsuarioRepository
+from application.repositories.materia_repository import MateriaRepository, HorarioRepository
+from application.utils.franjas import TOTAL_FRANJAS, mascara_franja, posiciones
+from application.utils.trazas import trazar_clase
+
+
+class TablaOcupacion:
+    """
+    Bitmaps de ocupación para un tipo de entidad (docentes o aulas).
+
+    Principio SRP: Única responsabilidad de mantener filas (por entidad) y
+    columnas (por franja) coherentes entre sí.
+    """
+
+    def __init__(self):
+        self._posiciones: Dict = {}          # clave -> posición de bit
+        self._claves: List = []              # posición -> clave
+        self._activas = 0                    # bitset de entidades activas
+        self._filas: List[int] = []          # posición -> máscara semanal
+        self._columnas = [0] * TOTAL_FRANJAS  # franja -> bitset de entidades ocupadas
+        self._reservas: Dict = {}            # clave -> {horario_id: máscara}
+
+    def registrar(self, clave, activa: bool = True) -> int:
+        """Da de alta una entidad (si no existe) y fija si está activa"""
+        posicion = self._posiciones.get(clave)
+        if posicion is None:
+            posicion = len(self._claves)
+            self._posiciones[clave] = posicion
+            self._claves.append(clave)
+            self._filas.append(0)
+        if activa:
+            self._activas |= 1 << posicion
+        else:
+            self._activas &= ~(1 << posicion)
+        return posicion
+
+    def __contains__(self, clave) -> bool:
+        return clave in self._posiciones
+
+    def ocupar(self, clave, horario_id: int, mascara: int):
+        """Añade un horario a la ocupación de una entidad"""
+        if clave not in self._posiciones:
+            self.registrar(clave)
+        self._reservas.setdefault(clave, {})[horario_id] = mascara
+        self._recalcular(clave)
+
+    def cargar(self, reservas: List[tuple]):
+        """
+        Carga masiva de (clave, horario_id, máscara) sobre una tabla vacía.
+        Construye las columnas con bytearrays en lugar de un OR por reserva.
+        """
+        for clave, horario_id, mascara in reservas:
+            if clave not in self._posiciones:
+                self.registrar(clave)
+            self._reservas.setdefault(clave, {})[horario_id] = mascara
+            posicion = self._posiciones[clave]
+            self._filas[posicion] |= mascara
+
+        columnas = [bytearray((len(self._claves) + 7) // 8) for _ in range(TOTAL_FRANJAS)]
+        for posicion, fila in enumerate(self._filas):
+            byte, bit = divmod(posicion, 8)
+            for franja in posiciones(fila):
+                columnas[franja][byte] |= 1 << bit
+        self._columnas = [int.from_bytes(columna, 'little') for columna in columnas]
+
+    def liberar(self, clave, horario_id: int):
+        """Quita un horario de la ocupación de una entidad"""
+        reservas = self._reservas.get(clave)
+        if reservas and reservas.pop(horario_id, None) is not None:
+            self._recalcular(clave)
+
+    def _recalcular(self, clave):
+        """Recalcula la fila de la entidad y corrige solo las columnas que cambian"""
+        posicion = self._posiciones[clave]
+        nueva = 0
+        for mascara in self._reservas.get(clave, {}).values():
+            nueva |= mascara
+        anterior = self._filas[posicion]
+        if nueva == anterior:
+            return
+        self._filas[posicion] = nueva
+        bit = 1 << posicion
+        for franja in posiciones(anterior ^ nueva):
+            self._columnas[franja] ^= bit
+
+    def ocupacion(self, clave) -> int:
+        """Máscara semanal de una entidad (0 si no existe)"""
+        posicion = self._posiciones.get(clave)
+        return self._filas[posicion] if posicion is not None else 0
+
+    def ocupadas_en(self, mascara: int) -> int:
+        """Bitset de entidades con alguna franja ocupada dentro de la máscara"""
+        ocupadas = 0
+        for franja in posiciones(mascara):
+            ocupadas |= self._columnas[franja]
+        return ocupadas & self._activas
+
+    def libres(self, mascara: int) -> List:
+        """Entidades activas sin ninguna franja ocupada dentro de la máscara"""
+        return [self._claves[p] for p in posiciones(self._activas & ~self.ocupadas_en(mascara))]
+
+    def ocupadas(self, mascara: int) -> List:
+        """Entidades activas con alguna franja ocupada dentro de la máscara"""
+        return [self._claves[p] for p in posiciones(self.ocupadas_en(mascara))]
+
+
+@trazar_clase('servicio')
+class DisponibilidadService(Observer):
+    """Servicio de disponibilidad de docentes y aulas - Principio SRP"""
+
+    def __init__(self, usuario_repo: UsuarioRepository, materia_repo: MateriaRepository,
+                 horario_repo: HorarioRepository):
+        self._usuario_repo = usuario_repo
+        self._materia_repo = materia_repo
+        self._horario_repo = horario_repo
+        self._lock = RLock()
+        self._construido = False
+        self._docentes: Optional[TablaOcupacion] = None
+        self._aulas: Optional[TablaOcupacion] = None
+        self._nombres_docentes: Dict[int, str] = {}
+        self._horarios_por_materia: Dict[int, List[tuple]] = {}  # materia -> [(horario_id, docente_id, aula)]
+
+        horario_repo.versiones.agregar_observer(self)
+
+    # ---------- Consultas ----------
+
+    def libres(self, dia_semana: str, hora_inicio: str, hora_fin: str) -> Dict[str, List]:
+        """
+        Docentes y aulas libres durante todo el rango indicado.
+
+        Raises:
+            ValueError: Si el día o las horas no son válidos
+        """
+        mascara = mascara_franja(dia_semana, hora_inicio, hora_fin)
+        with self._lock:
+            self._asegurar_indice()
+            docentes = self._docentes.libres(mascara)
+            aulas = self._aulas.libres(mascara)
+            return {
+                'docentes': [{'id': d, 'nombre_completo': self._nombres_docentes.get(d, '')}
+                             for d in docentes],
+                'aulas': sorted(aulas)
+            }
+
+    def ocupacion_docente(self, docente_id: int) -> int:
+        """Máscara semanal ocupada de un docente"""
+        with self._lock:
+            self._asegurar_indice()
+            return self._docentes.ocupacion(docente_id)
+
+    def ocupacion_aula(self, aula: str) -> int:
+        """Máscara semanal ocupada de un aula"""
+        with self._lock:
+            self._asegurar_indice()
+            return self._aulas.ocupacion(aula)
+
+    # ---------- Construcción y mantenimiento ----------
+
+    def precargar(self):
+        """Construye las tablas de ocupación sin esperar a la primera consulta"""
+        with self._lock:
+            self._asegurar_indice()
+
+    def _asegurar_indice(self):
+        if self._construido:
+            return
+        self._docentes = TablaOcupacion()
+        self._aulas = TablaOcupacion()
+        self._nombres_docentes = {}
+        self._horarios_por_materia = {}
+
+        for docente in self._usuario_repo.obtener_docentes():
+            self._docentes.registrar(docente.id)
+            self._nombres_docentes[docente.id] = docente.nombre_completo
+        for aula in self._materia_repo.obtener_aulas():
+            self._aulas.registrar(aula)
+        reservas_docentes, reservas_aulas = [], []
+        for fila in self._horario_repo.obtener_ocupacion():
+            reserva = self._registrar_horario(fila)
+            if reserva:
+                horario_id, docente_id, aula, mascara = reserva
+                if docente_id is not None:
+                    reservas_docentes.append((docente_id, horario_id, mascara))
+                reservas_aulas.append((aula, horario_id, mascara))
+        self._docentes.cargar(reservas_docentes)
+        self._aulas.cargar(reservas_aulas)
+
+        self._construido = True
+
+    def _registrar_horario(self, fila: tuple) -> Optional[tuple]:
+        """Valida un horario y lo asocia a su materia; devuelve la reserva a aplicar"""
+        horario_id, materia_id, dia, inicio, fin, docente_id, aula = fila
+        try:
+            mascara = mascara_franja(dia, inicio, fin)
+        except ValueError:
+            return None
+        self._horarios_por_materia.setdefault(materia_id, []).append((horario_id, docente_id, aula))
+        if docente_id is not None and docente_id not in self._docentes:
+            # Docente inactivo: se registra su ocupación pero no aparece como libre
+            self._docentes.registrar(docente_id, activa=False)
+        return horario_id, docente_id, aula, mascara
+
+    def _agregar_horario(self, fila: tuple):
+        reserva = self._registrar_horario(fila)
+        if reserva:
+            horario_id, docente_id, aula, mascara = reserva
+            if docente_id is not None:
+                self._docentes.ocupar(docente_id, horario_id, mascara)
+            self._aulas.ocupar(aula, horario_id, mascara)
+
+    def _recargar_materia(self, materia_id: int):
+        for horario_id, docente_id, aula in self._horarios_por_materia.pop(materia_id, []):
+            if docente_id is not None:
+                self._docentes.liberar(docente_id, horario_id)
+            self._aulas.liberar(aula, horario_id)
+        materia = self._materia_repo.obtener_por_id(materia_id)
+        if materia and materia.aula not in self._aulas:
+            self._aulas.registrar(materia.aula)
+        for fila in self._horario_repo.obtener_ocupacion(materia_id):
+            self._agregar_horario(fila)
+
+    def _actualizar_docente(self, docente_id: int):
+        docente = self._usuario_repo.obtener_por_id(docente_id, 'docente')
+        if docente:
+            self._docentes.registrar(docente_id, activa=docente.activo)
+            self._nombres_docentes[docente_id] = docente.nombre_completo
+
+    def actualizar(self, evento: str, datos: Dict):
+        """Aplica de forma incremental los cambios notificados por el VersionRegistry"""
+        if evento not in ('horarios', 'materias', 'docentes'):
+            return
+        with self._lock:
+            if not self._construido:
+                return
+            if evento == 'docentes' and 'docente_id' in datos:
+                self._actualizar_docente(datos['docente_id'])
+            elif evento in ('horarios', 'materias') and 'materia_id' in datos:
+                self._recargar_materia(datos['materia_id'])
+            else:
+                # Cambio masivo sin identificadores: reconstruir en la próxima consulta
+                self._construido = False
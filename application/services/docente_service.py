@@ -4,27 +4,44 @@ Capa de Negocio - Lógica relacionada con docentes.
 Aplica principios SOLID.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 from application.repositories.usuario_repository import UsuarioRepository
 from application.repositories.materia_repository import MateriaRepository, HorarioRepository
 from application.repositories.preferencia_repository import PreferenciaRepository
 from application.repositories.notificacion_repository import NotificacionRepository
+from application.services.calendario_service import CalendarioService
 from application.models.user import Docente
 from application.models.materia import Materia
 from application.models.preferencia import PreferenciaEnsenanza, EstadoPreferencia
+from application.utils.franjas import mascara_franja, parsear_rango
+from application.utils.trazas import trazar_clase
 
 
+@trazar_clase('servicio')
 class DocenteService:
     """Servicio para operaciones de docentes - Principio SRP"""
 
+    # Rango mínimo de horas y colores del calendario semanal
+    HORA_INICIO_CALENDARIO = 8
+    HORA_FIN_CALENDARIO = 15
+    COLORES_CALENDARIO = 6
+
+    # Columnas de las filas de obtener_horarios (HorarioRepository.obtener_ocupacion)
+    COLUMNAS_HORARIO = ('id', 'materia_id', 'dia_semana', 'hora_inicio', 'hora_fin', 'docente_id', 'aula')
+
+    # Máximo de preferencias por envío de la rejilla semanal
+    MAXIMO_PREFERENCIAS_LOTE = 60
+
     def __init__(self, usuario_repo: UsuarioRepository, materia_repo: MateriaRepository,
                  preferencia_repo: PreferenciaRepository, horario_repo: HorarioRepository,
-                 notificacion_repo: NotificacionRepository):
+                 notificacion_repo: NotificacionRepository,
+                 calendario_service: Optional[CalendarioService] = None):
         self._usuario_repo = usuario_repo
         self._materia_repo = materia_repo
         self._preferencia_repo = preferencia_repo
         self._horario_repo = horario_repo
         self._notificacion_repo = notificacion_repo
+        self._calendario_service = calendario_service or CalendarioService(horario_repo)
 
     def obtener_perfil(self, docente_id: int) -> Optional[Docente]:
         """Obtiene el perfil completo del docente"""
@@ -36,37 +53,27 @@ class DocenteService:
             return (True, "Perfil actualizado correctamente")
         return (False, "Error al actualizar perfil")
 
-    def obtener_materias_asignadas(self, docente_id: int) -> List[Materia]:
-        """Obtiene las materias asignadas al docente"""
-        return self._materia_repo.obtener_por_docente(docente_id)
+    def obtener_materias_asignadas(self, docente_id: int, despues_de: Optional[int] = None,
+                                   limite: Optional[int] = None) -> List[Materia]:
+        """Obtiene las materias asignadas al docente (en orden de id, desde un cursor)"""
+        return self._materia_repo.obtener_pagina(despues_de, limite, docente_id)
 
     def obtener_resumen_dashboard(self, docente_id: int) -> Dict:
         """Obtiene datos para el dashboard del docente"""
         materias = self.obtener_materias_asignadas(docente_id)
         preferencias = self._preferencia_repo.obtener_por_docente(docente_id)
 
-        # Calcular horas semanales
-        horas_totales = 0
-        for materia in materias:
-            horarios = self._horario_repo.obtener_por_materia(materia.id)
-            for horario in horarios:
-                # Calcular horas (simplificado)
-                horas_totales += 2  # Asumimos 2 horas por sesión
+        # Calcular horas semanales (simplificado: 2 horas por sesión)
+        horas_totales = 2 * len(self._horario_repo.obtener_por_docente(docente_id))
 
         # Preferencias pendientes
         preferencias_pendientes = [p for p in preferencias if p.estado == EstadoPreferencia.PENDIENTE]
 
-        # Próximas clases (simplificado - obtener las de esta semana)
-        proximas_clases = []
-        for materia in materias[:4]:  # Primeras 4
-            horarios = self._horario_repo.obtener_por_materia(materia.id)
-            if horarios:
-                proximas_clases.append({
-                    'materia': materia.nombre,
-                    'aula': materia.aula,
-                    'dia': horarios[0].dia_semana,
-                    'horario': f"{horarios[0].hora_inicio} - {horarios[0].hora_fin}"
-                })
+        # Próximas clases reales según la fecha y hora actuales
+        proximas_clases = [
+            sesion.to_dict()
+            for sesion in self._calendario_service.proximas_clases(docente_id, 4)
+        ]
 
         return {
             'materias_asignadas': len(materias),
@@ -89,15 +96,19 @@ class DocenteService:
             'Sábado': []
         }
 
-        for materia in materias:
-            horarios = self._horario_repo.obtener_por_materia(materia.id)
-            for horario in horarios:
+        horarios_por_materia = {}
+        for horario, _ in self._horario_repo.obtener_por_docente(docente_id):
+            horarios_por_materia.setdefault(horario.materia_id, []).append(horario)
+
+        for indice, materia in enumerate(materias):
+            for horario in horarios_por_materia.get(materia.id, []):
                 if horario.dia_semana in horario_por_dia:
                     horario_por_dia[horario.dia_semana].append({
                         'materia': materia.nombre,
                         'aula': materia.aula,
                         'hora_inicio': horario.hora_inicio,
-                        'hora_fin': horario.hora_fin
+                        'hora_fin': horario.hora_fin,
+                        'color': indice % self.COLORES_CALENDARIO
                     })
 
         # Calcular estadísticas
@@ -106,27 +117,51 @@ class DocenteService:
 
         return {
             'horario_por_dia': horario_por_dia,
+            'grilla': self._grilla_semanal(horario_por_dia),
             'total_horas': total_horas,
             'clases_por_semana': clases_por_semana,
             'materias_diferentes': len(materias)
         }
 
-    def obtener_preferencias(self, docente_id: int) -> List[Dict]:
-        """Obtiene las preferencias del docente con información adicional"""
-        preferencias = self._preferencia_repo.obtener_por_docente(docente_id)
-        resultado = []
+    @staticmethod
+    def _grilla_semanal(horario_por_dia: Dict[str, List[Dict]]) -> List[Dict]:
+        """Filas hora a hora con las clases que empiezan en esa hora, por día"""
+        horas = [int(clase['hora_inicio'].split(':')[0])
+                 for clases in horario_por_dia.values() for clase in clases]
+        primera = min(horas + [DocenteService.HORA_INICIO_CALENDARIO])
+        ultima = max(horas + [DocenteService.HORA_FIN_CALENDARIO])
+
+        return [{
+            'hora': f'{hora:02d}:00',
+            'celdas': [[clase for clase in clases if int(clase['hora_inicio'].split(':')[0]) == hora]
+                       for clases in horario_por_dia.values()]
+        } for hora in range(primera, ultima + 1)]
 
-        for pref in preferencias:
-            materia = self._materia_repo.obtener_por_id(pref.materia_id)
-            resultado.append({
-                'id': pref.id,
-                'materia': materia.nombre if materia else 'Desconocida',
-                'dia': pref.dia_semana,
-                'horario': pref.horario,
-                'estado': pref.estado.value
-            })
+    def obtener_horarios(self, docente_id: Optional[int] = None, despues_de: Optional[int] = None,
+                         limite: Optional[int] = None) -> List[tuple]:
+        """
+        Horarios como filas con las columnas de COLUMNAS_HORARIO, en orden de id.
 
-        return resultado
+        Args:
+            docente_id: Limita el resultado a un docente (None = todos)
+            despues_de: Cursor: solo los de id mayor (None = desde el principio)
+            limite: Máximo de horarios (None = todos)
+        """
+        return self._horario_repo.obtener_ocupacion(docente_id=docente_id, despues_de=despues_de,
+                                                    limite=limite)
+
+    def obtener_preferencias(self, docente_id: int, despues_de: Optional[int] = None,
+                             limite: Optional[int] = None) -> List[Dict]:
+        """Obtiene las preferencias del docente con información adicional (en orden de id)"""
+        filas = self._preferencia_repo.obtener_con_detalle(list(EstadoPreferencia), docente_id,
+                                                           despues_de, limite)
+        return [{
+            'id': id,
+            'materia': materia_nombre or 'Desconocida',
+            'dia': dia_semana,
+            'horario': horario,
+            'estado': estado
+        } for (id, _, _, dia_semana, horario, estado, _, materia_nombre, _) in filas]
 
     def crear_preferencia(self, docente_id: int, materia_id: int,
                          dia_semana: str, horario: str) -> tuple[bool, str]:
@@ -146,11 +181,77 @@ class DocenteService:
         except Exception as e:
             return (False, f"Error al crear preferencia: {str(e)}")
 
+    def crear_preferencias(self, docente_id: int,
+                           solicitudes: Sequence[Tuple[int, str, str]]) -> tuple[bool, str]:
+        """
+        Crea en una sola transacción las preferencias de la rejilla semanal.
+
+        Antes de escribir se comprueba en memoria, con las máscaras de
+        utils/franjas.py, que cada horario sea un rango HH:MM válido que cubra
+        alguna franja y que ninguna esté repetida ni se solape con otra del
+        envío o con las pendientes y aprobadas del docente. Si alguna falla no
+        se crea ninguna.
+
+        Args:
+            solicitudes: Tuplas (materia_id, dia_semana, horario)
+        """
+        if not solicitudes:
+            return (False, "Selecciona al menos una franja")
+        if len(solicitudes) > self.MAXIMO_PREFERENCIAS_LOTE:
+            return (False, f"Máximo {self.MAXIMO_PREFERENCIAS_LOTE} preferencias por envío")
+
+        with self._preferencia_repo.db.transaccion():
+            vigentes = [p for p in self._preferencia_repo.obtener_por_docente(docente_id)
+                        if p.estado != EstadoPreferencia.RECHAZADA]
+            registradas = {(p.materia_id, p.dia_semana, p.horario) for p in vigentes}
+            ocupado = 0
+            for preferencia in vigentes:
+                try:
+                    ocupado |= mascara_franja(preferencia.dia_semana, *parsear_rango(preferencia.horario))
+                except ValueError:
+                    continue
+
+            errores, nuevas = [], []
+            for materia_id, dia_semana, horario in solicitudes:
+                franja = f"{dia_semana} {horario}"
+                if (materia_id, dia_semana, horario) in registradas:
+                    errores.append(f"{franja}: preferencia repetida")
+                    continue
+                try:
+                    mascara = mascara_franja(dia_semana, *parsear_rango(horario))
+                except ValueError as e:
+                    errores.append(f"{franja}: {e}")
+                    continue
+                if ocupado & mascara:
+                    errores.append(f"{franja}: se solapa con otra preferencia")
+                    continue
+                registradas.add((materia_id, dia_semana, horario))
+                ocupado |= mascara
+                nuevas.append(PreferenciaEnsenanza(
+                    id=None,
+                    docente_id=docente_id,
+                    materia_id=materia_id,
+                    dia_semana=dia_semana,
+                    horario=horario,
+                    estado=EstadoPreferencia.PENDIENTE
+                ))
+
+            if errores:
+                return (False, "No se guardó ninguna preferencia. " + "; ".join(errores))
+            self._preferencia_repo.crear_lote(nuevas)
+        return (True, f"{len(nuevas)} preferencia(s) creadas correctamente")
+
     def obtener_notificaciones(self, docente_id: int) -> List[Dict]:
         """Obtiene las notificaciones del docente"""
         notificaciones = self._notificacion_repo.obtener_por_usuario(docente_id)
         return [n.to_dict() for n in notificaciones]
 
+    def obtener_pagina_notificaciones(self, docente_id: int, despues_de: Optional[int],
+                                      limite: Optional[int]) -> List[Dict]:
+        """Notificaciones del docente en orden de id, desde un cursor (API)"""
+        notificaciones = self._notificacion_repo.obtener_pagina(docente_id, despues_de, limite)
+        return [n.to_dict() for n in notificaciones]
+
     def obtener_notificaciones_no_leidas(self, docente_id: int) -> int:
         """Obtiene el conteo de notificaciones no leídas"""
         notificaciones = self._notificacion_repo.obtener_no_leidas(docente_id)
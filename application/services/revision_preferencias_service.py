@@ -0,0 +1,167 @@
+"""
+Servicio de Revisión de Preferencias
+Capa de Negocio - Cola de preferencias pendientes y aprobación o rechazo en
+bloque.
+
+Los conflictos se detectan con las máscaras de utils/franjas.py: se acumula
+por docente y por aula el OR de las franjas ya aprobadas y cada candidata se
+comprueba con un único AND, en una sola pasada sobre la selección y antes de
+escribir nada.
+"""
+
+from typing import Dict, Iterable, List, Optional
+from application.models.preferencia import EstadoPreferencia
+from application.patterns.observer import PreferenciaSubject, NotificacionObserver
+from application.repositories.preferencia_repository import PreferenciaRepository
+from application.repositories.notificacion_repository import NotificacionRepository
+from application.utils.franjas import DIAS, a_minutos, mascara_franja, parsear_rango
+from application.utils.trazas import trazar_clase
+
+# Columnas de PreferenciaRepository.obtener_con_detalle
+ID, DOCENTE_ID, MATERIA_ID, DIA, HORARIO, ESTADO, DOCENTE, MATERIA, AULA = range(9)
+
+
+def _mascara(fila: tuple) -> int:
+    """
+    Raises:
+        ValueError: Si el día o el rango horario no son válidos
+    """
+    return mascara_franja(fila[DIA], *parsear_rango(fila[HORARIO]))
+
+
+def detectar_conflictos(aceptadas: Iterable[tuple], candidatas: Iterable[tuple],
+                        acumular: bool = False) -> Dict[int, str]:
+    """
+    Candidatas que se solapan con las aceptadas en el mismo docente o aula.
+
+    Args:
+        aceptadas: Filas ya aprobadas
+        candidatas: Filas a comprobar, en orden de prioridad
+        acumular: Si es True cada candidata sin conflicto pasa a ocupar su
+            franja, de modo que también se detectan solapes entre candidatas
+
+    Returns:
+        {id de preferencia: motivo del conflicto}
+    """
+    por_docente: Dict[int, int] = {}
+    por_aula: Dict[str, int] = {}
+
+    def ocupar(fila, mascara):
+        por_docente[fila[DOCENTE_ID]] = por_docente.get(fila[DOCENTE_ID], 0) | mascara
+        if fila[AULA]:
+            por_aula[fila[AULA]] = por_aula.get(fila[AULA], 0) | mascara
+
+    for fila in aceptadas:
+        try:
+            ocupar(fila, _mascara(fila))
+        except ValueError:
+            continue
+
+    conflictos = {}
+    for fila in candidatas:
+        try:
+            mascara = _mascara(fila)
+        except ValueError as e:
+            conflictos[fila[ID]] = str(e)
+            continue
+        if por_docente.get(fila[DOCENTE_ID], 0) & mascara:
+            conflictos[fila[ID]] = "El docente ya tiene una preferencia aprobada en esa franja"
+        elif fila[AULA] and por_aula.get(fila[AULA], 0) & mascara:
+            conflictos[fila[ID]] = f"{fila[AULA]} ya está ocupada en esa franja"
+        elif acumular:
+            ocupar(fila, mascara)
+    return conflictos
+
+
+@trazar_clase('servicio')
+class RevisionPreferenciasService:
+    """
+    Servicio de revisión de preferencias - Principio SRP
+
+    Patrón: Observer (notifica a los docentes las aprobaciones y rechazos)
+    """
+
+    def __init__(self, preferencia_repo: PreferenciaRepository,
+                 notificacion_repo: NotificacionRepository,
+                 notif_observer: Optional[NotificacionObserver] = None):
+        """
+        Args:
+            notif_observer: Observer de notificaciones compartido con otros
+                servicios: un revisar() dentro de su lote() abierto forma parte
+                de ese lote (ver AdministrativoService.ejecutar_lote)
+        """
+        self._preferencia_repo = preferencia_repo
+        self._preferencia_subject = PreferenciaSubject()
+        self._notif_observer = notif_observer or NotificacionObserver(notificacion_repo)
+        self._preferencia_subject.agregar_observer(self._notif_observer)
+
+    def _filas(self):
+        filas = self._preferencia_repo.obtener_con_detalle(
+            [EstadoPreferencia.PENDIENTE, EstadoPreferencia.APROBADA])
+        pendientes = [f for f in filas if f[ESTADO] == EstadoPreferencia.PENDIENTE.value]
+        aprobadas = [f for f in filas if f[ESTADO] == EstadoPreferencia.APROBADA.value]
+        return pendientes, aprobadas
+
+    def obtener_cola(self) -> List[Dict]:
+        """
+        Preferencias pendientes agrupadas por franja (día y horario), en orden
+        de la semana. Cada una indica si choca con lo ya aprobado.
+        """
+        pendientes, aprobadas = self._filas()
+        conflictos = detectar_conflictos(aprobadas, pendientes)
+
+        grupos: Dict[tuple, List[Dict]] = {}
+        for fila in pendientes:
+            grupos.setdefault((fila[DIA], fila[HORARIO]), []).append({
+                'id': fila[ID],
+                'docente': fila[DOCENTE] or 'Desconocido',
+                'materia': fila[MATERIA] or 'Desconocida',
+                'aula': fila[AULA] or '',
+                'conflicto': conflictos.get(fila[ID], '')
+            })
+
+        def orden(clave):
+            dia, horario = clave
+            try:
+                inicio = a_minutos(parsear_rango(horario)[0])
+            except ValueError:
+                inicio = 24 * 60
+            return (DIAS.index(dia) if dia in DIAS else len(DIAS), inicio, horario)
+
+        return [{'dia': dia, 'horario': horario, 'preferencias': grupos[(dia, horario)]}
+                for dia, horario in sorted(grupos, key=orden)]
+
+    def revisar(self, ids: Iterable[int], aprobar: bool) -> Dict:
+        """
+        Aprueba o rechaza en bloque las preferencias pendientes indicadas, en
+        una transacción y con las notificaciones agrupadas por docente.
+
+        Al aprobar se omiten las que chocan con preferencias aprobadas o con
+        otra de la misma selección (gana la de menor id).
+
+        Returns:
+            {'actualizadas': n, 'omitidas': n no pendientes,
+             'conflictos': [{'id', 'docente', 'materia', 'motivo'}]}
+        """
+        solicitadas = sorted(set(ids))
+        with self._preferencia_repo.db.transaccion(), self._notif_observer.lote():
+            pendientes, aprobadas = self._filas()
+            por_id = {fila[ID]: fila for fila in pendientes}
+            seleccion = [por_id[id] for id in solicitadas if id in por_id]
+
+            conflictos = detectar_conflictos(aprobadas, seleccion, acumular=True) if aprobar else {}
+            validas = [fila for fila in seleccion if fila[ID] not in conflictos]
+
+            estado = EstadoPreferencia.APROBADA if aprobar else EstadoPreferencia.RECHAZADA
+            self._preferencia_repo.cambiar_estado_lote([fila[ID] for fila in validas], estado)
+            notificar = (self._preferencia_subject.aprobar_preferencia if aprobar
+                         else self._preferencia_subject.rechazar_preferencia)
+            for fila in validas:
+                notificar(docente_id=fila[DOCENTE_ID], materia_nombre=fila[MATERIA] or 'Desconocida')
+
+        return {
+            'actualizadas': len(validas),
+            'omitidas': len(solicitadas) - len(seleccion),
+            'conflictos': [{'id': id, 'docente': por_id[id][DOCENTE], 'materia': por_id[id][MATERIA],
+                            'motivo': motivo} for id, motivo in conflictos.items()]
+        }
@@ -0,0 +1,108 @@
+/* ================================
+   AUTOCOMPLETADO DE CATÁLOGOS
+   ================================
+   Uso: <input data-autocompletar="/api/autocompletar/materias"
+               data-destino="materia_id" data-etiqueta="nombre" data-detalle="codigo">
+   Al elegir una sugerencia se copia su id al campo oculto indicado en data-destino. */
+
+(function () {
+    var ESPERA_MS = 150;
+
+    function iniciar(input) {
+        var destino = document.getElementById(input.dataset.destino);
+        var etiqueta = input.dataset.etiqueta || 'nombre';
+        var detalle = input.dataset.detalle;
+        var lista = document.createElement('ul');
+        var temporizador = null;
+        var ultimaConsulta = null;
+        var activo = -1;
+
+        lista.className = 'autocompletar-lista';
+        lista.hidden = true;
+        input.parentNode.appendChild(lista);
+
+        function cerrar() {
+            lista.hidden = true;
+            activo = -1;
+        }
+
+        function elegir(item) {
+            input.value = item[etiqueta];
+            destino.value = item.id;
+            cerrar();
+        }
+
+        function mostrar(items) {
+            lista.innerHTML = '';
+            items.forEach(function (item) {
+                var li = document.createElement('li');
+                li.textContent = item[etiqueta];
+                if (detalle && item[detalle]) {
+                    var pequeno = document.createElement('small');
+                    pequeno.textContent = item[detalle];
+                    li.appendChild(pequeno);
+                }
+                li.addEventListener('mousedown', function (evento) {
+                    evento.preventDefault();
+                    elegir(item);
+                });
+                lista.appendChild(li);
+            });
+            lista.hidden = items.length === 0;
+            activo = -1;
+        }
+
+        function consultar() {
+            var consulta = input.value.trim();
+            if (consulta === ultimaConsulta) {
+                return;
+            }
+            ultimaConsulta = consulta;
+            if (!consulta) {
+                mostrar([]);
+                return;
+            }
+            fetch(input.dataset.autocompletar + '?q=' + encodeURIComponent(consulta), {
+                credentials: 'same-origin',
+                headers: { 'Accept': 'application/json' }
+            })
+                .then(function (respuesta) { return respuesta.ok ? respuesta.json() : []; })
+                .then(function (items) {
+                    if (consulta === ultimaConsulta) {
+                        mostrar(items);
+                    }
+                })
+                .catch(function () { mostrar([]); });
+        }
+
+        input.addEventListener('input', function () {
+            destino.value = '';
+            clearTimeout(temporizador);
+            temporizador = setTimeout(consultar, ESPERA_MS);
+        });
+
+        input.addEventListener('keydown', function (evento) {
+            var items = lista.querySelectorAll('li');
+            if (lista.hidden || items.length === 0) {
+                return;
+            }
+            if (evento.key === 'ArrowDown' || evento.key === 'ArrowUp') {
+                evento.preventDefault();
+                if (activo >= 0) {
+                    items[activo].classList.remove('activo');
+                }
+                activo = (activo + (evento.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+                items[activo].classList.add('activo');
+            } else if (evento.key === 'Enter' && activo >= 0) {
+                evento.preventDefault();
+                items[activo].dispatchEvent(new MouseEvent('mousedown'));
+            } else if (evento.key === 'Escape') {
+                cerrar();
+            }
+        });
+
+        input.addEventListener('blur', cerrar);
+    }
+
+    document.querySelectorAll('[data-autocompletar]').forEach(iniciar);
+})();
@@ -0,0 +1,95 @@
+/* ================================
+   MAPA DE CALOR DE DEMANDA
+   ================================
+   Uso: <div id="mapa-demanda" data-url="/api/admin/demanda" data-filtro="id-del-select"></div>
+   Pinta una tabla día × hora con la intensidad de cada celda (nivel-0 a nivel-4)
+   y rellena el select con las materias más solicitadas para filtrar. */
+
+(function () {
+    var NIVELES = 4;
+
+    function nivel(valor, maximo) {
+        return valor && maximo ? Math.ceil(NIVELES * valor / maximo) : 0;
+    }
+
+    function celda(etiqueta, texto, clase) {
+        var elemento = document.createElement(etiqueta);
+        elemento.textContent = texto;
+        if (clase) {
+            elemento.className = clase;
+        }
+        return elemento;
+    }
+
+    function pintar(contenedor, datos) {
+        var tabla = document.createElement('table');
+        var cabecera = document.createElement('tr');
+        tabla.className = 'mapa-calor';
+        cabecera.appendChild(celda('th', ''));
+        datos.horas.forEach(function (hora) {
+            cabecera.appendChild(celda('th', hora.slice(0, 2)));
+        });
+        tabla.appendChild(cabecera);
+
+        datos.dias.forEach(function (dia, i) {
+            var fila = document.createElement('tr');
+            fila.appendChild(celda('th', dia));
+            datos.celdas[i].forEach(function (valor, j) {
+                var td = celda('td', valor || '', 'nivel-' + nivel(valor, datos.maximo));
+                td.title = dia + ' ' + datos.horas[j] + ': ' + valor + ' preferencia(s)';
+                fila.appendChild(td);
+            });
+            tabla.appendChild(fila);
+        });
+
+        contenedor.innerHTML = '';
+        contenedor.appendChild(tabla);
+    }
+
+    function rellenarFiltro(select, materias) {
+        if (select.options.length > 1) {
+            return;
+        }
+        materias.forEach(function (materia) {
+            var opcion = document.createElement('option');
+            opcion.value = materia.id;
+            opcion.textContent = materia.nombre + ' (' + materia.demanda + ')';
+            select.appendChild(opcion);
+        });
+    }
+
+    function iniciar(contenedor) {
+        var select = document.getElementById(contenedor.dataset.filtro);
+
+        function cargar() {
+            var url = contenedor.dataset.url;
+            if (select && select.value) {
+                url += '?materia_id=' + encodeURIComponent(select.value);
+            }
+            fetch(url, { credentials: 'same-origin' })
+                .then(function (respuesta) { return respuesta.ok ? respuesta.json() : null; })
+                .then(function (datos) {
+                    if (!datos) {
+                        return;
+                    }
+                    pintar(contenedor, datos);
+                    if (select) {
+                        rellenarFiltro(select, datos.materias);
+                    }
+                })
+                .catch(function () { /* sin mapa si falla la petición */ });
+        }
+
+        if (select) {
+            select.addEventListener('change', cargar);
+        }
+        cargar();
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        var contenedor = document.getElementById('mapa-demanda');
+        if (contenedor) {
+            iniciar(contenedor);
+        }
+    });
+})();
@@ -0,0 +1,99 @@
+"""
+Caché de Plantillas
+Extensiones de Jinja para cachear fragmentos renderizados y compactar el HTML
+al compilar, y caché de bytecode persistente entre procesos.
+
+Uso en una plantilla:
+
+    {% cache 'navegacion' %} ... {% endcache %}
+    {% cache 'tabla_docentes', version('catalogo') %} ... {% endcache %}
+
+La clave del fragmento es (plantilla, nombre, argumentos adicionales): los
+argumentos suelen ser versiones del VersionRegistry o datos del usuario, de
+modo que un cambio en los datos produce una clave nueva y la entrada vieja
+acaba saliendo del LRU.
+"""
+
+import hashlib
+import os
+import re
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from jinja2.utils import LRUCache
+
+
+class CacheFragmentos(Extension):
+    """
+    Etiqueta {% cache %} con un LRU acotado por entorno.
+
+    Patrón: Decorator (envuelve el renderizado de un bloque)
+    Principio SRP: Única responsabilidad de reutilizar fragmentos ya renderizados.
+    """
+
+    tags = {'cache'}
+    TAMANO_POR_DEFECTO = 512
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        # cache_fragmentos_observador: función opcional (acierto: bool) para métricas
+        environment.extend(cache_fragmentos=LRUCache(self.TAMANO_POR_DEFECTO),
+                           cache_fragmentos_observador=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        nombre = parser.parse_expression()
+        claves = []
+        while parser.stream.skip_if('comma'):
+            claves.append(parser.parse_expression())
+
+        args = [nodes.Const(parser.name), nombre, nodes.List(claves)]
+        cuerpo = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_renderizar', args), [], [], cuerpo).set_lineno(lineno)
+
+    def _renderizar(self, plantilla, nombre, claves, caller):
+        cache = self.environment.cache_fragmentos
+        if cache is None:
+            return caller()
+        clave = (plantilla, nombre, tuple(claves))
+        fragmento = cache.get(clave)
+        if self.environment.cache_fragmentos_observador is not None:
+            self.environment.cache_fragmentos_observador(fragmento is not None)
+        if fragmento is None:
+            fragmento = caller()
+            cache[clave] = fragmento
+        return fragmento
+
+
+class CompactarHtml(Extension):
+    """
+    Quita la indentación y las líneas vacías de las plantillas .html antes de
+    compilarlas, de modo que el coste se paga una vez por plantilla y no en
+    cada petición. Las plantillas no usan <pre> ni <textarea>, donde los
+    espacios sí son significativos.
+
+    Principio SRP: Única responsabilidad de reducir el HTML generado.
+    """
+
+    _INDENTACION = re.compile(r'^[ \t]+', re.MULTILINE)
+    _LINEAS_VACIAS = re.compile(r'\n{2,}')
+
+    def preprocess(self, source, name, filename=None):
+        if not name or not name.endswith('.html'):
+            return source
+        return self._LINEAS_VACIAS.sub('\n', self._INDENTACION.sub('', source))
+
+
+def crear_cache_bytecode(directorio: str, entorno=None) -> FileSystemBytecodeCache:
+    """
+    Caché de bytecode en disco compartida por todos los workers.
+
+    Jinja solo invalida el bytecode cuando cambia el código fuente; si se indica
+    el entorno, sus opciones de sintaxis y extensiones forman parte del nombre
+    de los archivos para no reutilizar bytecode compilado con otra configuración.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    if entorno is None:
+        return FileSystemBytecodeCache(directorio)
+    firma = repr((entorno.trim_blocks, entorno.lstrip_blocks, sorted(entorno.extensions)))
+    huella = hashlib.sha1(firma.encode('utf-8')).hexdigest()[:12]
+    return FileSystemBytecodeCache(directorio, f'__jinja2_{huella}_%s.cache')
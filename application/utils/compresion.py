@@ -0,0 +1,155 @@
+"""
+Compresión de Respuestas
+Middleware WSGI que comprime con gzip (o brotli si el módulo está instalado)
+las respuestas de texto que el cliente acepta comprimidas.
+
+- Respuestas con Content-Length: solo se comprimen si superan el mínimo.
+- Respuestas en streaming (sin Content-Length): se comprimen trozo a trozo
+  con un flush de sincronización, para que cada trozo llegue sin esperar al
+  siguiente.
+- Se respetan las respuestas ya codificadas (p. ej. los recursos
+  precomprimidos de /recursos), los tipos no textuales y no-transform.
+"""
+
+import zlib
+from itertools import chain
+from typing import Optional
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_options_header
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+
+
+class CompresorGzip:
+    """Compresión gzip incremental sobre zlib"""
+
+    def __init__(self, nivel: int):
+        self._zlib = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def comprimir(self, datos: bytes, vaciar: bool = False) -> bytes:
+        salida = self._zlib.compress(datos)
+        return salida + self._zlib.flush(zlib.Z_SYNC_FLUSH) if vaciar else salida
+
+    def finalizar(self) -> bytes:
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompresorBrotli:
+    """Compresión brotli incremental"""
+
+    def __init__(self, nivel: int):
+        self._brotli = brotli.Compressor(quality=nivel)
+
+    def comprimir(self, datos: bytes, vaciar: bool = False) -> bytes:
+        salida = self._brotli.process(datos)
+        return salida + self._brotli.flush() if vaciar else salida
+
+    def finalizar(self) -> bytes:
+        return self._brotli.finish()
+
+
+def crear_compresor(codificacion: str, nivel: int):
+    """Compresor incremental para 'gzip' o 'br'"""
+    if codificacion == 'br':
+        return CompresorBrotli(nivel)
+    return CompresorGzip(nivel)
+
+
+class CompresionRespuestas:
+    """
+    Envuelve una aplicación WSGI (app.wsgi_app) y comprime sus respuestas.
+
+    Patrón: Decorator (sobre la aplicación WSGI)
+    Principio SRP: Única responsabilidad de codificar el cuerpo de las respuestas.
+    """
+
+    def __init__(self, app, nivel_gzip: int = 6, nivel_brotli: int = 4, minimo: int = 500):
+        """
+        Args:
+            app: Aplicación WSGI envuelta
+            nivel_gzip: Nivel de zlib (1-9)
+            nivel_brotli: Calidad de brotli (0-11)
+            minimo: Bytes por debajo de los cuales no compensa comprimir
+        """
+        self.app = app
+        self.niveles = {'gzip': nivel_gzip, 'br': nivel_brotli}
+        self.minimo = minimo
+
+    def elegir_codificacion(self, accept_encoding: str) -> Optional[str]:
+        aceptadas = parse_accept_header(accept_encoding)
+        if brotli is not None and aceptadas['br']:
+            return 'br'
+        if aceptadas['gzip']:
+            return 'gzip'
+        return None
+
+    def __call__(self, environ, start_response):
+        codificacion = self.elegir_codificacion(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacion is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captura = []
+        escritos = []
+
+        def start_response_diferido(status, headers, exc_info=None):
+            captura[:] = [status, headers, exc_info]
+            return escritos.append
+
+        iterable = self.app(environ, start_response_diferido)
+        return ClosingIterator(self._responder(iterable, captura, escritos, codificacion, start_response),
+                               getattr(iterable, 'close', None))
+
+    def _responder(self, iterable, captura, escritos, codificacion, start_response):
+        trozos = iter(iterable)
+        if not captura:
+            # La aplicación difiere start_response hasta el primer trozo
+            escritos.append(next(trozos, b''))
+        status, headers, exc_info = captura
+        cabeceras = Headers(headers)
+        longitud = cabeceras.get('Content-Length', type=int)
+
+        if not self._es_comprimible(status, cabeceras, longitud):
+            start_response(status, headers, exc_info)
+            yield from chain(escritos, trozos)
+            return
+
+        compresor = crear_compresor(codificacion, self.niveles[codificacion])
+        streaming = longitud is None
+        start_response(status, self._cabeceras_comprimidas(cabeceras, codificacion), exc_info)
+        for trozo in chain(escritos, trozos):
+            datos = compresor.comprimir(trozo, streaming)
+            if datos:
+                yield datos
+        yield compresor.finalizar()
+
+    def _es_comprimible(self, status: str, cabeceras: Headers, longitud: Optional[int]) -> bool:
+        if not status.startswith('200') or 'Content-Encoding' in cabeceras:
+            return False
+        if longitud is not None and longitud < self.minimo:
+            return False
+        if 'no-transform' in cabeceras.get('Cache-Control', ''):
+            return False
+        tipo, _ = parse_options_header(cabeceras.get('Content-Type', ''))
+        return tipo.startswith(TIPOS_COMPRIMIBLES)
+
+    @staticmethod
+    def _cabeceras_comprimidas(cabeceras: Headers, codificacion: str) -> list:
+        cabeceras.remove('Content-Length')
+        cabeceras['Content-Encoding'] = codificacion
+        vary = cabeceras.get('Vary')
+        if not vary:
+            cabeceras['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            cabeceras['Vary'] = f'{vary}, Accept-Encoding'
+        # El cuerpo ya no es idéntico byte a byte: un ETag fuerte pasa a débil
+        etag = cabeceras.get('ETag')
+        if etag and not etag.startswith('W/'):
+            cabeceras['ETag'] = f'W/{etag}'
+        return cabeceras.to_wsgi_list()
@@ -0,0 +1,139 @@
+"""
+Presupuesto de Consultas SQL
+Cuenta las sentencias SQL que ejecuta cada petición y las compara con el
+máximo declarado en la ruta con @presupuesto_sql.
+
+El presupuesto es fijo, no depende del volumen de datos: una ruta que hace
+una consulta por docente o por materia (N+1) lo supera en cuanto hay más
+filas que en los datos de prueba, y benchmarks/presupuesto_consultas.py lo
+detecta con 10 y con 1.000 entidades antes de llegar a producción.
+
+El conteo usa sqlite3.Connection.set_trace_callback, que SQLite llama en el
+hilo que ejecuta la sentencia, así que cada petición cuenta solo las suyas
+aunque compartan la conexión. SQLite registra cada fila de un executemany
+como una sentencia; el cursor de DatabaseConnection las agrupa (una_sentencia)
+y cuentan como una, así que insertar o actualizar N filas de una vez cabe en
+un presupuesto fijo. Las rutas que ejecutan una operación por elemento de la
+petición (POST /api/v1/lote) declaran además un presupuesto por elemento.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+# Control de transacciones y sentencias internas de triggers: no cuentan
+_NO_CONTABLES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', '--')
+
+# Las que SQLite lanza por su cuenta con el esquema entre comillas, como las
+# de FTS5 sobre sus tablas internas (PRAGMA 'main'.data_version, SELECT k, v
+# FROM 'main'.'docentes_fts_config' en la primera búsqueda de cada conexión).
+# La aplicación nunca escribe el esquema así: tampoco cuentan.
+_INTERNAS = "'main'."
+
+CABECERA_CONSULTAS = 'X-Consultas-SQL'
+CABECERA_PRESUPUESTO = 'X-Presupuesto-SQL'
+
+
+# Hilo que está ejecutando un executemany: None fuera; False hasta contar
+# la primera fila y True después
+_grupo = threading.local()
+
+
+def presupuesto_sql(maximo: int, por_elemento: int = 0,
+                    elementos: Optional[Callable[[], int]] = None) -> Callable:
+    """
+    Declara el máximo de sentencias SQL que puede ejecutar una ruta.
+
+    Args:
+        maximo: Sentencias de la ruta (o las fijas, con por_elemento)
+        por_elemento: Sentencias de más por cada elemento de la petición
+        elementos: Cuenta los elementos de la petición en curso (se llama
+            al terminar la petición)
+
+    Uso (justo debajo de @app.route):
+        @app.route('/docente/asignaturas')
+        @presupuesto_sql(6)
+        @requiere_autenticacion
+        def docente_asignaturas(): ...
+    """
+    def decorador(vista):
+        vista.presupuesto_sql = maximo
+        if por_elemento and elementos is not None:
+            vista.presupuesto_sql_elementos = (por_elemento, elementos)
+        return vista
+    return decorador
+
+
+def presupuesto_de(vista) -> Optional[int]:
+    """Presupuesto declarado de una vista para la petición en curso (None si no tiene)"""
+    maximo = getattr(vista, 'presupuesto_sql', None)
+    por_elemento, elementos = getattr(vista, 'presupuesto_sql_elementos', (0, None))
+    if maximo is None or elementos is None:
+        return maximo
+    return maximo + por_elemento * elementos()
+
+
+@contextmanager
+def una_sentencia():
+    """
+    Las sentencias que SQLite registre en el hilo dentro del bloque cuentan
+    como una (las filas de un executemany).
+    """
+    _grupo.contada = False
+    try:
+        yield
+    finally:
+        _grupo.contada = None
+
+
+class ContadorSQL:
+    """
+    Cuenta por hilo las sentencias ejecutadas en una conexión SQLite.
+
+    Principio SRP: Única responsabilidad de registrar sentencias; qué hacer
+    al superar el presupuesto lo decide quien lo usa.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def instalar(self, conexion):
+        """Registra el contador como trace callback de la conexión"""
+        conexion.set_trace_callback(self._registrar)
+
+    def _registrar(self, sentencia: str):
+        sentencias = getattr(self._local, 'sentencias', None)
+        if (sentencias is None or sentencia.lstrip().upper().startswith(_NO_CONTABLES)
+                or _INTERNAS in sentencia):
+            return
+        contada = getattr(_grupo, 'contada', None)
+        if contada:
+            return
+        if contada is False:
+            _grupo.contada = True
+        sentencias.append(sentencia)
+
+    def iniciar(self):
+        """Empieza a contar en el hilo actual"""
+        self._local.sentencias = []
+
+    def terminar(self) -> List[str]:
+        """Deja de contar en el hilo actual y devuelve las sentencias registradas"""
+        sentencias = getattr(self._local, 'sentencias', None) or []
+        self._local.sentencias = None
+        return sentencias
+
+    @contextmanager
+    def contar(self):
+        """
+        Uso:
+            with contador.contar() as sentencias:
+                repo.obtener_todos()
+            len(sentencias)
+        """
+        sentencias = []
+        self.iniciar()
+        try:
+            yield sentencias
+        finally:
+            sentencias.extend(self.terminar())
@@ -0,0 +1,97 @@
+"""
+Franjas Horarias
+Conversión de horarios semanales a máscaras de bits.
+
+La semana se divide en 6 días (Lunes a Sábado) de 06:00 a 22:00 en franjas
+de 15 minutos: 64 franjas por día y 384 en total. Una máscara es un entero
+de Python donde el bit (dia * 64 + franja) indica que la franja está ocupada,
+así que solapamientos y uniones se resuelven con un único AND/OR.
+"""
+
+import re
+from typing import Iterable, List, Tuple
+from application.models.materia import HorarioClase
+
+
+DIAS = HorarioClase.DIAS_SEMANA
+HORA_APERTURA = 6
+HORA_CIERRE = 22
+MINUTOS_FRANJA = 15
+FRANJAS_POR_DIA = (HORA_CIERRE - HORA_APERTURA) * 60 // MINUTOS_FRANJA
+TOTAL_FRANJAS = FRANJAS_POR_DIA * len(DIAS)
+
+_PATRON_RANGO = re.compile(r'^\s*(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})\s*$')
+_PATRON_HORA = re.compile(r'^([01]?\d|2[0-3]):([0-5]\d)$')
+
+
+def a_minutos(hora: str) -> int:
+    """
+    Convierte 'HH:MM' a minutos desde medianoche.
+
+    Raises:
+        ValueError: Si la hora no tiene el formato esperado o no existe ('99:99')
+    """
+    coincidencia = _PATRON_HORA.match(hora.strip())
+    if not coincidencia:
+        raise ValueError(f"Hora inválida: {hora.strip()}")
+    return int(coincidencia.group(1)) * 60 + int(coincidencia.group(2))
+
+
+def parsear_rango(texto: str) -> Tuple[str, str]:
+    """
+    Separa un rango del tipo '08:00 - 12:00' (formato de las preferencias).
+
+    Raises:
+        ValueError: Si el texto no es un rango válido
+    """
+    coincidencia = _PATRON_RANGO.match(texto or '')
+    if not coincidencia:
+        raise ValueError(f"Rango horario inválido: {texto}")
+    return coincidencia.group(1), coincidencia.group(2)
+
+
+def mascara_franja(dia_semana: str, hora_inicio: str, hora_fin: str) -> int:
+    """
+    Máscara de las franjas que cubre un horario en un día.
+    Las horas se ajustan al rango de apertura y a franjas completas.
+
+    Raises:
+        ValueError: Si el día o las horas no son válidos, o si el horario no
+            cubre ninguna franja (termina antes de empezar o queda fuera del
+            rango de apertura)
+    """
+    if dia_semana not in DIAS:
+        raise ValueError(f"Día inválido. Debe ser uno de: {', '.join(DIAS)}")
+
+    apertura = HORA_APERTURA * 60
+    inicio = max(a_minutos(hora_inicio) - apertura, 0)
+    fin = min(a_minutos(hora_fin) - apertura, FRANJAS_POR_DIA * MINUTOS_FRANJA)
+    primera = inicio // MINUTOS_FRANJA
+    ultima = -(-fin // MINUTOS_FRANJA)  # redondeo hacia arriba
+    if ultima <= primera:
+        raise ValueError(f"El horario debe terminar después de empezar y estar entre las "
+                         f"{HORA_APERTURA:02d}:00 y las {HORA_CIERRE:02d}:00")
+
+    desplazamiento = DIAS.index(dia_semana) * FRANJAS_POR_DIA
+    return ((1 << (ultima - primera)) - 1) << (desplazamiento + primera)
+
+
+def posiciones(mascara: int) -> List[int]:
+    """Posiciones de los bits activos de una máscara, en orden ascendente"""
+    binario = bin(mascara)[:1:-1]
+    return [i for i, bit in enumerate(binario) if bit == '1']
+
+
+def unir(mascaras: Iterable[int]) -> int:
+    """OR de varias máscaras"""
+    resultado = 0
+    for mascara in mascaras:
+        resultado |= mascara
+    return resultado
+
+
+def describir_franja(posicion: int) -> Tuple[str, str]:
+    """Devuelve (dia_semana, 'HH:MM') del inicio de una franja"""
+    dia, franja = divmod(posicion, FRANJAS_POR_DIA)
+    minutos = HORA_APERTURA * 60 + franja * MINUTOS_FRANJA
+    return DIAS[dia], f"{minutos // 60:02d}:{minutos % 60:02d}"
@@ -0,0 +1,64 @@
+"""
+iCalendar
+Serialización mínima de calendarios en formato iCalendar (RFC 5545):
+escapado de texto, plegado de líneas a 75 octetos y saltos CRLF.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List
+
+
+def escapar_texto(texto: str) -> str:
+    """Escapa un valor TEXT (barra invertida, punto y coma, coma y saltos de línea)"""
+    return (str(texto or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def plegar_linea(linea: str) -> str:
+    """Divide una línea en tramos de como máximo 75 octetos UTF-8"""
+    tramos = []
+    actual, octetos = '', 0
+    for caracter in linea:
+        tamano = len(caracter.encode('utf-8'))
+        if octetos + tamano > 75:
+            tramos.append(actual)
+            actual, octetos = ' ', 1
+        actual += caracter
+        octetos += tamano
+    tramos.append(actual)
+    return '\r\n'.join(tramos)
+
+
+def formato_fecha_hora(valor: datetime) -> str:
+    """Fecha y hora local (flotante) en formato AAAAMMDDTHHMMSS"""
+    return valor.strftime('%Y%m%dT%H%M%S')
+
+
+def formato_utc(valor: datetime) -> str:
+    """Fecha y hora UTC en formato AAAAMMDDTHHMMSSZ"""
+    return valor.strftime('%Y%m%dT%H%M%SZ')
+
+
+def formato_fecha(valor: date) -> str:
+    return valor.strftime('%Y%m%d')
+
+
+def construir_calendario(nombre: str, eventos: Iterable[Dict[str, str]]) -> str:
+    """
+    Construye un VCALENDAR con un VEVENT por diccionario de propiedades.
+    Los valores deben venir ya formateados (y escapados si son TEXT).
+    """
+    lineas: List[str] = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Sistema Universitario//Horario Docente//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escapar_texto(nombre)}',
+    ]
+    for evento in eventos:
+        lineas.append('BEGIN:VEVENT')
+        lineas.extend(f'{propiedad}:{valor}' for propiedad, valor in evento.items())
+        lineas.append('END:VEVENT')
+    lineas.append('END:VCALENDAR')
+    return ''.join(plegar_linea(linea) + '\r\n' for linea in lineas)
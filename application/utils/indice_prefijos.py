@@ -0,0 +1,101 @@
+"""
+Índice de Prefijos
+Índice en memoria, ordenado, para responder búsquedas por prefijo
+(autocompletado) mediante búsqueda binaria con bisect.
+
+Cada texto indexado genera una clave por palabra, de modo que "calc"
+encuentra tanto "Cálculo Integral" como "Ecuaciones de Cálculo".
+Las claves se normalizan (minúsculas y sin tildes).
+"""
+
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+
+class IndicePrefijos:
+    """
+    Índice ordenado de claves de texto para consultas por prefijo.
+
+    Principio SRP: Única responsabilidad de resolver prefijos y ordenar
+    los resultados por relevancia.
+    """
+
+    # Máximo de claves recorridas por consulta (prefijos muy cortos)
+    MAX_ESCANEO = 5000
+
+    def __init__(self):
+        self._claves: List[str] = []
+        self._entradas: List[Tuple[int, int, int]] = []  # (prioridad, posicion, id)
+        self._documentos: Dict[int, Dict] = {}
+
+    @staticmethod
+    def normalizar(texto: str) -> str:
+        """Convierte el texto a minúsculas y elimina tildes y espacios extra"""
+        if not texto:
+            return ''
+        descompuesto = unicodedata.normalize('NFKD', texto)
+        sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+        return ' '.join(sin_tildes.lower().split())
+
+    def construir(self, documentos: Iterable[Tuple[int, Dict, List[Tuple[str, int]]]]):
+        """
+        Reconstruye el índice completo.
+
+        Args:
+            documentos: Iterable de tuplas (id, datos, campos), donde campos es
+                una lista de (texto, prioridad). Menor prioridad = más relevante.
+        """
+        filas = []
+        documentos_por_id = {}
+
+        for doc_id, datos, campos in documentos:
+            documentos_por_id[doc_id] = datos
+            for texto, prioridad in campos:
+                palabras = self.normalizar(texto).split(' ')
+                for posicion in range(len(palabras)):
+                    clave = ' '.join(palabras[posicion:])
+                    if clave:
+                        filas.append((clave, prioridad, posicion, doc_id))
+
+        filas.sort()
+        self._claves = [fila[0] for fila in filas]
+        self._entradas = [fila[1:] for fila in filas]
+        self._documentos = documentos_por_id
+
+    def buscar(self, consulta: str, limite: int = 10) -> List[Dict]:
+        """
+        Devuelve los documentos cuyas claves empiezan por la consulta.
+
+        Orden: coincidencia exacta, prioridad del campo, inicio del texto
+        antes que palabras internas y, por último, textos más cortos.
+
+        Args:
+            consulta: Prefijo a buscar
+            limite: Número máximo de resultados
+
+        Returns:
+            Lista con los datos de los documentos encontrados
+        """
+        prefijo = self.normalizar(consulta)
+        if not prefijo or limite <= 0:
+            return []
+
+        mejores: Dict[int, Tuple] = {}
+        inicio = bisect_left(self._claves, prefijo)
+        fin = min(len(self._claves), inicio + self.MAX_ESCANEO)
+
+        for i in range(inicio, fin):
+            clave = self._claves[i]
+            if not clave.startswith(prefijo):
+                break
+            prioridad, posicion, doc_id = self._entradas[i]
+            puntaje = (clave != prefijo, prioridad, posicion > 0, len(clave))
+            if doc_id not in mejores or puntaje < mejores[doc_id]:
+                mejores[doc_id] = puntaje
+
+        ordenados = sorted(mejores.items(), key=lambda item: (item[1], item[0]))
+        return [self._documentos[doc_id] for doc_id, _ in ordenados[:limite]]
+
+    def __len__(self) -> int:
+        return len(self._documentos)
@@ -0,0 +1,382 @@
+"""
+Métricas
+Contadores, medidores e histogramas en el formato de texto de Prometheus
+(0.0.4), sin dependencias externas.
+
+Cada proceso guarda sus valores en un archivo propio mapeado en memoria
+(mmap) dentro del directorio de métricas, y /metrics suma los archivos de
+todos los workers de gunicorn: la respuesta no depende del worker que la
+atiende. Los contadores e histogramas de workers que ya terminaron se siguen
+sumando (un contador nunca retrocede); los medidores solo suman los procesos
+vivos. Sin directorio, los valores viven en un mmap anónimo del proceso.
+
+El directorio se vacía antes de arrancar los workers (init_railway.py): los
+archivos de un arranque anterior no deben sumarse.
+"""
+
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENIDO_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+LIMITES_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_SQL = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+_ENTERO = struct.Struct('<I')
+_REAL = struct.Struct('<d')
+_ARCHIVO = re.compile(r'^(acumulado|medidor)_(\d+)\.db$')
+
+
+class AlmacenMmap:
+    """
+    Diccionario clave -> float sobre un mmap.
+
+    Formato: 8 bytes con los bytes usados y después entradas
+    [longitud de la clave (4 bytes)][clave UTF-8 rellena a 8][valor double].
+    La cabecera se actualiza después de escribir cada entrada, así que otro
+    proceso que lea el archivo nunca ve una entrada a medias.
+    """
+
+    TAMANO_INICIAL = 64 * 1024
+
+    def __init__(self, ruta: Optional[str] = None):
+        self._ruta = ruta
+        self._lock = threading.Lock()
+        self._posiciones: Dict[str, int] = {}
+        if ruta is None:
+            self._archivo = None
+            self._mmap = mmap.mmap(-1, self.TAMANO_INICIAL)
+        else:
+            self._archivo = open(ruta, 'a+b')
+            if os.fstat(self._archivo.fileno()).st_size == 0:
+                self._archivo.truncate(self.TAMANO_INICIAL)
+            self._mmap = mmap.mmap(self._archivo.fileno(), 0)
+        self._usado = _ENTERO.unpack_from(self._mmap, 0)[0] or 8
+        for clave, _, posicion in _entradas(self._mmap, self._usado):
+            self._posiciones[clave] = posicion
+        _ENTERO.pack_into(self._mmap, 0, self._usado)
+
+    def _crear(self, clave: str) -> int:
+        codificada = clave.encode('utf-8')
+        longitud = 4 + len(codificada)
+        longitud += -longitud % 8
+        if self._usado + longitud + 8 > len(self._mmap):
+            self._ampliar(max(2 * len(self._mmap), self._usado + longitud + 8))
+        _ENTERO.pack_into(self._mmap, self._usado, len(codificada))
+        self._mmap[self._usado + 4:self._usado + 4 + len(codificada)] = codificada
+        posicion = self._usado + longitud
+        _REAL.pack_into(self._mmap, posicion, 0.0)
+        self._usado = posicion + 8
+        _ENTERO.pack_into(self._mmap, 0, self._usado)
+        self._posiciones[clave] = posicion
+        return posicion
+
+    def _ampliar(self, tamano: int):
+        if self._archivo is None:
+            nuevo = mmap.mmap(-1, tamano)
+            nuevo[:self._usado] = self._mmap[:self._usado]
+        else:
+            self._mmap.close()
+            self._archivo.truncate(tamano)
+            nuevo = mmap.mmap(self._archivo.fileno(), 0)
+        self._mmap = nuevo
+
+    def incrementar(self, cambios: Iterable[Tuple[str, float]]):
+        """Suma varios valores con un solo bloqueo"""
+        with self._lock:
+            for clave, valor in cambios:
+                posicion = self._posiciones.get(clave) or self._crear(clave)
+                _REAL.pack_into(self._mmap, posicion, _REAL.unpack_from(self._mmap, posicion)[0] + valor)
+
+    def fijar(self, clave: str, valor: float):
+        with self._lock:
+            posicion = self._posiciones.get(clave) or self._crear(clave)
+            _REAL.pack_into(self._mmap, posicion, valor)
+
+    def valores(self) -> Dict[str, float]:
+        with self._lock:
+            return {clave: valor for clave, valor, _ in _entradas(self._mmap, self._usado)}
+
+    @staticmethod
+    def leer(ruta: str) -> Dict[str, float]:
+        """Valores de un archivo de otro proceso"""
+        with open(ruta, 'rb') as archivo:
+            datos = archivo.read()
+        if len(datos) < 8:
+            return {}
+        return {clave: valor for clave, valor, _ in _entradas(datos, _ENTERO.unpack_from(datos, 0)[0])}
+
+
+def _entradas(datos, usado: int):
+    posicion = 8
+    while posicion < usado:
+        longitud = _ENTERO.unpack_from(datos, posicion)[0]
+        clave = bytes(datos[posicion + 4:posicion + 4 + longitud]).decode('utf-8')
+        posicion += 4 + longitud
+        posicion += -posicion % 8
+        yield clave, _REAL.unpack_from(datos, posicion)[0], posicion
+        posicion += 8
+
+
+def _proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _formatear(valor: float) -> str:
+    if math.isinf(valor):
+        return '+Inf' if valor > 0 else '-Inf'
+    return repr(float(valor))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _Metrica:
+    """Familia de métricas con nombre, ayuda y nombres de etiquetas fijos"""
+
+    tipo = ''
+    almacen = 'acumulado'
+
+    def __init__(self, registro: 'RegistroMetricas', nombre: str, ayuda: str, etiquetas: Tuple[str, ...]):
+        self._registro = registro
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._claves: Dict[tuple, object] = {}
+
+    def muestras(self) -> Tuple[str, ...]:
+        """Nombres de muestra de la familia"""
+        return (self.nombre,)
+
+    def _valores_etiquetas(self, etiquetas: Dict[str, str]) -> tuple:
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre} usa las etiquetas {self.etiquetas}, no {tuple(etiquetas)}")
+        return tuple(str(etiquetas[nombre]) for nombre in self.etiquetas)
+
+    def _clave(self, muestra: str, valores: tuple, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        return json.dumps([muestra, list(zip(self.etiquetas, valores)) + [list(par) for par in extra]])
+
+    def _clave_simple(self, etiquetas: Dict[str, str]) -> str:
+        """Clave de la muestra única de contadores y medidores"""
+        valores = self._valores_etiquetas(etiquetas)
+        clave = self._claves.get(valores)
+        if clave is None:
+            clave = self._claves[valores] = self._clave(self.nombre, valores)
+        return clave
+
+    def recolectar(self) -> List[tuple]:
+        """Muestras calculadas al exponer (las que no se guardan en el almacén)"""
+        return []
+
+    def ordenar(self, muestras: List[tuple]) -> List[tuple]:
+        return sorted(muestras, key=lambda muestra: muestra[1])
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, sentencias, aciertos de caché)"""
+
+    tipo = 'counter'
+
+    def incrementar(self, valor: float = 1.0, **etiquetas):
+        self._registro.almacen(self.almacen).incrementar(((self._clave_simple(etiquetas), valor),))
+
+
+class Medidor(_Metrica):
+    """
+    Valor que sube y baja. Con `funcion` se calcula al exponer, en el
+    proceso que responde, en lugar de guardarse.
+    """
+
+    tipo = 'gauge'
+    almacen = 'medidor'
+
+    def __init__(self, registro, nombre, ayuda, etiquetas, funcion: Optional[Callable[[], float]] = None):
+        super().__init__(registro, nombre, ayuda, etiquetas)
+        self._funcion = funcion
+
+    def incrementar(self, valor: float = 1.0, **etiquetas):
+        self._registro.almacen(self.almacen).incrementar(((self._clave_simple(etiquetas), valor),))
+
+    def decrementar(self, valor: float = 1.0, **etiquetas):
+        self.incrementar(-valor, **etiquetas)
+
+    def fijar(self, valor: float, **etiquetas):
+        self._registro.almacen(self.almacen).fijar(self._clave_simple(etiquetas), valor)
+
+    def recolectar(self) -> List[tuple]:
+        if self._funcion is None:
+            return []
+        try:
+            return [(self.nombre, [], float(self._funcion()))]
+        except Exception:
+            # Un fallo al calcular un medidor no debe dejar sin /metrics
+            return []
+
+
+class Histograma(_Metrica):
+    """
+    Distribución de valores en intervalos acumulados (_bucket), con _sum y
+    _count. Cada observación solo escribe su intervalo, la suma y la cuenta;
+    los intervalos se acumulan al exponer.
+    """
+
+    tipo = 'histogram'
+
+    def __init__(self, registro, nombre, ayuda, etiquetas, limites: Tuple[float, ...] = LIMITES_HTTP):
+        super().__init__(registro, nombre, ayuda, etiquetas)
+        if 'le' in self.etiquetas:
+            raise ValueError("La etiqueta 'le' está reservada para los histogramas")
+        self.limites = tuple(sorted(limites)) + (math.inf,)
+
+    def muestras(self) -> Tuple[str, ...]:
+        return (f'{self.nombre}_bucket', f'{self.nombre}_sum', f'{self.nombre}_count')
+
+    def observar(self, valor: float, **etiquetas):
+        valores = self._valores_etiquetas(etiquetas)
+        claves = self._claves.get(valores)
+        if claves is None:
+            intervalos = [self._clave(f'{self.nombre}_bucket', valores, (('le', _formatear(limite)),))
+                          for limite in self.limites]
+            claves = self._claves[valores] = (intervalos,
+                                              self._clave(f'{self.nombre}_sum', valores),
+                                              self._clave(f'{self.nombre}_count', valores))
+        intervalos, suma, cuenta = claves
+        self._registro.almacen(self.almacen).incrementar((
+            (intervalos[bisect_left(self.limites, valor)], 1.0), (suma, valor), (cuenta, 1.0)))
+
+    def ordenar(self, muestras: List[tuple]) -> List[tuple]:
+        """Intervalos acumulados y completos (con ceros) por combinación de etiquetas"""
+        por_etiquetas = defaultdict(dict)
+        for muestra, etiquetas, valor in muestras:
+            base = tuple(tuple(par) for par in etiquetas if par[0] != 'le')
+            le = next((par[1] for par in etiquetas if par[0] == 'le'), None)
+            por_etiquetas[base][(muestra, le)] = valor
+        ordenadas = []
+        for base in sorted(por_etiquetas):
+            valores = por_etiquetas[base]
+            acumulado = 0.0
+            for limite in self.limites:
+                le = _formatear(limite)
+                acumulado += valores.get((f'{self.nombre}_bucket', le), 0.0)
+                ordenadas.append((f'{self.nombre}_bucket', list(base) + [('le', le)], acumulado))
+            ordenadas.append((f'{self.nombre}_sum', list(base), valores.get((f'{self.nombre}_sum', None), 0.0)))
+            ordenadas.append((f'{self.nombre}_count', list(base), valores.get((f'{self.nombre}_count', None), 0.0)))
+        return ordenadas
+
+
+class RegistroMetricas:
+    """
+    Registro de las métricas de la aplicación y su exposición en /metrics.
+
+    Patrón: Registry
+    Principio SRP: Única responsabilidad de guardar y agregar valores; qué se
+    mide lo decide quien crea las métricas.
+    """
+
+    def __init__(self, directorio: Optional[str] = None):
+        """
+        Args:
+            directorio: Directorio compartido por los workers (None = solo este proceso)
+        """
+        self.directorio = directorio
+        self._metricas: List[_Metrica] = []
+        self._familias: Dict[str, _Metrica] = {}
+        self._almacenes: Dict[str, AlmacenMmap] = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        if metrica.nombre in {m.nombre for m in self._metricas}:
+            raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+        self._metricas.append(metrica)
+        for muestra in metrica.muestras():
+            self._familias[muestra] = metrica
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> Contador:
+        return self._registrar(Contador(self, nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (),
+                funcion: Optional[Callable[[], float]] = None) -> Medidor:
+        return self._registrar(Medidor(self, nombre, ayuda, etiquetas, funcion))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (),
+                   limites: Tuple[float, ...] = LIMITES_HTTP) -> Histograma:
+        return self._registrar(Histograma(self, nombre, ayuda, etiquetas, limites))
+
+    def almacen(self, tipo: str) -> AlmacenMmap:
+        """Almacén del proceso actual; tras un fork el hijo abre sus propios archivos"""
+        pid = os.getpid()
+        almacen = self._almacenes.get(tipo) if pid == self._pid else None
+        if almacen is None:
+            with self._lock:
+                if pid != self._pid:
+                    self._almacenes = {}
+                    self._pid = pid
+                almacen = self._almacenes.get(tipo)
+                if almacen is None:
+                    ruta = None
+                    if self.directorio:
+                        os.makedirs(self.directorio, exist_ok=True)
+                        ruta = os.path.join(self.directorio, f'{tipo}_{pid}.db')
+                    almacen = self._almacenes[tipo] = AlmacenMmap(ruta)
+        return almacen
+
+    def _sumar(self) -> Dict[str, float]:
+        """Valores de todos los procesos: acumulados siempre, medidores de procesos vivos"""
+        if not self.directorio:
+            return {clave: valor for tipo in ('acumulado', 'medidor')
+                    for clave, valor in self.almacen(tipo).valores().items()}
+        totales = defaultdict(float)
+        try:
+            archivos = os.listdir(self.directorio)
+        except FileNotFoundError:
+            archivos = []
+        for archivo in archivos:
+            coincidencia = _ARCHIVO.match(archivo)
+            if coincidencia is None:
+                continue
+            tipo, pid = coincidencia.group(1), int(coincidencia.group(2))
+            if tipo == 'medidor' and not _proceso_vivo(pid):
+                continue
+            try:
+                valores = AlmacenMmap.leer(os.path.join(self.directorio, archivo))
+            except OSError:
+                continue
+            for clave, valor in valores.items():
+                totales[clave] += valor
+        return totales
+
+    def exponer(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus"""
+        por_familia = defaultdict(list)
+        for clave, valor in self._sumar().items():
+            muestra, etiquetas = json.loads(clave)
+            metrica = self._familias.get(muestra)
+            if metrica is not None:
+                por_familia[metrica.nombre].append((muestra, [tuple(par) for par in etiquetas], valor))
+
+        lineas = []
+        for metrica in self._metricas:
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            for muestra, etiquetas, valor in metrica.ordenar(por_familia[metrica.nombre]) + metrica.recolectar():
+                texto = ','.join(f'{nombre}="{_escapar(valor_etiqueta)}"' for nombre, valor_etiqueta in etiquetas)
+                lineas.append(f"{muestra}{{{texto}}} {_formatear(valor)}" if texto
+                              else f"{muestra} {_formatear(valor)}")
+        return '\n'.join(lineas) + '\n'
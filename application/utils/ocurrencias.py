@@ -0,0 +1,139 @@
+"""
+Ocurrencias de Clases
+Expansión de los horarios semanales (HorarioClase) a sesiones concretas con
+fecha dentro de un periodo académico, descontando los días festivos.
+
+La expansión es perezosa: cada horario produce un generador de sesiones en
+orden cronológico y heapq.merge los combina sin materializar el periodo.
+"""
+
+import heapq
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+from application.models.materia import HorarioClase, Materia
+from application.utils.franjas import DIAS, a_minutos
+
+
+class PeriodoAcademico:
+    """Rango de fechas de un periodo lectivo y sus días festivos"""
+
+    def __init__(self, inicio: date, fin: date, festivos: Iterable[date] = ()):
+        if fin < inicio:
+            raise ValueError("La fecha de fin del periodo es anterior a la de inicio")
+        self._inicio = inicio
+        self._fin = fin
+        self._festivos: Set[date] = set(festivos)
+
+    @property
+    def inicio(self) -> date:
+        return self._inicio
+
+    @property
+    def fin(self) -> date:
+        return self._fin
+
+    @property
+    def festivos(self) -> Set[date]:
+        return self._festivos
+
+    @property
+    def clave(self) -> Tuple:
+        """Identifica el periodo para invalidar cachés derivadas"""
+        return self._inicio, self._fin, len(self._festivos)
+
+    @classmethod
+    def semestre_de(cls, dia: date, festivos: Iterable[date] = ()) -> 'PeriodoAcademico':
+        """Semestre natural que contiene la fecha (enero-junio o julio-diciembre)"""
+        if dia.month <= 6:
+            return cls(date(dia.year, 1, 1), date(dia.year, 6, 30), festivos)
+        return cls(date(dia.year, 7, 1), date(dia.year, 12, 31), festivos)
+
+    @staticmethod
+    def parsear_fechas(texto: Optional[str]) -> Set[date]:
+        """
+        Convierte 'AAAA-MM-DD,AAAA-MM-DD,...' en un conjunto de fechas.
+
+        Raises:
+            ValueError: Si alguna fecha no es válida
+        """
+        return {date.fromisoformat(parte.strip())
+                for parte in (texto or '').split(',') if parte.strip()}
+
+
+class SesionClase:
+    """Una sesión concreta (con fecha) de un horario semanal"""
+
+    __slots__ = ('horario_id', 'materia_id', 'materia', 'aula', 'inicio', 'fin')
+
+    def __init__(self, horario_id: int, materia_id: int, materia: str, aula: str,
+                 inicio: datetime, fin: datetime):
+        self.horario_id = horario_id
+        self.materia_id = materia_id
+        self.materia = materia
+        self.aula = aula
+        self.inicio = inicio
+        self.fin = fin
+
+    @property
+    def dia(self) -> str:
+        return DIAS[self.inicio.weekday()]
+
+    @property
+    def horario(self) -> str:
+        return f"{self.inicio:%H:%M} - {self.fin:%H:%M}"
+
+    def to_dict(self) -> Dict:
+        return {
+            'horario_id': self.horario_id,
+            'materia_id': self.materia_id,
+            'materia': self.materia,
+            'aula': self.aula,
+            'fecha': self.inicio.date().isoformat(),
+            'dia': self.dia,
+            'horario': self.horario,
+            'inicio': self.inicio.isoformat(timespec='minutes'),
+            'fin': self.fin.isoformat(timespec='minutes')
+        }
+
+
+def _a_hora(minutos: int) -> timedelta:
+    return timedelta(minutes=minutos)
+
+
+def primera_fecha(dia_semana: str, periodo: PeriodoAcademico) -> date:
+    """Primera fecha del periodo que cae en el día de la semana indicado"""
+    desfase = (DIAS.index(dia_semana) - periodo.inicio.weekday()) % 7
+    return periodo.inicio + timedelta(days=desfase)
+
+
+def expandir_horario(horario: HorarioClase, materia: Materia,
+                     periodo: PeriodoAcademico) -> Iterator[SesionClase]:
+    """
+    Genera las sesiones semanales de un horario dentro del periodo, en orden.
+    Los horarios con día u horas inválidos no generan sesiones.
+    """
+    if horario.dia_semana not in DIAS:
+        return
+    try:
+        inicio = _a_hora(a_minutos(horario.hora_inicio))
+        fin = _a_hora(a_minutos(horario.hora_fin))
+    except ValueError:
+        return
+    if fin <= inicio:
+        return
+
+    dia = primera_fecha(horario.dia_semana, periodo)
+    semana = timedelta(days=7)
+    while dia <= periodo.fin:
+        if dia not in periodo.festivos:
+            medianoche = datetime.combine(dia, datetime.min.time())
+            yield SesionClase(horario.id, materia.id, materia.nombre, materia.aula,
+                              medianoche + inicio, medianoche + fin)
+        dia += semana
+
+
+def expandir(horarios: Iterable[Tuple[HorarioClase, Materia]],
+             periodo: PeriodoAcademico) -> Iterator[SesionClase]:
+    """Combina las sesiones de varios horarios en un único flujo cronológico"""
+    return heapq.merge(*(expandir_horario(h, m, periodo) for h, m in horarios),
+                       key=lambda sesion: (sesion.inicio, sesion.materia))
@@ -0,0 +1,217 @@
+"""
+Perfilado de Peticiones
+Perfila una petición concreta con cProfile y, a la vez, con un muestreador
+de pilas, y guarda el resultado en el directorio de perfiles:
+
+    <nombre>.pstats  estadísticas de cProfile (python -m pstats, snakeviz)
+    <nombre>.folded  pilas colapsadas "a;b;c N", listas para flamegraph.pl
+                     o speedscope
+    <nombre>.json    datos de la petición y funciones con más tiempo propio,
+                     para listar los perfiles sin releer los .pstats
+
+Se perfila una petición cuando la pide un administrativo (?perfilar=1 o la
+cabecera X-Perfilar: 1) o por muestreo, una de cada N. Solo se conservan
+los perfiles más recientes.
+"""
+
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+CABECERA_PERFILAR = 'X-Perfilar'
+PARAMETRO_PERFILAR = 'perfilar'
+EXTENSIONES = ('.pstats', '.folded', '.json')
+
+_NOMBRE_VALIDO = re.compile(r'^[\w.-]+$')
+_NO_PERMITIDOS = re.compile(r'[^\w]+')
+
+
+def _etiqueta(archivo: str, linea: int, funcion: str) -> str:
+    """'funcion (archivo.py:linea)', igual en las pilas y en el resumen"""
+    if archivo == '~':
+        return funcion  # funciones de C: '<built-in method ...>'
+    return f"{funcion} ({os.path.basename(archivo)}:{linea})"
+
+
+class MuestreadorPilas(threading.Thread):
+    """
+    Muestrea cada `intervalo` segundos la pila de un hilo y cuenta cuántas
+    veces aparece cada pila completa (formato de pilas colapsadas).
+    """
+
+    def __init__(self, hilo_id: int, intervalo: float = 0.005):
+        super().__init__(daemon=True)
+        self._hilo_id = hilo_id
+        self._intervalo = intervalo
+        self._parar = threading.Event()
+        self.pilas: Counter = Counter()
+
+    def run(self):
+        while not self._parar.wait(self._intervalo):
+            frame = sys._current_frames().get(self._hilo_id)
+            pila = []
+            while frame is not None:
+                codigo = frame.f_code
+                pila.append(_etiqueta(codigo.co_filename, codigo.co_firstlineno, codigo.co_name))
+                frame = frame.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def detener(self) -> Counter:
+        self._parar.set()
+        self.join()
+        return self.pilas
+
+
+class Perfil:
+    """Perfilado en curso de una petición"""
+
+    def __init__(self, intervalo: float):
+        self.inicio = time.perf_counter()
+        self.perfilador = cProfile.Profile()
+        self.muestreador = MuestreadorPilas(threading.get_ident(), intervalo)
+        self.duracion_ms = 0.0
+        self.pilas: Counter = Counter()
+
+    def iniciar(self) -> bool:
+        try:
+            self.perfilador.enable()
+        except ValueError:
+            # Ya hay otro perfilador activo en el hilo
+            return False
+        self.muestreador.start()
+        return True
+
+    def detener(self):
+        self.perfilador.disable()
+        self.pilas = self.muestreador.detener()
+        self.duracion_ms = (time.perf_counter() - self.inicio) * 1000
+
+
+class PerfiladorPeticiones:
+    """
+    Decide qué peticiones perfilar y guarda y lista los perfiles.
+
+    Principio SRP: Única responsabilidad de perfilar y archivar perfiles; qué
+    usuario puede pedirlos lo decide quien lo usa.
+    """
+
+    def __init__(self, directorio: str, cada_n: int = 0, maximo: int = 50,
+                 intervalo: float = 0.005, top: int = 15):
+        """
+        Args:
+            directorio: Carpeta de los perfiles (se crea al guardar el primero)
+            cada_n: Perfila una de cada N peticiones (0 = solo las pedidas)
+            maximo: Perfiles que se conservan; los más antiguos se borran
+            intervalo: Segundos entre muestras de pila
+            top: Funciones que se guardan en el resumen de cada perfil
+        """
+        self.directorio = directorio
+        self.cada_n = cada_n
+        self.maximo = maximo
+        self.intervalo = intervalo
+        self.top = top
+        self._contador = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def debe_perfilar(self, solicitado: bool) -> bool:
+        """Perfila si se pidió o si a la petición le toca por muestreo"""
+        if solicitado:
+            return True
+        return self.cada_n > 0 and next(self._contador) % self.cada_n == 0
+
+    def iniciar(self) -> Optional[Perfil]:
+        """Empieza a perfilar el hilo actual (None si no se pudo)"""
+        perfil = Perfil(self.intervalo)
+        return perfil if perfil.iniciar() else None
+
+    def guardar(self, perfil: Perfil, metodo: str, ruta: str, endpoint: Optional[str],
+                estado: int) -> str:
+        """
+        Escribe los archivos del perfil (ya detenido) y poda los antiguos.
+
+        Returns:
+            Nombre del perfil
+        """
+        fecha = datetime.now()
+        nombre = f"{fecha:%Y%m%d-%H%M%S-%f}-{_NO_PERMITIDOS.sub('_', endpoint or 'sin_ruta')}"
+        os.makedirs(self.directorio, exist_ok=True)
+        base = os.path.join(self.directorio, nombre)
+
+        perfil.perfilador.dump_stats(base + '.pstats')
+        with open(base + '.folded', 'w', encoding='utf-8') as archivo:
+            for pila, muestras in perfil.pilas.most_common():
+                archivo.write(f"{pila} {muestras}\n")
+        resumen = {
+            'nombre': nombre,
+            'fecha': fecha.isoformat(sep=' ', timespec='seconds'),
+            'metodo': metodo,
+            'ruta': ruta,
+            'endpoint': endpoint,
+            'estado': estado,
+            'duracion_ms': round(perfil.duracion_ms, 2),
+            'muestras': sum(perfil.pilas.values()),
+            'funciones': self._funciones(perfil.perfilador),
+        }
+        with open(base + '.json', 'w', encoding='utf-8') as archivo:
+            json.dump(resumen, archivo, ensure_ascii=False)
+
+        self._podar()
+        return nombre
+
+    def _funciones(self, perfilador: cProfile.Profile) -> List[Dict]:
+        """Funciones con más tiempo propio"""
+        estadisticas = pstats.Stats(perfilador).stats
+        filas = sorted(estadisticas.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        return [{
+            'funcion': _etiqueta(*funcion),
+            'llamadas': llamadas,
+            'propio_ms': round(propio * 1000, 3),
+            'acumulado_ms': round(acumulado * 1000, 3),
+        } for funcion, (_, llamadas, propio, acumulado, _) in filas]
+
+    def _podar(self):
+        with self._lock:
+            nombres = sorted({os.path.splitext(archivo)[0] for archivo in self._archivos()}, reverse=True)
+            for nombre in nombres[self.maximo:]:
+                for extension in EXTENSIONES:
+                    try:
+                        os.remove(os.path.join(self.directorio, nombre + extension))
+                    except FileNotFoundError:
+                        pass
+
+    def _archivos(self) -> List[str]:
+        try:
+            return [archivo for archivo in os.listdir(self.directorio) if archivo.endswith(EXTENSIONES)]
+        except FileNotFoundError:
+            return []
+
+    def recientes(self, limite: int = 20) -> List[Dict]:
+        """Resúmenes de los perfiles más recientes, del más nuevo al más antiguo"""
+        nombres = sorted((archivo for archivo in self._archivos() if archivo.endswith('.json')),
+                         reverse=True)[:limite]
+        resumenes = []
+        for archivo in nombres:
+            try:
+                with open(os.path.join(self.directorio, archivo), encoding='utf-8') as entrada:
+                    resumenes.append(json.load(entrada))
+            except (OSError, ValueError):
+                continue
+        return resumenes
+
+    def archivo(self, nombre: str) -> Optional[str]:
+        """Nombre de archivo de un perfil si existe y es válido (evita rutas fuera del directorio)"""
+        if not _NOMBRE_VALIDO.match(nombre) or not nombre.endswith(EXTENSIONES):
+            return None
+        if not os.path.isfile(os.path.join(self.directorio, nombre)):
+            return None
+        return nombre
@@ -0,0 +1,140 @@
+"""
+Recursos Estáticos
+Compilación de los archivos de application/static para producción: CSS
+minificado, nombres con la huella del contenido, variantes precomprimidas
+(.gz y .br si el módulo brotli está instalado) y un manifiesto que traduce el
+nombre lógico ('css/styles.css') al publicado ('css/styles.3f9a0c1b2d.css').
+
+Como el nombre cambia con el contenido, los navegadores pueden guardar cada
+archivo un año sin volver a validarlo.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se genera .gz
+    brotli = None
+
+EXTENSIONES = ('.css', '.js')
+CARPETA_SALIDA = 'dist'
+NOMBRE_MANIFIESTO = 'manifest.json'
+LONGITUD_HUELLA = 10
+
+_COMENTARIOS_CSS = re.compile(r'/\*.*?\*/', re.DOTALL)
+_ESPACIOS = re.compile(r'\s+')
+_ESPACIOS_SIMBOLOS = re.compile(r'\s*([{};,>])\s*')
+_ESPACIO_DOS_PUNTOS = re.compile(r':\s+')
+
+
+def minificar_css(texto: str) -> str:
+    """
+    Elimina comentarios y espacios innecesarios. Los dos puntos solo pierden
+    el espacio posterior: antes de ellos puede ser un selector descendiente.
+    """
+    texto = _COMENTARIOS_CSS.sub('', texto)
+    texto = _ESPACIOS.sub(' ', texto)
+    texto = _ESPACIOS_SIMBOLOS.sub(r'\1', texto)
+    texto = _ESPACIO_DOS_PUNTOS.sub(':', texto)
+    return texto.replace(';}', '}').strip()
+
+
+def nombre_con_huella(nombre: str, contenido: bytes) -> str:
+    """'css/styles.css' -> 'css/styles.<sha256[:10]>.css'"""
+    base, extension = os.path.splitext(nombre)
+    huella = hashlib.sha256(contenido).hexdigest()[:LONGITUD_HUELLA]
+    return f'{base}.{huella}{extension}'
+
+
+def _escribir(ruta: str, contenido: bytes):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'wb') as archivo:
+        archivo.write(contenido)
+
+
+def construir_recursos(directorio_static: str) -> Dict[str, str]:
+    """
+    Genera static/dist con los recursos publicados y su manifiesto.
+
+    Los JS solo se firman y comprimen: minificarlos con seguridad requiere un
+    analizador que el proyecto no incluye.
+
+    Returns:
+        Manifiesto {nombre lógico: nombre publicado}
+    """
+    salida = os.path.join(directorio_static, CARPETA_SALIDA)
+    manifiesto = {}
+    for raiz, carpetas, archivos in os.walk(directorio_static):
+        if os.path.abspath(raiz).startswith(os.path.abspath(salida)):
+            continue
+        for archivo in sorted(archivos):
+            if not archivo.endswith(EXTENSIONES):
+                continue
+            ruta = os.path.join(raiz, archivo)
+            nombre = os.path.relpath(ruta, directorio_static).replace(os.sep, '/')
+            with open(ruta, 'rb') as origen:
+                contenido = origen.read()
+            if archivo.endswith('.css'):
+                contenido = minificar_css(contenido.decode('utf-8')).encode('utf-8')
+
+            publicado = nombre_con_huella(nombre, contenido)
+            destino = os.path.join(salida, publicado)
+            _escribir(destino, contenido)
+            # mtime=0: la misma entrada produce siempre el mismo .gz
+            _escribir(destino + '.gz', gzip.compress(contenido, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _escribir(destino + '.br', brotli.compress(contenido, quality=11))
+            manifiesto[nombre] = publicado
+
+    _escribir(os.path.join(salida, NOMBRE_MANIFIESTO),
+              json.dumps(manifiesto, indent=2, sort_keys=True).encode('utf-8'))
+    return manifiesto
+
+
+class ManifiestoRecursos:
+    """
+    Traduce nombres lógicos a los publicados en static/dist.
+
+    Sin manifiesto (entorno de desarrollo sin compilar) los recursos se sirven
+    desde static tal cual.
+
+    Principio SRP: Única responsabilidad de resolver nombres de recursos.
+    """
+
+    def __init__(self, directorio_static: str):
+        self.directorio = os.path.join(directorio_static, CARPETA_SALIDA)
+        self.recargar()
+
+    def recargar(self):
+        ruta = os.path.join(self.directorio, NOMBRE_MANIFIESTO)
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                self.nombres = json.load(archivo)
+        except (OSError, ValueError):
+            self.nombres = {}
+        self.publicados = set(self.nombres.values())
+
+    def resolver(self, nombre: str) -> Optional[str]:
+        """Nombre publicado, o None si el recurso no está compilado"""
+        return self.nombres.get(nombre)
+
+    def variante(self, publicado: str, aceptadas) -> tuple:
+        """
+        Elige el archivo a enviar según Accept-Encoding.
+
+        Args:
+            publicado: Nombre publicado (debe figurar en el manifiesto)
+            aceptadas: request.accept_encodings
+
+        Returns:
+            (nombre del archivo en dist, Content-Encoding o None)
+        """
+        for codificacion, sufijo in (('br', '.br'), ('gzip', '.gz')):
+            if aceptadas[codificacion] and os.path.exists(os.path.join(self.directorio, publicado + sufijo)):
+                return publicado + sufijo, codificacion
+        return publicado, None
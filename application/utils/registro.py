@@ -0,0 +1,215 @@
+"""
+Registro (logging) Asíncrono y Estructurado
+Los hilos de las peticiones solo ponen cada mensaje en una cola
+(QueueHandler); un hilo aparte (QueueListener) lo escribe en el archivo,
+como una línea JSON con rotación por tamaño, y en la consola en texto. Una
+escritura lenta en disco ya no retrasa la respuesta.
+
+Cada proceso escribe en su propio archivo (logs/app.<pid>.log): varios
+RotatingFileHandler sobre un mismo archivo se pisan al rotarlo. Un worker de
+gunicorn abre el suyo al arrancar (reiniciar_tras_fork).
+
+Dentro de una petición cada línea lleva el id de petición (y el de la traza
+si se está trazando), el usuario, la ruta y el método. Los mensajes de los
+loggers más ruidosos se pueden muestrear (p. ej. 'acceso=0.1' guarda uno de
+cada diez); los WARNING y superiores se guardan siempre.
+
+Uso:
+    registro = configurar_registro('logs/app.log', muestreo={'acceso': 0.1})
+    logging.getLogger('acceso').info('GET /docente/dashboard', extra={'duracion_ms': 12.3})
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Dict, List, Optional
+from flask import g, has_request_context, request, session
+
+FORMATO_CONSOLA = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos de contexto que se copian al JSON si el registro los tiene
+CAMPOS_CONTEXTO = ('id_peticion', 'id_traza', 'usuario_id', 'ruta', 'metodo', 'estado', 'duracion_ms')
+
+
+def ruta_proceso(ruta: str) -> str:
+    """logs/app.log -> logs/app.<pid>.log"""
+    base, extension = os.path.splitext(ruta)
+    return f'{base}.{os.getpid()}{extension}'
+
+
+def parsear_muestreo(texto: str) -> Dict[str, float]:
+    """'werkzeug=0.1,acceso=0.25' -> {'werkzeug': 0.1, 'acceso': 0.25}"""
+    muestreo = {}
+    for parte in (texto or '').split(','):
+        nombre, _, tasa = parte.partition('=')
+        if nombre.strip() and tasa.strip():
+            muestreo[nombre.strip()] = min(1.0, max(0.0, float(tasa)))
+    return muestreo
+
+
+class FiltroContexto(logging.Filter):
+    """Añade los datos de la petición en curso (se ejecuta en el hilo que registra)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.id_peticion = g.get('id_peticion')
+            record.id_traza = g.get('id_traza')
+            record.ruta = request.endpoint
+            record.metodo = request.method
+            if not hasattr(record, 'usuario_id') and 'usuario' in session:
+                record.usuario_id = session['usuario'].get('id')
+        return True
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar solo una fracción de los mensajes de algunos loggers"""
+
+    def __init__(self, tasas: Dict[str, float]):
+        super().__init__()
+        self._tasas = tasas
+
+    def _tasa(self, nombre: str) -> float:
+        # El logger más específico que tenga tasa ('a.b.c' -> 'a.b' -> 'a')
+        while nombre:
+            if nombre in self._tasas:
+                return self._tasas[nombre]
+            nombre = nombre.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self._tasas:
+            return True
+        tasa = self._tasa(record.name)
+        return tasa >= 1.0 or random.random() < tasa
+
+
+class FormatoJson(logging.Formatter):
+    """Una línea JSON por mensaje"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        linea = {
+            'fecha': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'pid': record.process,
+        }
+        for campo in CAMPOS_CONTEXTO:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                linea[campo] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            linea['excepcion'] = record.exc_text
+        return json.dumps(linea, ensure_ascii=False, default=str)
+
+
+class ManejadorCola(QueueHandler):
+    """
+    QueueHandler que deja el mensaje ya interpolado y la excepción como
+    texto, sin aplicar formato: cada manejador del listener usa el suyo.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RegistroAsincrono:
+    """
+    Cola, manejador y listener del registro de la aplicación.
+
+    Patrón: Producer-Consumer (los hilos de petición producen, el listener consume)
+    Principio SRP: Única responsabilidad de sacar la escritura de logs del
+    hilo de la petición.
+    """
+
+    def __init__(self, manejadores: List[logging.Handler], muestreo: Optional[Dict[str, float]] = None,
+                 abrir_archivo: Optional[Callable[[], Optional[logging.Handler]]] = None):
+        """
+        Args:
+            manejadores: Manejadores comunes a todos los procesos (consola)
+            muestreo: {logger: fracción de mensajes por debajo de WARNING que se guardan}
+            abrir_archivo: Crea el manejador de archivo del proceso actual
+                (None si no se puede escribir)
+        """
+        self._manejadores = manejadores
+        self._abrir_archivo = abrir_archivo
+        self._archivo = abrir_archivo() if abrir_archivo else None
+        self.manejador = ManejadorCola(queue.SimpleQueue())
+        self.manejador.addFilter(FiltroMuestreo(muestreo or {}))
+        self.manejador.addFilter(FiltroContexto())
+        self._listener = None
+        self.iniciar()
+
+    def iniciar(self):
+        manejadores = self._manejadores + ([self._archivo] if self._archivo else [])
+        self._listener = QueueListener(self.manejador.queue, *manejadores, respect_handler_level=True)
+        self._listener.start()
+
+    def reiniciar_tras_fork(self):
+        """
+        En un proceso hijo (workers de gunicorn con preload) el hilo del
+        listener no existe: cola y listener nuevos, y un archivo propio.
+        """
+        if self._abrir_archivo:
+            if self._archivo:
+                self._archivo.close()
+            self._archivo = self._abrir_archivo()
+        self.manejador.queue = queue.SimpleQueue()
+        self.iniciar()
+
+    def detener(self):
+        """Vacía la cola y detiene el listener"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def configurar_registro(ruta: Optional[str], nivel: str = 'INFO', max_bytes: int = 10 * 1024 * 1024,
+                        copias: int = 5, muestreo: Optional[Dict[str, float]] = None) -> RegistroAsincrono:
+    """
+    Sustituye los manejadores del logger raíz por la cola.
+
+    Args:
+        ruta: Archivo JSON; cada proceso usa el suyo (ruta_proceso). None o
+            sin permisos de escritura: solo consola
+        nivel: Nivel mínimo del logger raíz
+        max_bytes: Tamaño a partir del cual se rota el archivo
+        copias: Archivos rotados que se conservan (app.<pid>.log.1 ... .N)
+        muestreo: {logger: fracción de mensajes por debajo de WARNING que se guardan}
+    """
+    consola = logging.StreamHandler()
+    consola.setFormatter(logging.Formatter(FORMATO_CONSOLA))
+
+    def abrir_archivo() -> Optional[logging.Handler]:
+        try:
+            os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+            archivo = RotatingFileHandler(ruta_proceso(ruta), maxBytes=max_bytes, backupCount=copias,
+                                          encoding='utf-8')
+        except OSError:
+            return None
+        archivo.setFormatter(FormatoJson())
+        return archivo
+
+    registro = RegistroAsincrono([consola], muestreo, abrir_archivo if ruta else None)
+    raiz = logging.getLogger()
+    for manejador in list(raiz.handlers):
+        raiz.removeHandler(manejador)
+    raiz.addHandler(registro.manejador)
+    raiz.setLevel(nivel.upper())
+    os.register_at_fork(after_in_child=registro.reiniciar_tras_fork)
+    atexit.register(registro.detener)
+    return registro
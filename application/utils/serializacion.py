@@ -0,0 +1,109 @@
+"""
+Serialización JSON para la API
+Convierte diccionarios (to_dict() de los modelos) o filas de SQLite en JSON
+compacto, con selección de campos y paginación por cursor.
+
+La selección de campos se resuelve una vez por respuesta con itemgetter, y
+json.dumps escribe sin espacios ni escapes ASCII: los listados son más
+pequeños y se generan sin pasar por el proveedor JSON de Flask.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+
+class ErrorConsulta(ValueError):
+    """Parámetros de consulta inválidos (campos o cursor); se responde 400"""
+
+
+def _por_defecto(valor: Any):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f'{type(valor).__name__} no es serializable a JSON')
+
+
+def a_json(datos: Any) -> bytes:
+    """JSON compacto en UTF-8"""
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':'),
+                      default=_por_defecto).encode('utf-8')
+
+
+def parsear_campos(parametro: Optional[str], disponibles: Sequence[str]) -> List[str]:
+    """
+    Lista de campos pedida en ?fields=a,b (todos si no se indica).
+
+    Raises:
+        ErrorConsulta: Si se pide un campo que el recurso no tiene
+    """
+    if not parametro:
+        return list(disponibles)
+    campos = [c.strip() for c in parametro.split(',') if c.strip()]
+    desconocidos = [c for c in campos if c not in disponibles]
+    if desconocidos:
+        raise ErrorConsulta(f"Campos desconocidos: {', '.join(desconocidos)}")
+    return campos
+
+
+def proyectar(registros: Iterable[dict], campos: Sequence[str]) -> List[dict]:
+    """Reduce cada diccionario a los campos pedidos"""
+    if len(campos) == 1:
+        campo = campos[0]
+        return [{campo: registro[campo]} for registro in registros]
+    extraer = itemgetter(*campos)
+    return [dict(zip(campos, extraer(registro))) for registro in registros]
+
+
+def proyectar_filas(columnas: Sequence[str], filas: Iterable[tuple], campos: Sequence[str]) -> List[dict]:
+    """Convierte filas (tuplas) en diccionarios con los campos pedidos, sin diccionarios intermedios"""
+    indices = [columnas.index(campo) for campo in campos]
+    if len(indices) == 1:
+        indice, campo = indices[0], campos[0]
+        return [{campo: fila[indice]} for fila in filas]
+    extraer = itemgetter(*indices)
+    return [dict(zip(campos, extraer(fila))) for fila in filas]
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    return base64.urlsafe_b64encode(str(ultimo_id).encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Raises:
+        ErrorConsulta: Si el cursor no es uno emitido por la API
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(cursor + relleno).decode('ascii'))
+    except ValueError:
+        raise ErrorConsulta('Cursor inválido')
+
+
+def paginar(registros: Iterable, limite: int, id_de=itemgetter('id')) -> Tuple[list, Optional[str]]:
+    """
+    Paginación por cursor (keyset) sobre el id: cada página empieza después
+    del último id de la anterior, así que insertar o borrar registros no
+    desplaza ni repite elementos.
+
+    El keyset lo aplica la consulta (WHERE id > cursor ORDER BY id LIMIT
+    limite + 1, ver BaseRepository._keyset): aquí solo se corta la página y
+    el registro de más indica que hay otra.
+
+    Args:
+        registros: Diccionarios o filas con id mayor que el cursor, en orden
+            de id; como máximo limite + 1
+        limite: Tamaño máximo de página
+        id_de: Función que extrae el id de un registro
+
+    Returns:
+        (página, cursor de la siguiente página o None)
+    """
+    registros = list(registros)
+    pagina = registros[:limite]
+    siguiente = codificar_cursor(id_de(pagina[-1])) if len(registros) > limite else None
+    return pagina, siguiente
@@ -0,0 +1,310 @@
+"""
+Trazas de Peticiones
+Cada petición muestreada es una traza: un span raíz para la ruta (capa de
+controlador) y un span hijo por cada método público de servicio o
+repositorio que se llama durante la petición, anidados según las llamadas.
+
+Los repositorios se trazan solos (BaseRepository.__init_subclass__) y los
+servicios con el decorador de clase @trazar_clase('servicio'). Sin traza
+activa (muestreo 0 o petición no muestreada) cada método envuelto solo
+consulta una ContextVar antes de llamar al original.
+
+Al terminar la petición la traza se pasa a un hilo que la añade al archivo
+del proceso (logs/trazas.<pid>.jsonl, rotado por tamaño como los logs) como
+una línea JSON con la forma de OTLP/JSON (ExportTraceServiceRequest), la
+misma que escribe el file exporter del OpenTelemetry Collector:
+
+    {"resourceSpans": [{"resource": {...}, "scopeSpans": [{"scope": {...}, "spans": [...]}]}]}
+
+Una petición con cabecera W3C traceparent continúa la traza del llamante.
+Cualquier cliente puede enviarla, así que su indicador de muestreo solo
+fuerza la traza un número limitado de veces por segundo; el resto de
+peticiones se muestrea como las demás.
+"""
+
+import inspect
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+from application.utils.registro import ruta_proceso
+
+# Tipos de span y códigos de estado de OTLP
+SPAN_INTERNO = 1
+SPAN_SERVIDOR = 2
+ESTADO_SIN_DEFINIR = 0
+ESTADO_ERROR = 2
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_span_actual: ContextVar[Optional['Span']] = ContextVar('span_actual', default=None)
+
+
+class Span:
+    """Un tramo de trabajo con inicio y fin en nanosegundos Unix"""
+
+    __slots__ = ('traza', 'span_id', 'padre_id', 'nombre', 'tipo', 'inicio', 'fin',
+                 'atributos', 'estado', 'mensaje', 'marca')
+
+    def __init__(self, traza: 'Traza', nombre: str, padre_id: Optional[str], tipo: int,
+                 atributos: Dict):
+        self.traza = traza
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.padre_id = padre_id
+        self.nombre = nombre
+        self.tipo = tipo
+        self.atributos = atributos
+        self.estado = ESTADO_SIN_DEFINIR
+        self.mensaje = ''
+        self.inicio = time.time_ns()
+        self.fin = None
+        self.marca = None
+
+    def error(self, excepcion: BaseException):
+        self.estado = ESTADO_ERROR
+        self.mensaje = f'{type(excepcion).__name__}: {excepcion}'
+
+    def cerrar(self):
+        self.fin = time.time_ns()
+        self.traza.spans.append(self)
+
+
+class Traza:
+    """Spans terminados de una traza"""
+
+    __slots__ = ('trace_id', 'spans')
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or f'{random.getrandbits(128):032x}'
+        self.spans: List[Span] = []
+
+
+def _valor_otlp(valor) -> Dict:
+    if isinstance(valor, bool):
+        return {'boolValue': valor}
+    if isinstance(valor, int):
+        return {'intValue': str(valor)}
+    if isinstance(valor, float):
+        return {'doubleValue': valor}
+    return {'stringValue': str(valor)}
+
+
+def _atributos_otlp(atributos: Dict) -> List[Dict]:
+    return [{'key': clave, 'value': _valor_otlp(valor)} for clave, valor in atributos.items()]
+
+
+class ExportadorJsonl(threading.Thread):
+    """
+    Escribe en segundo plano una línea OTLP/JSON por traza terminada. Rota
+    el archivo como RotatingFileHandler: al superar max_bytes pasa a
+    ruta.1, ruta.1 a ruta.2 ... y se conservan `copias` archivos rotados.
+    """
+
+    def __init__(self, ruta: str, recurso: Dict, max_bytes: int = 10 * 1024 * 1024, copias: int = 5):
+        super().__init__(daemon=True)
+        self._ruta = ruta
+        self._recurso = {'attributes': _atributos_otlp(recurso)}
+        self._max_bytes = max_bytes
+        self._copias = copias
+        self.cola = queue.SimpleQueue()
+
+    def run(self):
+        os.makedirs(os.path.dirname(self._ruta) or '.', exist_ok=True)
+        tamano = os.path.getsize(self._ruta) if os.path.exists(self._ruta) else 0
+        while True:
+            traza = self.cola.get()
+            lineas = [self._linea(traza)]
+            # Lo que ya esté en la cola, en la misma escritura
+            while not self.cola.empty():
+                lineas.append(self._linea(self.cola.get()))
+            datos = ''.join(lineas).encode('utf-8')
+            if self._max_bytes > 0 and tamano > 0 and tamano + len(datos) > self._max_bytes:
+                self._rotar()
+                tamano = 0
+            with open(self._ruta, 'ab') as archivo:
+                archivo.write(datos)
+            tamano += len(datos)
+
+    def _rotar(self):
+        if self._copias <= 0:
+            os.remove(self._ruta)
+            return
+        for numero in range(self._copias - 1, 0, -1):
+            origen = f'{self._ruta}.{numero}'
+            if os.path.exists(origen):
+                os.replace(origen, f'{self._ruta}.{numero + 1}')
+        os.replace(self._ruta, f'{self._ruta}.1')
+
+    def _linea(self, traza: Traza) -> str:
+        spans = [{
+            'traceId': traza.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.padre_id or '',
+            'name': span.nombre,
+            'kind': span.tipo,
+            'startTimeUnixNano': str(span.inicio),
+            'endTimeUnixNano': str(span.fin),
+            'attributes': _atributos_otlp(span.atributos),
+            'status': {'code': span.estado, 'message': span.mensaje} if span.estado else {},
+        } for span in traza.spans]
+        documento = {'resourceSpans': [{
+            'resource': self._recurso,
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+        }]}
+        return json.dumps(documento, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class LimiteTasa:
+    """Cubeta de fichas: como mucho `por_segundo` permisos por segundo (ráfagas de hasta max(1, por_segundo))"""
+
+    def __init__(self, por_segundo: float):
+        self._tasa = por_segundo
+        self._capacidad = max(1.0, por_segundo)
+        self._fichas = self._capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        if self._tasa <= 0:
+            return False
+        with self._lock:
+            ahora = time.monotonic()
+            self._fichas = min(self._capacidad, self._fichas + (ahora - self._ultimo) * self._tasa)
+            self._ultimo = ahora
+            if self._fichas < 1:
+                return False
+            self._fichas -= 1
+            return True
+
+
+class Trazador:
+    """
+    Decide qué peticiones se trazan y exporta las trazas terminadas. Cada
+    aplicación tiene el suyo (ver ContenedorServicios.trazador).
+
+    Principio SRP: Única responsabilidad de abrir, cerrar y exportar trazas;
+    qué métodos se trazan lo deciden trazar_clase y BaseRepository.
+    """
+
+    def __init__(self, ruta: str, muestreo: float, servicio: str = 'universidad',
+                 forzadas_por_segundo: float = 1.0, max_bytes: int = 10 * 1024 * 1024, copias: int = 5):
+        """
+        Args:
+            ruta: Archivo JSON-lines de las trazas; cada proceso usa el suyo (ruta_proceso)
+            muestreo: Fracción de peticiones trazadas (0 = desactivado)
+            servicio: service.name del recurso OTLP
+            forzadas_por_segundo: Peticiones por segundo que un traceparent
+                muestreado puede hacer trazar además de las del muestreo
+            max_bytes: Tamaño a partir del cual se rota el archivo
+            copias: Archivos rotados que se conservan
+        """
+        self.muestreo = max(0.0, min(1.0, muestreo))
+        self._ruta = ruta
+        self._recurso = {'service.name': servicio}
+        self._forzadas = LimiteTasa(forzadas_por_segundo)
+        self._max_bytes = max_bytes
+        self._copias = copias
+        self._exportador = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _exportar(self, traza: Traza):
+        # Tras un fork (gunicorn --preload) el hilo exportador no existe en el hijo
+        if self._exportador is None or self._pid != os.getpid():
+            with self._lock:
+                if self._exportador is None or self._pid != os.getpid():
+                    exportador = ExportadorJsonl(ruta_proceso(self._ruta),
+                                                 dict(self._recurso, **{'process.pid': os.getpid()}),
+                                                 self._max_bytes, self._copias)
+                    exportador.start()
+                    self._exportador, self._pid = exportador, os.getpid()
+        self._exportador.cola.put(traza)
+
+    def iniciar_traza(self, nombre: str, atributos: Dict, traceparent: Optional[str] = None):
+        """
+        Abre el span raíz de una petición si se muestrea.
+
+        Returns:
+            Span raíz para terminar_traza, o None si la petición no se traza
+        """
+        if self.muestreo <= 0:
+            return None
+        padre = _TRACEPARENT.match(traceparent or '')
+        forzada = padre is not None and int(padre.group(3), 16) & 1 and self._forzadas.permitir()
+        if not forzada and random.random() >= self.muestreo:
+            return None
+        if padre is not None:
+            traza, padre_id = Traza(padre.group(1)), padre.group(2)
+        else:
+            traza, padre_id = Traza(), None
+        span = Span(traza, nombre, padre_id, SPAN_SERVIDOR, atributos)
+        span.marca = _span_actual.set(span)
+        return span
+
+    def terminar_traza(self, span: Span, atributos: Optional[Dict] = None,
+                       error: Optional[BaseException] = None):
+        """Cierra el span raíz y envía la traza al exportador"""
+        _span_actual.reset(span.marca)
+        if atributos:
+            span.atributos.update(atributos)
+        if error is not None:
+            span.error(error)
+        span.cerrar()
+        self._exportar(span.traza)
+
+
+def id_traza_actual() -> Optional[str]:
+    """trace_id de la traza en curso (None si la petición no se traza)"""
+    span = _span_actual.get()
+    return span.traza.trace_id if span is not None else None
+
+
+def _envolver(funcion, capa: str):
+    nombre_funcion = funcion.__name__
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        padre = _span_actual.get()
+        if padre is None:
+            return funcion(*args, **kwargs)
+        # El nombre con la clase real: los métodos heredados de BaseRepository
+        # aparecen como MateriaRepository.obtener_por_id
+        clase = type(args[0]).__name__ if args else ''
+        span = Span(padre.traza, f'{clase}.{nombre_funcion}', padre.span_id, SPAN_INTERNO,
+                    {'capa': capa, 'code.namespace': funcion.__module__, 'code.function': nombre_funcion})
+        marca = _span_actual.set(span)
+        try:
+            return funcion(*args, **kwargs)
+        except BaseException as e:
+            span.error(e)
+            raise
+        finally:
+            _span_actual.reset(marca)
+            span.cerrar()
+
+    envoltura.__trazado__ = True
+    return envoltura
+
+
+def trazar_clase(capa: str):
+    """
+    Decorador de clase: un span por llamada a cada método público definido
+    en la clase (no los privados, ni staticmethod/classmethod/property).
+
+    Uso:
+        @trazar_clase('servicio')
+        class DocenteService: ...
+    """
+    def decorador(cls):
+        for nombre, valor in list(vars(cls).items()):
+            if nombre.startswith('_') or not inspect.isfunction(valor) or getattr(valor, '__trazado__', False):
+                continue
+            setattr(cls, nombre, _envolver(valor, capa))
+        return cls
+    return decorador
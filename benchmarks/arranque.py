@@ -0,0 +1,130 @@
+"""
+Benchmark de arranque.
+
+Mide en procesos nuevos (como un worker recién lanzado) cuánto tarda cada
+fase del arranque:
+
+    importar         import main
+    crear            main.app (create_app: configuración, plantillas, rutas)
+    primera          primera respuesta (GET /login/docente, sin base de datos)
+    primera_datos    login y /docente/dashboard: conexión, repositorios y
+                     servicios se crean aquí, en su primer uso
+    proceso          el proceso completo visto desde fuera, intérprete incluido
+
+Con --importtime guarda la salida de `python -X importtime` al importar main
+y crear la aplicación (para adjuntarla como artefacto de CI) y resume los
+módulos que más tardan. Con --limite-ms sale con código 1 si la mediana hasta
+la primera respuesta (importar + crear + primera) supera el límite.
+
+Uso:
+    python benchmarks/arranque.py [--repeticiones 10] [--importtime arranque-importtime.txt]
+                                  [--limite-ms 1500]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import RAIZ, CREDENCIALES, preparar_base_datos  # noqa: E402
+
+FASES = ('importar', 'crear', 'primera', 'primera_datos')
+
+
+def medir_en_proceso():
+    """Se ejecuta en el proceso hijo: imprime los ms de cada fase en JSON"""
+    tiempos = {}
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    tiempos['importar'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    app = main.app
+    tiempos['crear'] = time.perf_counter() - inicio
+
+    cliente = app.test_client()
+    inicio = time.perf_counter()
+    estado = cliente.get('/login/docente').status_code
+    tiempos['primera'] = time.perf_counter() - inicio
+
+    email, password = CREDENCIALES['docente']
+    inicio = time.perf_counter()
+    cliente.post('/login', data={'email': email, 'password': password})
+    estado_datos = cliente.get('/docente/dashboard').status_code
+    tiempos['primera_datos'] = time.perf_counter() - inicio
+
+    if (estado, estado_datos) != (200, 200):
+        raise RuntimeError(f'Respuestas inesperadas: {estado}, {estado_datos}')
+    print(json.dumps({fase: segundos * 1000 for fase, segundos in tiempos.items()}))
+
+
+def medir(entorno: dict) -> dict:
+    inicio = time.perf_counter()
+    salida = subprocess.run([sys.executable, os.path.abspath(__file__), '--interno'],
+                            env=entorno, cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+    tiempos = json.loads(salida.strip().splitlines()[-1])
+    tiempos['proceso'] = (time.perf_counter() - inicio) * 1000
+    return tiempos
+
+
+def importtime(entorno: dict, ruta: str, top: int = 15):
+    """Guarda la salida de -X importtime y muestra los módulos con más tiempo acumulado"""
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main; main.app'],
+                               env=entorno, cwd=RAIZ, capture_output=True, text=True, check=True)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(resultado.stderr)
+
+    modulos = []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        propio, acumulado, nombre = (parte.strip() for parte in linea.split(':', 1)[1].split('|'))
+        modulos.append((int(acumulado), int(propio), nombre))
+
+    print(f"\n-X importtime guardado en {ruta}")
+    print(f"{'Módulo (acumulado)':<60}{'acumulado (ms)':>16}{'propio (ms)':>13}")
+    for acumulado, propio, nombre in sorted(modulos, reverse=True)[:top]:
+        print(f"{nombre:<60}{acumulado / 1000:>16.1f}{propio / 1000:>13.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--importtime', metavar='ARCHIVO', help='Guarda la salida de -X importtime')
+    parser.add_argument('--limite-ms', type=float, help='Máximo hasta la primera respuesta (mediana)')
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        medir_en_proceso()
+        return 0
+
+    preparar_base_datos()
+    entorno = dict(os.environ, LOG_NIVEL='WARNING')
+    mediciones = [medir(entorno) for _ in range(args.repeticiones)]
+
+    print(f"{'Fase':<20}{'mediana (ms)':>14}{'mín (ms)':>12}{'máx (ms)':>12}")
+    for fase in FASES + ('proceso',):
+        valores = [m[fase] for m in mediciones]
+        print(f"{fase:<20}{statistics.median(valores):>14.1f}{min(valores):>12.1f}{max(valores):>12.1f}")
+    hasta_primera = statistics.median(sum(m[f] for f in ('importar', 'crear', 'primera')) for m in mediciones)
+    print(f"\nHasta la primera respuesta (mediana): {hasta_primera:.1f} ms")
+
+    if args.importtime:
+        importtime(entorno, args.importtime)
+
+    if args.limite_ms is not None and hasta_primera > args.limite_ms:
+        print(f"Supera el límite de {args.limite_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
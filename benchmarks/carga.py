@@ -0,0 +1,242 @@
+"""
+Prueba de carga extremo a extremo.
+
+Lanza varios usuarios virtuales, cada uno con su propia sesión (cookies), que
+inician sesión y recorren las páginas de su rol con una mezcla ponderada:
+dashboard, calendario y asignaturas para docentes; dashboard, asignaciones,
+calendario y asignación de materias (POST) para administrativos. Al terminar
+muestra por ruta el número de peticiones, errores, latencias p50/p95/p99 y
+el throughput.
+
+Por defecto levanta la aplicación en un servidor WSGI local con hilos sobre
+una copia de la base de datos; con --url se prueba un servidor ya arrancado
+(p. ej. gunicorn). Para datos a escala, generar antes la base de datos:
+
+    python database/generar_datos.py --salida /tmp/carga.db --escala 0.1
+
+Uso:
+    python benchmarks/carga.py [--base-datos /tmp/carga.db] [--usuarios 16]
+                               [--duracion 30] [--url http://localhost:8000]
+                               [--json resultados.json]
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import http.cookiejar
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import RAIZ, CREDENCIALES, preparar_base_datos, cargar_aplicacion, resumir  # noqa: E402
+
+sys.path.insert(0, os.path.join(RAIZ, 'database'))
+from generar_datos import DOMINIO_CARGA, PASSWORD_CARGA  # noqa: E402
+
+# (peso, etiqueta, método, ruta); los POST llevan materia y docente al azar
+MEZCLA = {
+    'docente': [
+        (4, 'GET /docente/dashboard', 'GET', '/docente/dashboard'),
+        (3, 'GET /docente/calendario', 'GET', '/docente/calendario'),
+        (2, 'GET /docente/asignaturas', 'GET', '/docente/asignaturas'),
+        (1, 'GET /docente/notificaciones', 'GET', '/docente/notificaciones'),
+    ],
+    'administrativo': [
+        (3, 'GET /admin/dashboard', 'GET', '/admin/dashboard'),
+        (3, 'GET /admin/asignaciones', 'GET', '/admin/asignaciones'),
+        (2, 'GET /admin/calendario', 'GET', '/admin/calendario?dia=Lunes&inicio=08:00&fin=10:00'),
+        (1, 'POST /admin/asignar', 'POST', '/admin/asignar'),
+    ],
+}
+PROPORCION_ADMINISTRATIVOS = 0.2
+PAGINAS_POR_SESION = (5, 15)
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    """Las redirecciones se miden como respuesta propia (p. ej. el 302 del login)"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Resultados:
+    """Tiempos por ruta compartidos por los usuarios virtuales"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiempos = {}
+        self.errores = {}
+
+    def registrar(self, etiqueta: str, milisegundos: float, correcto: bool):
+        with self._lock:
+            self.tiempos.setdefault(etiqueta, []).append(milisegundos)
+            if not correcto:
+                self.errores[etiqueta] = self.errores.get(etiqueta, 0) + 1
+
+
+class UsuarioVirtual(threading.Thread):
+    """Un cliente con cookies propias que repite sesiones hasta la hora de fin"""
+
+    def __init__(self, base: str, cuentas: dict, limites: dict, resultados: Resultados,
+                 fin: float, semilla: int):
+        super().__init__(daemon=True)
+        self._base = base
+        self._cuentas = cuentas
+        self._limites = limites
+        self._resultados = resultados
+        self._fin = fin
+        self._rnd = random.Random(semilla)
+
+    def _peticion(self, opener, etiqueta: str, metodo: str, ruta: str, datos: dict = None):
+        cuerpo = urllib.parse.urlencode(datos).encode() if datos is not None else None
+        peticion = urllib.request.Request(self._base + ruta, data=cuerpo, method=metodo,
+                                          headers={'Accept-Encoding': 'gzip'})
+        inicio = time.perf_counter()
+        try:
+            with opener.open(peticion, timeout=30) as respuesta:
+                contenido = respuesta.read()
+                if respuesta.headers.get('Content-Encoding') == 'gzip':
+                    gzip.decompress(contenido)
+                codigo = respuesta.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            codigo = error.code
+        except (urllib.error.URLError, OSError):
+            codigo = 0
+        self._resultados.registrar(etiqueta, (time.perf_counter() - inicio) * 1000, 0 < codigo < 400)
+        return codigo
+
+    def _datos(self, metodo: str):
+        if metodo != 'POST':
+            return None
+        return {'materia_id': self._rnd.randint(1, self._limites['materias']),
+                'docente_id': self._rnd.randint(1, self._limites['docentes'])}
+
+    def run(self):
+        while time.perf_counter() < self._fin:
+            rol = 'administrativo' if self._rnd.random() < PROPORCION_ADMINISTRATIVOS else 'docente'
+            email, password = self._rnd.choice(self._cuentas[rol])
+            opener = urllib.request.build_opener(
+                urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SinRedirecciones)
+
+            if self._peticion(opener, 'POST /login', 'POST', '/login',
+                              {'email': email, 'password': password}) != 302:
+                continue
+            mezcla = MEZCLA[rol]
+            pesos = [peso for peso, *_ in mezcla]
+            for _ in range(self._rnd.randint(*PAGINAS_POR_SESION)):
+                if time.perf_counter() >= self._fin:
+                    break
+                _, etiqueta, metodo, ruta = self._rnd.choices(mezcla, weights=pesos)[0]
+                self._peticion(opener, etiqueta, metodo, ruta, self._datos(metodo))
+            self._peticion(opener, 'GET /logout', 'GET', '/logout')
+
+
+def cuentas_de_prueba(ruta_db: str, maximo: int = 1000) -> tuple:
+    """
+    Cuentas demo más los docentes sintéticos de generar_datos.py, si los hay,
+    y los ids máximos de materias y docentes para los POST.
+    """
+    docentes = [CREDENCIALES['docente']]
+    conn = sqlite3.connect(ruta_db)
+    try:
+        filas = conn.execute("SELECT email FROM docentes WHERE activo = 1 AND email LIKE ? LIMIT ?",
+                             (f'%@{DOMINIO_CARGA}', maximo)).fetchall()
+        limites = {
+            'materias': conn.execute("SELECT COALESCE(MAX(id), 1) FROM materias").fetchone()[0],
+            'docentes': conn.execute("SELECT COALESCE(MAX(id), 1) FROM docentes").fetchone()[0],
+        }
+    finally:
+        conn.close()
+    docentes += [(email, PASSWORD_CARGA) for email, in filas]
+    return {'docente': docentes, 'administrativo': [CREDENCIALES['administrativo']]}, limites
+
+
+def iniciar_servidor(ruta_db: str) -> str:
+    """Arranca la aplicación en un servidor WSGI con hilos y devuelve su URL base"""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    os.environ['DATABASE_PATH'] = ruta_db
+    aplicacion = cargar_aplicacion()
+    servidor = make_server('127.0.0.1', 0, aplicacion.app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{servidor.server_port}'
+
+
+def informe(resultados: Resultados, duracion: float) -> dict:
+    filas = {}
+    print(f"{'Ruta':<30}{'peticiones':>11}{'errores':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}{'req/s':>9}")
+    for etiqueta in sorted(resultados.tiempos):
+        tiempos = resultados.tiempos[etiqueta]
+        estadisticas = resumir(tiempos)
+        fila = dict(estadisticas, peticiones=len(tiempos), errores=resultados.errores.get(etiqueta, 0),
+                    rps=len(tiempos) / duracion)
+        filas[etiqueta] = fila
+        print(f"{etiqueta:<30}{fila['peticiones']:>11}{fila['errores']:>9}{fila['p50']:>9.1f}"
+              f"{fila['p95']:>9.1f}{fila['p99']:>9.1f}{fila['max']:>9.1f}{fila['rps']:>9.1f}")
+
+    todos = [t for tiempos in resultados.tiempos.values() for t in tiempos]
+    if todos:
+        total = dict(resumir(todos), peticiones=len(todos), errores=sum(resultados.errores.values()),
+                     rps=len(todos) / duracion)
+        filas['total'] = total
+        print(f"{'TOTAL':<30}{total['peticiones']:>11}{total['errores']:>9}{total['p50']:>9.1f}"
+              f"{total['p95']:>9.1f}{total['p99']:>9.1f}{total['max']:>9.1f}{total['rps']:>9.1f}")
+    print("\nLatencias en ms")
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-datos', help='Base de datos a usar (se prueba sobre una copia)')
+    parser.add_argument('--url', help='Servidor ya arrancado; por defecto se levanta uno local')
+    parser.add_argument('--usuarios', type=int, default=16, help='Usuarios virtuales concurrentes')
+    parser.add_argument('--duracion', type=float, default=30, help='Segundos de prueba')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--json', help='Guarda los resultados en este archivo')
+    args = parser.parse_args()
+
+    if args.base_datos:
+        ruta_db = os.path.join(tempfile.mkdtemp(prefix='carga-'), 'universidad.db')
+        shutil.copyfile(args.base_datos, ruta_db)
+    else:
+        ruta_db = preparar_base_datos()
+    cuentas, limites = cuentas_de_prueba(ruta_db)
+    base = args.url.rstrip('/') if args.url else iniciar_servidor(ruta_db)
+
+    print(f"{args.usuarios} usuarios durante {args.duracion:.0f} s contra {base} "
+          f"({len(cuentas['docente'])} cuentas de docente)\n")
+    resultados = Resultados()
+    inicio = time.perf_counter()
+    usuarios = [UsuarioVirtual(base, cuentas, limites, resultados, inicio + args.duracion, args.semilla + i)
+                for i in range(args.usuarios)]
+    # Sin la salida de consola de la aplicación mientras dura la prueba
+    with contextlib.redirect_stdout(io.StringIO()):
+        for usuario in usuarios:
+            usuario.start()
+        for usuario in usuarios:
+            usuario.join()
+    duracion = time.perf_counter() - inicio
+
+    filas = informe(resultados, duracion)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump({'usuarios': args.usuarios, 'duracion': duracion, 'rutas': filas},
+                      archivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
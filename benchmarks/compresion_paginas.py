@@ -0,0 +1,74 @@
+"""
+Benchmark de compresión de páginas.
+
+Para cada página mide los bytes de HTML y, por codificación y nivel, los bytes
+comprimidos, el ahorro y el tiempo de CPU de comprimir con los mismos
+compresores que usa el middleware. También mide la petición completa con y
+sin Accept-Encoding para ver el coste real por petición.
+
+Uso:
+    python benchmarks/compresion_paginas.py [--repeticiones 200]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import preparar_base_datos, cargar_aplicacion, iniciar_sesion, medir  # noqa: E402
+from render_paginas import PAGINAS  # noqa: E402
+
+from application.utils import compresion  # noqa: E402
+
+NIVELES = {'gzip': (1, 6, 9), 'br': (1, 4, 11)}
+
+
+def comprimir(html: bytes, codificacion: str, nivel: int) -> bytes:
+    compresor = compresion.crear_compresor(codificacion, nivel)
+    return compresor.comprimir(html) + compresor.finalizar()
+
+
+def medir_niveles(paginas: dict, repeticiones: int):
+    codificaciones = ['gzip'] + (['br'] if compresion.brotli is not None else [])
+    print(f"{'Codificación':<14}{'nivel':>6}{'bytes':>10}{'ahorro':>9}{'CPU total (ms)':>16}{'µs/KB':>8}")
+    originales = sum(len(html) for html in paginas.values())
+    for codificacion in codificaciones:
+        for nivel in NIVELES[codificacion]:
+            comprimidos, tiempo = 0, 0.0
+            for html in paginas.values():
+                comprimidos += len(comprimir(html, codificacion, nivel))
+                tiempo += medir(lambda: comprimir(html, codificacion, nivel), repeticiones)['p50']
+            ahorro = 100 * (originales - comprimidos) / originales
+            print(f"{codificacion:<14}{nivel:>6}{comprimidos:>10}{ahorro:>8.1f}%{tiempo:>16.3f}"
+                  f"{1000 * tiempo / (originales / 1024):>8.1f}")
+    print(f"{'sin comprimir':<14}{'':>6}{originales:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    preparar_base_datos()
+    aplicacion = cargar_aplicacion()
+    nivel = aplicacion.app.config['COMPRESION_NIVEL_GZIP']
+
+    paginas = {}
+    print(f"{'Página':<28}{'bytes':>8}{'gzip':>8}{'sin gzip (ms)':>15}{'con gzip (ms)':>15}")
+    for rol, urls in PAGINAS.items():
+        cliente = aplicacion.app.test_client()
+        iniciar_sesion(cliente, rol)
+        for url in urls:
+            html = cliente.get(url).data
+            paginas[url] = html
+            comprimido = cliente.get(url, headers={'Accept-Encoding': 'gzip'}).data
+            plano = medir(lambda: cliente.get(url), args.repeticiones)
+            con_gzip = medir(lambda: cliente.get(url, headers={'Accept-Encoding': 'gzip'}), args.repeticiones)
+            print(f"{url:<28}{len(html):>8}{len(comprimido):>8}{plano['p50']:>15.3f}{con_gzip['p50']:>15.3f}")
+
+    print(f"\nNivel configurado del middleware: gzip {nivel}\n")
+    medir_niveles(paginas, args.repeticiones)
+
+
+if __name__ == '__main__':
+    main()
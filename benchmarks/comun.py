@@ -0,0 +1,90 @@
+"""
+Utilidades compartidas por los scripts de benchmarks.
+
+Los benchmarks trabajan sobre una copia temporal de la base de datos para no
+modificar database/universidad.db.
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+CREDENCIALES = {
+    'docente': ('docente@demo.com', 'docente123'),
+    'administrativo': ('administrativo@demo.com', 'admin123'),
+}
+
+
+def _cargar_script(nombre: str):
+    ruta = os.path.join(RAIZ, 'database', f'{nombre}.py')
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def preparar_base_datos() -> str:
+    """
+    Copia la base de datos del proyecto a un directorio temporal y apunta
+    DATABASE_PATH a la copia. Si no existe, restaura la plantilla con los
+    datos demo (database/plantilla.py).
+    """
+    destino = os.path.join(tempfile.mkdtemp(prefix='bench-'), 'universidad.db')
+    original = os.path.join(RAIZ, 'database', 'universidad.db')
+    if os.path.exists(original):
+        shutil.copyfile(original, destino)
+    else:
+        _cargar_script('plantilla').restaurar(destino)
+    os.environ['DATABASE_PATH'] = destino
+    return destino
+
+
+def cargar_aplicacion():
+    """Importa main con la salida de arranque silenciada y el log solo con avisos"""
+    os.environ.setdefault('LOG_NIVEL', 'WARNING')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    return main
+
+
+def iniciar_sesion(cliente, rol: str):
+    email, password = CREDENCIALES[rol]
+    with contextlib.redirect_stdout(io.StringIO()):
+        respuesta = cliente.post('/login', data={'email': email, 'password': password})
+    if respuesta.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión como {rol}')
+
+
+def resumir(tiempos: list) -> dict:
+    """Media, percentiles 50/95/99 y máximo de una lista de tiempos (ms)"""
+    tiempos = sorted(tiempos)
+
+    def percentil(p):
+        return tiempos[min(len(tiempos) - 1, int(len(tiempos) * p))]
+
+    return {
+        'media': statistics.fmean(tiempos),
+        'p50': percentil(0.50),
+        'p95': percentil(0.95),
+        'p99': percentil(0.99),
+        'max': tiempos[-1],
+    }
+
+
+def medir(funcion, repeticiones: int) -> dict:
+    """Ejecuta la función varias veces y devuelve estadísticas en milisegundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return resumir(tiempos)
@@ -0,0 +1,127 @@
+"""
+Comprobación de ETag entre procesos.
+
+Arranca dos gunicorn de un worker cada uno (A y B) sobre la misma copia de
+la base de datos, como dos workers de WEB_CONCURRENCY=2 pero eligiendo a
+cuál va cada petición:
+
+    1. A sirve /docente/preferencias con su ETag.
+    2. B responde 304 a ese mismo ETag: el ETag no depende del proceso.
+    3. B crea una preferencia.
+    4. A ya no responde 304 a ese ETag y la página incluye la preferencia
+       nueva: la escritura de B invalidó lo que A tenía en memoria.
+
+Termina con código 1 si alguno de los pasos falla.
+
+Uso:
+    python benchmarks/etag_workers.py
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import RAIZ, CREDENCIALES, preparar_base_datos  # noqa: E402
+from memoria_workers import esperar, puerto_libre  # noqa: E402
+
+PAGINA = '/docente/preferencias'
+FRANJA = 'Sábado|20:00 - 22:00'
+
+
+class SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+abridor = urllib.request.build_opener(SinRedirecciones)
+
+
+def peticion(base: str, ruta: str, cookie: str = '', datos: dict = None, etag: str = None):
+    """(estado, cabeceras, cuerpo) sin seguir redirecciones"""
+    cabeceras = {'Cookie': cookie} if cookie else {}
+    if etag:
+        cabeceras['If-None-Match'] = etag
+    cuerpo = urllib.parse.urlencode(datos, doseq=True).encode() if datos is not None else None
+    try:
+        with abridor.open(urllib.request.Request(base + ruta, data=cuerpo, headers=cabeceras)) as respuesta:
+            return respuesta.status, respuesta.headers, respuesta.read().decode('utf-8')
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read().decode('utf-8', 'replace')
+
+
+def cookie_de(cabeceras) -> str:
+    return '; '.join(valor.split(';', 1)[0] for valor in cabeceras.get_all('Set-Cookie') or [])
+
+
+def arrancar(puerto: int) -> subprocess.Popen:
+    entorno = dict(os.environ, PORT=str(puerto), WEB_CONCURRENCY='1', LOG_NIVEL='WARNING')
+    return subprocess.Popen([sys.executable, '-m', 'gunicorn', 'main:app', '--config', 'gunicorn.conf.py'],
+                            cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def comprobar(a: str, b: str) -> list:
+    """Los pasos del docstring; devuelve los que fallan"""
+    email, password = CREDENCIALES['docente']
+    _, cabeceras, _ = peticion(a, '/login', datos={'email': email, 'password': password})
+    cookie = cookie_de(cabeceras)
+    # Consume el flash del login: con mensajes pendientes nunca hay 304
+    _, cabeceras, _ = peticion(a, PAGINA, cookie)
+    cookie = cookie_de(cabeceras) or cookie
+
+    estado, cabeceras, cuerpo = peticion(a, PAGINA, cookie)
+    etag = cabeceras.get('ETag')
+    fallos = []
+    if estado != 200 or not etag:
+        return [f'A: {PAGINA} respondió {estado} sin ETag']
+    if FRANJA.split('|')[1] in cuerpo:
+        return [f'la base de datos ya tiene la franja {FRANJA}']
+
+    estado, _, _ = peticion(b, PAGINA, cookie, etag=etag)
+    if estado != 304:
+        fallos.append(f'B respondió {estado} al ETag de A (se esperaba 304)')
+
+    # La cookie de la respuesta (con el flash) no se guarda
+    estado, _, _ = peticion(b, '/docente/preferencias/crear', cookie,
+                            datos={'materia_id': '1', 'franja': [FRANJA]})
+    if estado != 302:
+        fallos.append(f'B: crear preferencia respondió {estado}')
+
+    estado, cabeceras, cuerpo = peticion(a, PAGINA, cookie, etag=etag)
+    if estado != 200:
+        fallos.append(f'A respondió {estado} tras la escritura en B (se esperaba 200)')
+    elif FRANJA.split('|')[1] not in cuerpo:
+        fallos.append('A no muestra la preferencia creada en B')
+    elif cabeceras.get('ETag') == etag:
+        fallos.append('A devolvió el mismo ETag tras la escritura en B')
+    return fallos
+
+
+def main() -> int:
+    preparar_base_datos()
+    puertos = [puerto_libre(), puerto_libre()]
+    procesos = [arrancar(puerto) for puerto in puertos]
+    try:
+        a, b = (f'http://127.0.0.1:{puerto}' for puerto in puertos)
+        for base in (a, b):
+            esperar(f'{base}/login/docente')
+        fallos = comprobar(a, b)
+    finally:
+        for proceso in procesos:
+            proceso.send_signal(signal.SIGTERM)
+            proceso.wait(timeout=30)
+
+    for fallo in fallos:
+        print(f'[ERROR] {fallo}')
+    if fallos:
+        return 1
+    print('[OK] ETag compartido entre procesos e invalidado por la escritura del otro')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark de memoria por worker.
+
+Arranca gunicorn con gunicorn.conf.py, con y sin preload, reparte peticiones
+a las páginas de los dos roles entre los workers y lee /proc/<pid>/smaps_rollup
+de cada worker:
+
+    RSS    memoria residente (cuenta también las páginas compartidas)
+    PSS    RSS con cada página compartida dividida entre quienes la comparten
+    USS    memoria única del worker (Private_Clean + Private_Dirty): lo que
+           se libera si el worker termina y lo que cuesta cada worker más
+
+Solo Linux (necesita /proc/<pid>/smaps_rollup).
+
+Uso:
+    python benchmarks/memoria_workers.py [--workers 4] [--peticiones 200]
+"""
+
+import argparse
+import http.cookiejar
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import RAIZ, CREDENCIALES, preparar_base_datos  # noqa: E402
+from render_paginas import PAGINAS  # noqa: E402
+
+CAMPOS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def leer_memoria(pid: int) -> dict:
+    """kB de smaps_rollup; USS = Private_Clean + Private_Dirty"""
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup', encoding='ascii') as archivo:
+        for linea in archivo:
+            campo, _, resto = linea.partition(':')
+            if campo in CAMPOS:
+                valores[campo] = int(resto.split()[0])
+    valores['Uss'] = valores['Private_Clean'] + valores['Private_Dirty']
+    return valores
+
+
+def hijos(pid: int) -> list:
+    with open(f'/proc/{pid}/task/{pid}/children', encoding='ascii') as archivo:
+        return [int(hijo) for hijo in archivo.read().split()]
+
+
+def esperar(url: str, limite: float = 30.0):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'gunicorn no respondió en {url}')
+
+
+def generar_trafico(base: str, peticiones: int):
+    """Cada rol con su sesión; las conexiones nuevas se reparten entre workers"""
+    for rol, urls in PAGINAS.items():
+        abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        email, password = CREDENCIALES[rol]
+        datos = urllib.parse.urlencode({'email': email, 'password': password}).encode()
+        abridor.open(f'{base}/login', data=datos).read()
+        for i in range(peticiones):
+            abridor.open(base + urls[i % len(urls)]).read()
+        abridor.open(f'{base}/api/autocompletar/materias?q=c').read()
+
+
+def medir(workers: int, peticiones: int, preload: bool) -> dict:
+    puerto = puerto_libre()
+    entorno = dict(os.environ, PORT=str(puerto), WEB_CONCURRENCY=str(workers),
+                   GUNICORN_PRELOAD='1' if preload else '0', LOG_NIVEL='WARNING')
+    proceso = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'main:app', '--config', 'gunicorn.conf.py'],
+                               cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{puerto}'
+        esperar(f'{base}/login/docente')
+        generar_trafico(base, peticiones)
+        return {pid: leer_memoria(pid) for pid in hijos(proceso.pid)}
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=30)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por rol')
+    args = parser.parse_args()
+
+    preparar_base_datos()
+    totales = {}
+    for preload in (True, False):
+        modo = 'con preload' if preload else 'sin preload'
+        memoria = medir(args.workers, args.peticiones, preload)
+        print(f"\n{modo} ({len(memoria)} workers)")
+        print(f"{'pid':>8}{'RSS (MB)':>12}{'PSS (MB)':>12}{'USS (MB)':>12}")
+        for pid, valores in sorted(memoria.items()):
+            print(f"{pid:>8}{valores['Rss'] / 1024:>12.1f}{valores['Pss'] / 1024:>12.1f}"
+                  f"{valores['Uss'] / 1024:>12.1f}")
+        totales[modo] = {campo: sum(v[campo] for v in memoria.values()) / 1024 for campo in ('Rss', 'Pss', 'Uss')}
+
+    print(f"\n{'Total workers':<16}{'RSS (MB)':>12}{'PSS (MB)':>12}{'USS (MB)':>12}")
+    for modo, total in totales.items():
+        print(f"{modo:<16}{total['Rss']:>12.1f}{total['Pss']:>12.1f}{total['Uss']:>12.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
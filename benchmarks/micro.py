@@ -0,0 +1,240 @@
+"""
+Micro-benchmarks de repositorios y servicios con umbrales de regresión.
+
+Mide cada método de lectura de los repositorios y los métodos de servicio que
+usan las páginas (resumen del dashboard, horario semanal, listado de
+docentes...) sobre bases de datos sintéticas de varios tamaños, generadas con
+database/generar_datos.py y reutilizadas entre ejecuciones. Los métodos que
+escriben no se miden para que todos los casos vean los mismos datos.
+
+Los resultados (p50 y p95 en ms por escala y caso) se guardan en JSON y
+sirven de línea base: comparar falla (código de salida 1) si el p50 de algún
+caso empeora más que la tolerancia respecto a la base.
+
+Uso:
+    python benchmarks/micro.py ejecutar [--escalas 0.001,0.01,0.05] [--filtro docente]
+                                        [--salida benchmarks/baselines/micro.json]
+                                        [--comparar benchmarks/baselines/micro.json]
+    python benchmarks/micro.py comparar BASE.json ACTUAL.json [--tolerancia 25]
+
+Las líneas base dependen de la máquina: regenerarlas con --salida en la
+misma máquina en la que se vayan a comparar.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import RAIZ, CREDENCIALES, resumir  # noqa: E402
+
+sys.path.insert(0, os.path.join(RAIZ, 'database'))
+from generar_datos import VOLUMEN, generar_datos  # noqa: E402
+
+from application.patterns.singleton import DatabaseConnection  # noqa: E402
+from application.models.preferencia import EstadoPreferencia  # noqa: E402
+from application.repositories.usuario_repository import UsuarioRepository  # noqa: E402
+from application.repositories.materia_repository import MateriaRepository, HorarioRepository  # noqa: E402
+from application.repositories.preferencia_repository import PreferenciaRepository  # noqa: E402
+from application.repositories.notificacion_repository import NotificacionRepository  # noqa: E402
+from application.repositories.busqueda_repository import BusquedaRepository  # noqa: E402
+from application.repositories.versiones import VersionRegistry  # noqa: E402
+from application.services.docente_service import DocenteService  # noqa: E402
+from application.services.administrativo_service import AdministrativoService  # noqa: E402
+
+ESCALAS = (0.001, 0.01, 0.05)
+SEMILLA = 42
+TIEMPO_POR_CASO = 0.25           # segundos de medición por caso y escala
+REPETICIONES = (5, 500)          # mínimo y máximo de repeticiones
+TOLERANCIA = 25.0                # % de empeoramiento del p50 permitido
+MINIMO_MS = 0.05                 # diferencias menores se consideran ruido
+
+DOCENTE_ID = 1                   # cuenta demo: docente@demo.com
+MATERIA_ID = 1
+
+
+class Contexto:
+    """Repositorios y servicios conectados a la base de datos de una escala"""
+
+    def __init__(self, ruta_db: str):
+        DatabaseConnection.reset_instance()
+        db = DatabaseConnection()
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.connect(ruta_db)
+        VersionRegistry.asegurar_esquema(db)
+        versiones = VersionRegistry(db)
+        self.usuario_repo = UsuarioRepository(db, versiones)
+        self.materia_repo = MateriaRepository(db, versiones)
+        self.horario_repo = HorarioRepository(db, versiones)
+        self.preferencia_repo = PreferenciaRepository(db, versiones)
+        self.notificacion_repo = NotificacionRepository(db, versiones)
+        self.busqueda_repo = BusquedaRepository(db)
+        self.busqueda_repo.asegurar_esquema()
+        self.docente_service = DocenteService(self.usuario_repo, self.materia_repo, self.preferencia_repo,
+                                              self.horario_repo, self.notificacion_repo)
+        self.administrativo_service = AdministrativoService(self.usuario_repo, self.materia_repo,
+                                                            self.preferencia_repo, self.notificacion_repo,
+                                                            self.horario_repo)
+
+
+# (nombre, función que recibe el contexto y devuelve la llamada a medir)
+CASOS = [
+    ('UsuarioRepository.obtener_por_id', lambda c: lambda: c.usuario_repo.obtener_por_id(DOCENTE_ID, 'docente')),
+    ('UsuarioRepository.obtener_por_email', lambda c: lambda: c.usuario_repo.obtener_por_email(CREDENCIALES['docente'][0])),
+    ('UsuarioRepository.verificar_credenciales', lambda c: lambda: c.usuario_repo.verificar_credenciales(*CREDENCIALES['docente'])),
+    ('UsuarioRepository.obtener_docentes', lambda c: c.usuario_repo.obtener_docentes),
+    ('UsuarioRepository.obtener_todos', lambda c: c.usuario_repo.obtener_todos),
+    ('MateriaRepository.obtener_por_id', lambda c: lambda: c.materia_repo.obtener_por_id(MATERIA_ID)),
+    ('MateriaRepository.obtener_por_docente', lambda c: lambda: c.materia_repo.obtener_por_docente(DOCENTE_ID)),
+    ('MateriaRepository.obtener_sin_asignar', lambda c: c.materia_repo.obtener_sin_asignar),
+    ('MateriaRepository.obtener_aulas', lambda c: c.materia_repo.obtener_aulas),
+    ('MateriaRepository.obtener_todos', lambda c: c.materia_repo.obtener_todos),
+    ('HorarioRepository.obtener_por_materia', lambda c: lambda: c.horario_repo.obtener_por_materia(MATERIA_ID)),
+    ('HorarioRepository.obtener_por_dia', lambda c: lambda: c.horario_repo.obtener_por_dia('Lunes')),
+    ('HorarioRepository.obtener_por_docente', lambda c: lambda: c.horario_repo.obtener_por_docente(DOCENTE_ID)),
+    ('HorarioRepository.obtener_ocupacion', lambda c: c.horario_repo.obtener_ocupacion),
+    ('PreferenciaRepository.obtener_por_docente', lambda c: lambda: c.preferencia_repo.obtener_por_docente(DOCENTE_ID)),
+    ('PreferenciaRepository.obtener_por_estado', lambda c: lambda: c.preferencia_repo.obtener_por_estado(EstadoPreferencia.PENDIENTE)),
+    ('PreferenciaRepository.obtener_con_detalle', lambda c: lambda: c.preferencia_repo.obtener_con_detalle([EstadoPreferencia.PENDIENTE, EstadoPreferencia.APROBADA])),
+    ('NotificacionRepository.obtener_por_usuario', lambda c: lambda: c.notificacion_repo.obtener_por_usuario(DOCENTE_ID)),
+    ('NotificacionRepository.obtener_no_leidas', lambda c: lambda: c.notificacion_repo.obtener_no_leidas(DOCENTE_ID)),
+    ('BusquedaRepository.buscar_docentes', lambda c: lambda: c.busqueda_repo.buscar_docentes(c.busqueda_repo.construir_consulta('garc'))),
+    ('BusquedaRepository.buscar_materias', lambda c: lambda: c.busqueda_repo.buscar_materias(c.busqueda_repo.construir_consulta('calc'))),
+    ('BusquedaRepository.buscar_notificaciones', lambda c: lambda: c.busqueda_repo.buscar_notificaciones(c.busqueda_repo.construir_consulta('horario'), DOCENTE_ID)),
+    ('DocenteService.obtener_resumen_dashboard', lambda c: lambda: c.docente_service.obtener_resumen_dashboard(DOCENTE_ID)),
+    ('DocenteService.obtener_horario_semanal', lambda c: lambda: c.docente_service.obtener_horario_semanal(DOCENTE_ID)),
+    ('DocenteService.obtener_preferencias', lambda c: lambda: c.docente_service.obtener_preferencias(DOCENTE_ID)),
+    ('DocenteService.obtener_notificaciones', lambda c: lambda: c.docente_service.obtener_notificaciones(DOCENTE_ID)),
+    ('AdministrativoService.obtener_resumen_dashboard', lambda c: c.administrativo_service.obtener_resumen_dashboard),
+    ('AdministrativoService.obtener_docentes', lambda c: c.administrativo_service.obtener_docentes),
+    ('AdministrativoService.obtener_materias_sin_asignar', lambda c: c.administrativo_service.obtener_materias_sin_asignar),
+    ('AdministrativoService.obtener_preferencias_pendientes', lambda c: c.administrativo_service.obtener_preferencias_pendientes),
+]
+
+
+def base_datos_escala(escala: float) -> str:
+    """Base de datos sintética de la escala indicada (se genera la primera vez)"""
+    ruta = os.path.join(tempfile.gettempdir(), f'micro-bench-{escala:g}-{SEMILLA}.db')
+    if not os.path.exists(ruta):
+        volumen = {tabla: max(1, int(cantidad * escala)) for tabla, cantidad in VOLUMEN.items()}
+        with contextlib.redirect_stdout(io.StringIO()):
+            generar_datos(ruta, semilla=SEMILLA, **volumen)
+    return ruta
+
+
+def medir_caso(llamada) -> dict:
+    """Repite la llamada durante TIEMPO_POR_CASO (entre REPETICIONES) tras un calentamiento"""
+    llamada()
+    tiempos = []
+    limite = time.perf_counter() + TIEMPO_POR_CASO
+    while len(tiempos) < REPETICIONES[0] or (time.perf_counter() < limite and len(tiempos) < REPETICIONES[1]):
+        inicio = time.perf_counter()
+        llamada()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    estadisticas = resumir(tiempos)
+    return {'p50': estadisticas['p50'], 'p95': estadisticas['p95'], 'n': len(tiempos)}
+
+
+def ejecutar(escalas, filtro: str = '') -> dict:
+    casos = [(nombre, crear) for nombre, crear in CASOS if filtro.lower() in nombre.lower()]
+    resultados = {}
+    for escala in escalas:
+        contexto = Contexto(base_datos_escala(escala))
+        clave = f'{escala:g}'
+        resultados[clave] = {}
+        print(f"\nEscala {clave} ({int(VOLUMEN['docentes'] * escala)} docentes, "
+              f"{int(VOLUMEN['materias'] * escala)} materias)")
+        for nombre, crear in casos:
+            with contextlib.redirect_stdout(io.StringIO()):
+                medicion = medir_caso(crear(contexto))
+            resultados[clave][nombre] = medicion
+            print(f"  {nombre:<55}{medicion['p50']:>10.3f}{medicion['p95']:>10.3f}  (n={medicion['n']})")
+    DatabaseConnection.reset_instance()
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {'python': platform.python_version(), 'plataforma': platform.platform(),
+                    'procesador': platform.processor() or platform.machine()},
+        'resultados': resultados,
+    }
+
+
+def comparar(base: dict, actual: dict, tolerancia: float) -> list:
+    """
+    Casos cuyo p50 empeora más de la tolerancia (y de MINIMO_MS) respecto a la base.
+
+    Returns:
+        Lista de (escala, caso, p50 base, p50 actual, % de cambio)
+    """
+    regresiones = []
+    print(f"\n{'Escala':<8}{'Caso':<55}{'base':>10}{'actual':>10}{'cambio':>9}")
+    for escala, casos in actual['resultados'].items():
+        for nombre, medicion in casos.items():
+            anterior = base['resultados'].get(escala, {}).get(nombre)
+            if anterior is None:
+                continue
+            cambio = 100 * (medicion['p50'] - anterior['p50']) / anterior['p50'] if anterior['p50'] else 0.0
+            regresion = cambio > tolerancia and medicion['p50'] - anterior['p50'] > MINIMO_MS
+            marca = '  REGRESIÓN' if regresion else ''
+            print(f"{escala:<8}{nombre:<55}{anterior['p50']:>10.3f}{medicion['p50']:>10.3f}{cambio:>8.1f}%{marca}")
+            if regresion:
+                regresiones.append((escala, nombre, anterior['p50'], medicion['p50'], cambio))
+    return regresiones
+
+
+def _leer(ruta: str) -> dict:
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def _informar(regresiones: list, tolerancia: float) -> int:
+    if regresiones:
+        print(f"\n{len(regresiones)} caso(s) empeoran más de un {tolerancia:g}%")
+        return 1
+    print(f"\nSin regresiones por encima del {tolerancia:g}%")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p_ejecutar = comandos.add_parser('ejecutar', help='Mide todos los casos')
+    p_ejecutar.add_argument('--escalas', default=','.join(f'{e:g}' for e in ESCALAS),
+                            help='Escalas separadas por comas (1.0 = 10k docentes)')
+    p_ejecutar.add_argument('--filtro', default='', help='Solo los casos cuyo nombre contiene el texto')
+    p_ejecutar.add_argument('--salida', help='Guarda los resultados (nueva línea base)')
+    p_ejecutar.add_argument('--comparar', help='Línea base con la que comparar al terminar')
+    p_ejecutar.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+
+    p_comparar = comandos.add_parser('comparar', help='Compara dos archivos de resultados')
+    p_comparar.add_argument('base')
+    p_comparar.add_argument('actual')
+    p_comparar.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+
+    args = parser.parse_args()
+
+    if args.comando == 'comparar':
+        return _informar(comparar(_leer(args.base), _leer(args.actual), args.tolerancia), args.tolerancia)
+
+    escalas = [float(e) for e in args.escalas.split(',') if e.strip()]
+    print(f"{'':<57}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    actual = ejecutar(escalas, args.filtro)
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(actual, archivo, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.salida}")
+    if args.comparar:
+        return _informar(comparar(_leer(args.comparar), actual, args.tolerancia), args.tolerancia)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
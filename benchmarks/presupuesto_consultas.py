@@ -0,0 +1,216 @@
+"""
+Verificación del presupuesto de consultas SQL por ruta.
+
+Recorre las páginas y APIs de cada rol con 10 y con 1.000 entidades por tabla,
+y al final de cada rol las rutas de escritura por lotes (rejilla de
+preferencias, revisión en bloque, POST /api/v1/lote), y comprueba que ninguna ruta ejecuta más sentencias SQL que las declaradas
+con @presupuesto_sql junto a la ruta (ver application/utils/consultas_sql.py).
+En el conjunto grande la cuenta demo tiene la mitad de las materias,
+preferencias y notificaciones, así que un bucle por materia o por
+notificación supera el presupuesto aunque con 10 entidades pase.
+
+Cada volumen se mide en un proceso nuevo, con VERIFICAR_PRESUPUESTO_SQL=1,
+leyendo la cabecera X-Consultas-SQL de la primera petición a cada URL (sin
+cachés calientes). Sale con código 1 si alguna ruta supera su presupuesto o
+no lo declara.
+
+Uso:
+    python benchmarks/presupuesto_consultas.py [--entidades 10,1000]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import RAIZ, CREDENCIALES, cargar_aplicacion  # noqa: E402
+
+sys.path.insert(0, os.path.join(RAIZ, 'database'))
+from generar_datos import generar_datos  # noqa: E402
+from plantilla import migrar  # noqa: E402
+
+DOCENTE_ID = 1  # cuenta demo: docente@demo.com
+
+URLS = {
+    'docente': [
+        '/docente/dashboard',
+        '/docente/perfil',
+        '/docente/calendario',
+        '/docente/asignaturas',
+        '/docente/preferencias',
+        '/docente/notificaciones',
+        '/api/docente/sesiones?desde=2024-09-02&hasta=2024-09-30',
+        '/api/v1/docentes/1',
+        '/api/v1/materias?docente_id=1',
+        '/api/v1/horarios',
+        '/api/v1/preferencias',
+        '/api/v1/notificaciones',
+    ],
+    'administrativo': [
+        '/admin/dashboard',
+        '/admin/perfil',
+        '/admin/docentes',
+        '/admin/asignaciones',
+        '/admin/preferencias',
+        '/admin/calendario',
+        '/admin/calendario?dia=Lunes&inicio=08:00&fin=10:00',
+        '/admin/buscar?q=calculo',
+        '/admin/perfiles',
+        '/api/disponibilidad?dia=Lunes&inicio=08:00&fin=10:00',
+        '/api/admin/demanda',
+        '/api/autocompletar/materias?q=calc',
+        '/api/autocompletar/docentes?q=gar',
+        '/api/buscar?q=calculo',
+        '/api/v1/docentes',
+        '/api/v1/materias',
+        '/api/v1/horarios',
+        '/api/v1/preferencias',
+    ],
+}
+
+
+# Escrituras por lotes, después de las lecturas del rol: (etiqueta, url,
+# función que recibe los ids de preferencias pendientes y devuelve los datos).
+# Las URL /api/ reciben JSON y el resto un formulario.
+POSTS = {
+    'docente': [
+        ('3 franjas', '/docente/preferencias/crear', lambda pendientes: {
+            'materia_id': '2',
+            'franja': ['Sábado|06:00 - 08:00', 'Sábado|18:00 - 20:00', 'Sábado|20:00 - 22:00'],
+        }),
+    ],
+    'administrativo': [
+        ('aprobar', '/admin/preferencias/revisar', lambda pendientes: {
+            'accion': 'aprobar', 'preferencia_id': [str(id) for id in pendientes[:-1:2][:10]],
+        }),
+        ('rechazar', '/admin/preferencias/revisar', lambda pendientes: {
+            'accion': 'rechazar', 'preferencia_id': [str(id) for id in pendientes[1:-1:2][:10]],
+        }),
+        ('5 operaciones', '/api/v1/lote', lambda pendientes: {'operaciones': [
+            {'op': 'asignar', 'materia_id': 1, 'docente_id': 2},
+            {'op': 'asignar', 'materia_id': 3, 'docente_id': 2},
+            {'op': 'desasignar', 'materia_id': 4},
+            {'op': 'rechazar', 'preferencia_id': pendientes[-1]},
+            {'op': 'crear_horario', 'materia_id': 5, 'dia_semana': 'Sábado',
+             'hora_inicio': '21:00', 'hora_fin': '22:00'},
+        ]}),
+    ],
+}
+
+
+def preparar_volumen(entidades: int) -> str:
+    """
+    Base de datos con N filas por tabla; la cuenta demo se queda la mitad de
+    ellas. Se lleva a VERSION_ESQUEMA en este proceso (plantilla.migrar), como
+    una restaurada de la plantilla: la aplicación no reconstruye los índices
+    FTS al arrancar y su primera búsqueda empieza en frío, igual que la de
+    cada worker en un despliegue.
+    """
+    ruta = os.path.join(tempfile.mkdtemp(prefix='presupuesto-'), 'universidad.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        generar_datos(ruta, docentes=entidades, materias=entidades, horarios=3 * entidades,
+                      preferencias=entidades, notificaciones=entidades)
+    conn = sqlite3.connect(ruta)
+    with conn:
+        conn.execute("UPDATE materias SET docente_id = ? WHERE id % 2 = 0", (DOCENTE_ID,))
+        conn.execute("UPDATE preferencias SET docente_id = ? WHERE id % 2 = 0", (DOCENTE_ID,))
+        conn.execute("UPDATE notificaciones SET usuario_id = ? WHERE id % 2 = 0", (DOCENTE_ID,))
+    conn.close()
+    migrar(ruta)
+    return ruta
+
+
+def _pendientes() -> list:
+    conn = sqlite3.connect(os.environ['DATABASE_PATH'])
+    try:
+        return [fila[0] for fila in conn.execute(
+            "SELECT id FROM preferencias WHERE estado = 'Pendiente' ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def medir_en_proceso():
+    """Se ejecuta en el proceso hijo: imprime {'rol url': [estado, consultas, presupuesto, endpoint]}"""
+    aplicacion = cargar_aplicacion()
+    app = aplicacion.app
+    pendientes = _pendientes()
+    mediciones = {}
+    for rol, urls in URLS.items():
+        cliente = app.test_client()
+        email, password = CREDENCIALES[rol]
+        with contextlib.redirect_stdout(io.StringIO()):
+            respuesta = cliente.post('/login', data={'email': email, 'password': password})
+        mediciones[f'{rol} POST /login'] = _medicion(app, 'POST', '/login', respuesta)
+        for url in urls:
+            with contextlib.redirect_stdout(io.StringIO()):
+                respuesta = cliente.get(url)
+            mediciones[f'{rol} {url}'] = _medicion(app, 'GET', url, respuesta)
+        for etiqueta, url, datos in POSTS.get(rol, []):
+            cuerpo = datos(pendientes)
+            with contextlib.redirect_stdout(io.StringIO()):
+                if url.startswith('/api/'):
+                    respuesta = cliente.post(url, json=cuerpo)
+                else:
+                    respuesta = cliente.post(url, data=cuerpo)
+            mediciones[f'{rol} POST {url} ({etiqueta})'] = _medicion(app, 'POST', url, respuesta)
+    print(json.dumps(mediciones))
+
+
+def _medicion(app, metodo: str, url: str, respuesta) -> list:
+    endpoint = app.url_map.bind('localhost').match(url.split('?')[0], method=metodo)[0]
+    presupuesto = respuesta.headers.get('X-Presupuesto-SQL')
+    return [respuesta.status_code, int(respuesta.headers.get('X-Consultas-SQL', -1)),
+            int(presupuesto) if presupuesto is not None else None, endpoint]
+
+
+def medir(entidades: int) -> dict:
+    entorno = dict(os.environ, DATABASE_PATH=preparar_volumen(entidades), VERIFICAR_PRESUPUESTO_SQL='1')
+    salida = subprocess.run([sys.executable, os.path.abspath(__file__), '--interno'],
+                            env=entorno, cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entidades', default='10,1000', help='Volúmenes separados por comas')
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        medir_en_proceso()
+        return 0
+
+    volumenes = [int(n) for n in args.entidades.split(',')]
+    resultados = {n: medir(n) for n in volumenes}
+
+    fallos = 0
+    print(f"{'Rol y URL':<72}{'presupuesto':>12}" + ''.join(f"{f'{n} ent.':>10}" for n in volumenes))
+    for clave in resultados[volumenes[0]]:
+        estado, _, presupuesto, endpoint = resultados[volumenes[0]][clave]
+        cuentas = [resultados[n][clave][1] for n in volumenes]
+        problemas = []
+        if presupuesto is None:
+            problemas.append(f'{endpoint} sin @presupuesto_sql')
+        elif max(cuentas) > presupuesto:
+            problemas.append('supera el presupuesto')
+        if any(resultados[n][clave][0] >= 400 for n in volumenes):
+            problemas.append(f'HTTP {estado}')
+        fallos += bool(problemas)
+        print(f"{clave:<72}{presupuesto if presupuesto is not None else '-':>12}"
+              + ''.join(f'{c:>10}' for c in cuentas) + (f"   {'; '.join(problemas)}" if problemas else ''))
+
+    if fallos:
+        print(f"\n{fallos} ruta(s) con problemas")
+        return 1
+    print("\nTodas las rutas dentro de su presupuesto")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
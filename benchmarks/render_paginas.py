@@ -0,0 +1,179 @@
+"""
+Benchmark de renderizado de páginas.
+
+Mide por página el tiempo de una petición GET completa con y sin la caché de
+fragmentos, el tiempo de renderizado de la plantilla por sí sola (entre las
+señales before_render_template y template_rendered de Flask), los bytes de
+HTML, y el tiempo de carga de cada plantilla en frío con y sin la caché de
+bytecode (lo que paga un worker nuevo de gunicorn).
+
+Con --usuarios N se repite cada página como N usuarios distintos del mismo
+rol (solo cambian id y nombre en la sesión), en orden circular, y se muestra
+el tiempo de renderizado y la proporción de aciertos de la caché de
+fragmentos: lo que ve la caché cuando hay más usuarios que entradas en el LRU.
+
+Con --salida se guardan los bytes y el tiempo por página en JSON; con
+--comparar se muestra la variación respecto a un resultado anterior.
+
+Uso:
+    python benchmarks/render_paginas.py [--repeticiones 200] [--usuarios 600] [--salida r.json] [--comparar base.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from flask import before_render_template, template_rendered
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from comun import preparar_base_datos, cargar_aplicacion, iniciar_sesion, medir  # noqa: E402
+
+PAGINAS = {
+    'docente': [
+        '/docente/dashboard', '/docente/perfil', '/docente/calendario',
+        '/docente/asignaturas', '/docente/preferencias', '/docente/notificaciones',
+    ],
+    'administrativo': [
+        '/admin/dashboard', '/admin/perfil', '/admin/docentes', '/admin/asignaciones',
+        '/admin/calendario', '/admin/buscar?q=calculo',
+    ],
+}
+
+
+class CronometroPlantillas:
+    """Acumula el tiempo de renderizado de plantillas usando las señales de Flask"""
+
+    def __init__(self, app):
+        self.tiempos = []
+        self._inicio = None
+        before_render_template.connect(self._antes, app)
+        template_rendered.connect(self._despues, app)
+
+    def _antes(self, sender, **extra):
+        self._inicio = time.perf_counter()
+
+    def _despues(self, sender, **extra):
+        self.tiempos.append((time.perf_counter() - self._inicio) * 1000)
+
+    def mediana(self) -> float:
+        tiempos = sorted(self.tiempos)
+        self.tiempos = []
+        return tiempos[len(tiempos) // 2] if tiempos else 0.0
+
+
+def medir_paginas(main, repeticiones: int) -> dict:
+    entorno = main.app.jinja_env
+    cache = entorno.cache_fragmentos
+    cronometro = CronometroPlantillas(main.app)
+    resultados = {}
+    print(f"{'Página':<28}{'sin caché (ms)':>16}{'con caché (ms)':>16}{'render (ms)':>13}{'bytes':>10}")
+    for rol, urls in PAGINAS.items():
+        cliente = main.app.test_client()
+        iniciar_sesion(cliente, rol)
+        for url in urls:
+            tamano = len(cliente.get(url).data)
+            entorno.cache_fragmentos = None
+            sin_cache = medir(lambda: cliente.get(url), repeticiones)
+            entorno.cache_fragmentos = cache
+            cliente.get(url)
+            cronometro.mediana()
+            con_cache = medir(lambda: cliente.get(url), repeticiones)
+            render = cronometro.mediana()
+            resultados[url] = {'bytes': tamano, 'ms_sin_cache': sin_cache['p50'],
+                               'ms_con_cache': con_cache['p50'], 'ms_render': render}
+            print(f"{url:<28}{sin_cache['p50']:>16.3f}{con_cache['p50']:>16.3f}{render:>13.3f}{tamano:>10}")
+    return resultados
+
+
+def medir_usuarios(main, usuarios: int, repeticiones: int):
+    entorno = main.app.jinja_env
+    cronometro = CronometroPlantillas(main.app)
+    aciertos = []
+    entorno.cache_fragmentos_observador = aciertos.append
+    print(f"\n{usuarios} usuarios por rol, en orden circular")
+    print(f"{'Página':<28}{'render (ms)':>13}{'aciertos':>10}")
+    for rol, urls in PAGINAS.items():
+        cliente = main.app.test_client()
+        iniciar_sesion(cliente, rol)
+        with cliente.session_transaction() as sesion:
+            usuario = sesion['usuario']
+        for url in urls:
+            aciertos.clear()
+            cronometro.mediana()
+            for i in range(max(repeticiones, 2 * usuarios)):
+                numero = 100000 + i % usuarios
+                with cliente.session_transaction() as sesion:
+                    sesion['usuario'] = dict(usuario, id=numero, nombre_completo=f'Usuario {numero} Prueba')
+                cliente.get(url)
+            acierto = 100 * sum(aciertos) / len(aciertos) if aciertos else 0.0
+            print(f"{url:<28}{cronometro.mediana():>13.3f}{acierto:>9.0f}%")
+    entorno.cache_fragmentos_observador = None
+
+
+def comparar(resultados: dict, ruta_base: str):
+    with open(ruta_base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    campos = [c for c in ('bytes', 'ms_con_cache', 'ms_render')
+              if all(c in fila for fila in base.values())]
+    print(f"\n{'Página':<28}" + ''.join(f'{c:>14}' for c in campos))
+    totales = {campo: [0, 0] for campo in campos}
+    for url, actual in resultados.items():
+        anterior = base.get(url)
+        if not anterior:
+            continue
+        fila = ''
+        for campo in campos:
+            totales[campo][0] += anterior[campo]
+            totales[campo][1] += actual[campo]
+            fila += f'{100 * (actual[campo] - anterior[campo]) / anterior[campo]:>+13.1f}%'
+        print(f'{url:<28}{fila}')
+    for campo, (antes, despues) in totales.items():
+        if antes:
+            print(f"Total {campo}: {antes:.1f} -> {despues:.1f} ({100 * (despues - antes) / antes:+.1f}%)")
+
+
+def medir_compilacion(main, repeticiones: int):
+    entorno = main.app.jinja_env
+    bytecode = entorno.bytecode_cache
+    plantillas = [n for n in entorno.list_templates() if n.endswith('.html')]
+
+    def cargar_todas():
+        entorno.cache.clear()
+        for nombre in plantillas:
+            entorno.get_template(nombre)
+
+    entorno.bytecode_cache = None
+    sin_bytecode = medir(cargar_todas, repeticiones)
+    entorno.bytecode_cache = bytecode
+    cargar_todas()
+    con_bytecode = medir(cargar_todas, repeticiones)
+    print(f"\nCarga en frío de {len(plantillas)} plantillas: "
+          f"{sin_bytecode['p50']:.2f} ms compilando, {con_bytecode['p50']:.2f} ms desde bytecode")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticiones', type=int, default=200)
+    parser.add_argument('--usuarios', type=int, default=0,
+                        help='Medir además con N usuarios distintos por rol')
+    parser.add_argument('--salida', help='Guardar resultados por página en JSON')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior')
+    args = parser.parse_args()
+
+    preparar_base_datos()
+    aplicacion = cargar_aplicacion()
+    resultados = medir_paginas(aplicacion, args.repeticiones)
+    medir_compilacion(aplicacion, max(5, args.repeticiones // 20))
+    if args.usuarios:
+        medir_usuarios(aplicacion, args.usuarios, args.repeticiones)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2)
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
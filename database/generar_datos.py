@@ -0,0 +1,230 @@
+"""
+Generador de datos sintéticos para pruebas de carga.
+Crea una base de datos con el esquema de init_db.py y un volumen configurable
+de docentes, materias, horarios, preferencias y notificaciones.
+
+Las filas se generan con un Random con semilla (el resultado es reproducible)
+y se insertan con executemany en una sola transacción, con el diario y la
+sincronización desactivados mientras dura la carga: un millón de
+notificaciones se insertan en segundos en lugar de en horas.
+
+Se conservan las cuentas demo (docente@demo.com / docente123 y
+administrativo@demo.com / admin123); el resto de docentes son
+docente<N>@carga.demo.edu.co con la contraseña PASSWORD_CARGA.
+
+Uso:
+    python database/generar_datos.py --salida /tmp/carga.db
+    python database/generar_datos.py --salida /tmp/carga.db --escala 0.1
+    python database/generar_datos.py --salida /tmp/carga.db --docentes 500 --notificaciones 20000
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from init_db import crear_base_datos  # noqa: E402
+
+# Volumen por defecto (escala 1.0)
+VOLUMEN = {
+    'docentes': 10_000,
+    'materias': 50_000,
+    'horarios': 200_000,
+    'preferencias': 100_000,
+    'notificaciones': 1_000_000,
+}
+
+DOMINIO_CARGA = 'carga.demo.edu.co'
+PASSWORD_CARGA = 'docente123'
+LOTE = 20_000
+
+NOMBRES = ['Ana', 'Carlos', 'Diana', 'Eduardo', 'Fernanda', 'Gabriel', 'Helena', 'Ignacio',
+           'Julia', 'Luis', 'María', 'Nicolás', 'Olga', 'Pablo', 'Rosa', 'Sergio', 'Tatiana',
+           'Valentina', 'Andrés', 'Camila']
+APELLIDOS = ['García', 'Rodríguez', 'Martínez', 'López', 'González', 'Pérez', 'Sánchez',
+             'Ramírez', 'Torres', 'Flores', 'Rivera', 'Gómez', 'Díaz', 'Cruz', 'Morales',
+             'Ortiz', 'Castro', 'Rojas', 'Vargas', 'Herrera']
+TITULOS = ['', 'Dr. ', 'Dra. ', 'Mtro. ', 'Mtra. ', 'Ing. ']
+DEPARTAMENTOS = {
+    'Matemáticas': ('MAT', ['Cálculo', 'Álgebra', 'Estadística', 'Geometría', 'Probabilidad']),
+    'Física': ('FIS', ['Mecánica', 'Electromagnetismo', 'Óptica', 'Termodinámica']),
+    'Sistemas': ('SIS', ['Programación', 'Bases de Datos', 'Redes', 'Algoritmos', 'Compiladores']),
+    'Química': ('QUI', ['Química General', 'Química Orgánica', 'Bioquímica']),
+    'Humanidades': ('HUM', ['Ética', 'Filosofía', 'Redacción', 'Historia']),
+}
+NIVELES = ['I', 'II', 'III', 'Avanzado', 'Aplicado']
+EDIFICIOS = 'ABCDEF'
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+RANGOS_PREFERENCIA = ['08:00 - 12:00', '14:00 - 18:00', '18:00 - 22:00']
+ESTADOS_PREFERENCIA = ['Pendiente'] * 5 + ['Aprobada'] * 3 + ['Rechazada'] * 2
+NOTIFICACIONES = [
+    ('Nueva Asignación', 'Se te ha asignado la materia {materia}', 'success'),
+    ('Asignación Removida', 'Ya no tienes asignada la materia {materia}', 'warning'),
+    ('Cambio de Horario', 'El horario de {materia} ha sido modificado', 'info'),
+    ('Preferencia Aprobada', 'Tu preferencia para {materia} ha sido aprobada', 'success'),
+    ('Preferencia Rechazada', 'Tu preferencia para {materia} ha sido rechazada', 'warning'),
+]
+
+
+def hash_password(password: str) -> str:
+    """Genera hash SHA-256 de contraseña (mismo esquema que UsuarioRepository)"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def email_docente(numero: int) -> str:
+    """Email del docente sintético número N (1 es la cuenta demo)"""
+    return 'docente@demo.com' if numero == 1 else f'docente{numero}@{DOMINIO_CARGA}'
+
+
+def _insertar(conn, sentencia: str, filas) -> int:
+    """executemany en bloques de LOTE filas para no materializar todo en memoria"""
+    total, bloque = 0, []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == LOTE:
+            conn.executemany(sentencia, bloque)
+            total += len(bloque)
+            bloque = []
+    if bloque:
+        conn.executemany(sentencia, bloque)
+        total += len(bloque)
+    return total
+
+
+def _docentes(rnd: random.Random, cantidad: int):
+    password = hash_password(PASSWORD_CARGA)
+    departamentos = list(DEPARTAMENTOS)
+    for numero in range(1, cantidad + 1):
+        nombre = f"{rnd.choice(TITULOS)}{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+        departamento = rnd.choice(departamentos)
+        especialidad = rnd.choice(DEPARTAMENTOS[departamento][1])
+        yield (nombre, email_docente(numero), password,
+               f'+52 555 {rnd.randrange(100, 1000)} {rnd.randrange(1000, 10000)}',
+               f'Edificio {rnd.choice(EDIFICIOS)} - Oficina {rnd.randrange(1, 40):02d}',
+               departamento, especialidad,
+               f'Docente de {departamento} especializado en {especialidad}.',
+               0 if rnd.random() < 0.03 else 1)
+
+
+def _materias(rnd: random.Random, cantidad: int, docentes: int):
+    aulas = [f'Aula {edificio}-{numero}' for edificio in EDIFICIOS
+             for numero in range(101, 101 + max(10, cantidad // 60))]
+    departamentos = list(DEPARTAMENTOS.values())
+    for numero in range(1, cantidad + 1):
+        prefijo, temas = rnd.choice(departamentos)
+        tema = rnd.choice(temas)
+        docente_id = rnd.randrange(1, docentes + 1) if rnd.random() < 0.85 else None
+        yield (f'{tema} {rnd.choice(NIVELES)}', f'{prefijo}{numero:06d}', rnd.choice(aulas),
+               rnd.choice((2, 3, 3, 4, 5)), f'Curso de {tema.lower()}', docente_id)
+
+
+def _horarios(rnd: random.Random, cantidad: int, materias: int):
+    for _ in range(cantidad):
+        inicio = rnd.randrange(7, 20)
+        duracion = rnd.choice((1, 2, 2, 3))
+        yield (rnd.randrange(1, materias + 1), rnd.choice(DIAS),
+               f'{inicio:02d}:00', f'{min(inicio + duracion, 22):02d}:00')
+
+
+def _preferencias(rnd: random.Random, cantidad: int, docentes: int, materias: int):
+    for _ in range(cantidad):
+        yield (rnd.randrange(1, docentes + 1), rnd.randrange(1, materias + 1), rnd.choice(DIAS),
+               rnd.choice(RANGOS_PREFERENCIA), rnd.choice(ESTADOS_PREFERENCIA))
+
+
+def _notificaciones(rnd: random.Random, cantidad: int, docentes: int):
+    ahora = datetime.now()
+    temas = [tema for _, temas in DEPARTAMENTOS.values() for tema in temas]
+    for _ in range(cantidad):
+        titulo, mensaje, tipo = rnd.choice(NOTIFICACIONES)
+        fecha = ahora - timedelta(minutes=rnd.randrange(0, 60 * 24 * 180))
+        yield (rnd.randrange(1, docentes + 1), titulo, mensaje.format(materia=rnd.choice(temas)),
+               tipo, 1 if rnd.random() < 0.7 else 0, fecha.isoformat(sep=' ', timespec='seconds'))
+
+
+def generar_datos(db_path: str, docentes: int, materias: int, horarios: int,
+                  preferencias: int, notificaciones: int, semilla: int = 42) -> dict:
+    """
+    Crea la base de datos en db_path (reemplazándola si existe) y la llena
+    con datos sintéticos.
+
+    Returns:
+        {tabla: filas insertadas}
+    """
+    crear_base_datos(db_path)
+    rnd = random.Random(semilla)
+    docentes = max(1, docentes)
+    materias = max(1, materias)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    insertadas = {}
+    with conn:
+        insertadas['docentes'] = _insertar(conn, """
+            INSERT INTO docentes (nombre_completo, email, password, telefono, oficina,
+                                  departamento, especialidad, biografia, activo)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, _docentes(rnd, docentes))
+        # La cuenta demo siempre activa
+        conn.execute("UPDATE docentes SET activo = 1 WHERE id = 1")
+        conn.execute("""
+            INSERT INTO administrativos (nombre_completo, email, password, telefono, oficina,
+                                         departamento, cargo, biografia)
+            VALUES ('David Piedrahita', 'administrativo@demo.com', ?, '+52 525 876 3597',
+                    'Edificio A - Oficina 12', 'Administrativo', 'Encargado de asignaciones',
+                    'Administrador de la base de datos de carga.')
+        """, (hash_password('admin123'),))
+        insertadas['administrativos'] = 1
+        insertadas['materias'] = _insertar(conn, """
+            INSERT INTO materias (nombre, codigo, aula, creditos, descripcion, docente_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, _materias(rnd, materias, docentes))
+        insertadas['horarios'] = _insertar(conn, """
+            INSERT INTO horarios (materia_id, dia_semana, hora_inicio, hora_fin)
+            VALUES (?, ?, ?, ?)
+        """, _horarios(rnd, horarios, materias))
+        insertadas['preferencias'] = _insertar(conn, """
+            INSERT INTO preferencias (docente_id, materia_id, dia_semana, horario, estado)
+            VALUES (?, ?, ?, ?, ?)
+        """, _preferencias(rnd, preferencias, docentes, materias))
+        insertadas['notificaciones'] = _insertar(conn, """
+            INSERT INTO notificaciones (usuario_id, titulo, mensaje, tipo, leida, fecha_creacion)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, _notificaciones(rnd, notificaciones, docentes))
+    conn.execute("ANALYZE")
+    conn.close()
+    return insertadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--salida', required=True, help='Ruta de la base de datos a crear')
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help='Multiplica el volumen por defecto (1.0 = 10k docentes, 1M notificaciones)')
+    parser.add_argument('--semilla', type=int, default=42)
+    for tabla in VOLUMEN:
+        parser.add_argument(f'--{tabla}', type=int, help=f'Número de {tabla} (anula la escala)')
+    args = parser.parse_args()
+
+    volumen = {tabla: getattr(args, tabla) if getattr(args, tabla) is not None
+               else int(cantidad * args.escala) for tabla, cantidad in VOLUMEN.items()}
+
+    inicio = time.perf_counter()
+    insertadas = generar_datos(args.salida, semilla=args.semilla, **volumen)
+    duracion = time.perf_counter() - inicio
+
+    for tabla, filas in insertadas.items():
+        print(f"[OK] {filas:>9} {tabla}")
+    print(f"\n[OK] Base de datos generada en {duracion:.1f} s: {args.salida} "
+          f"({os.path.getsize(args.salida) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,11 +7,16 @@ import sqlite3
 import os
 
 
-def crear_base_datos():
-    """Crea la base de datos y todas las tablas"""
+def crear_base_datos(db_path=None):
+    """
+    Crea la base de datos y todas las tablas
+
+    Args:
+        db_path: Ruta del archivo (por defecto database/universidad.db)
+    """
 
     # Ruta de la base de datos
-    db_path = os.path.join(os.path.dirname(__file__), 'universidad.db')
+    db_path = db_path or os.path.join(os.path.dirname(__file__), 'universidad.db')
 
     # Eliminar BD existente si existe
     if os.path.exists(db_path):
@@ -0,0 +1,203 @@
+"""
+Plantilla de la base de datos.
+Construye una vez una base de datos de referencia con el esquema completo
+(tablas, índices, FTS5 y sus triggers, tabla versiones), los datos demo, las
+estadísticas del planificador (ANALYZE) y compactada (VACUUM), marcada con
+PRAGMA user_version = VERSION_ESQUEMA.
+
+Un despliegue ya no lanza init_db.py y seed_data.py en intérpretes aparte:
+copia la plantilla en el mismo proceso con la API de backup de sqlite3 y
+comprueba el esquema leyendo solo user_version. Una base existente de una
+versión anterior se migra sin tocar sus datos; una que no se puede migrar
+detiene el despliegue (ErrorEsquema, código de salida 1).
+
+Uso:
+    python database/plantilla.py construir [--plantilla database/plantilla.db]
+    python database/plantilla.py restaurar [--destino database/universidad.db]
+    python database/plantilla.py verificar [--destino database/universidad.db]
+    python database/plantilla.py migrar [--destino database/universidad.db]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import time
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, DIRECTORIO)
+sys.path.insert(0, os.path.dirname(DIRECTORIO))
+from init_db import crear_base_datos  # noqa: E402
+from seed_data import poblar_datos  # noqa: E402
+from application.patterns.singleton import VERSION_ESQUEMA, DatabaseConnection  # noqa: E402
+from application.repositories.busqueda_repository import BusquedaRepository  # noqa: E402
+from application.repositories.versiones import CLAVE_ORIGEN, VersionRegistry, origen_nuevo  # noqa: E402
+
+RUTA_PLANTILLA = os.path.join(DIRECTORIO, 'plantilla.db')
+RUTA_BASE_DATOS = os.path.join(DIRECTORIO, 'universidad.db')
+
+# Tablas de init_db.py: sin ellas una base no se puede migrar
+TABLAS_BASE = ('docentes', 'administrativos', 'materias', 'horarios', 'preferencias', 'notificaciones')
+
+
+class ErrorEsquema(RuntimeError):
+    """La base de datos existente no tiene un esquema que esta versión pueda usar"""
+
+
+def version_esquema(ruta: str) -> int:
+    """PRAGMA user_version del archivo (0 si no existe o nadie la fijó)"""
+    if not os.path.exists(ruta):
+        return 0
+    conn = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def construir_plantilla(ruta: str = RUTA_PLANTILLA) -> str:
+    """
+    Crea la plantilla en un archivo temporal y la mueve a `ruta` al terminar:
+    quien la lea a la vez ve la anterior o la nueva, nunca una a medias.
+    """
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with contextlib.redirect_stdout(io.StringIO()):
+        crear_base_datos(temporal)
+        poblar_datos(temporal)
+
+    db = DatabaseConnection.nueva()
+    db.connect(temporal)
+    try:
+        BusquedaRepository(db).asegurar_esquema()
+        VersionRegistry.asegurar_esquema(db)
+    finally:
+        db.close()
+
+    conn = sqlite3.connect(temporal)
+    conn.execute("ANALYZE")
+    conn.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def restaurar(destino: str = RUTA_BASE_DATOS, plantilla: str = RUTA_PLANTILLA) -> str:
+    """
+    Copia la plantilla en `destino` con Connection.backup (una copia
+    coherente aunque otro proceso la esté leyendo). La reconstruye antes si
+    falta o es de otra versión del esquema. La copia recibe un origen de
+    versiones nuevo: los ETag de una base anterior no le sirven.
+    """
+    if version_esquema(plantilla) != VERSION_ESQUEMA:
+        construir_plantilla(plantilla)
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    temporal = f'{destino}.{os.getpid()}.tmp'
+    origen = sqlite3.connect(f'file:{plantilla}?mode=ro', uri=True)
+    copia = sqlite3.connect(temporal)
+    try:
+        origen.backup(copia)
+        with copia:
+            copia.execute("UPDATE versiones SET version = ? WHERE clave = ?", (origen_nuevo(), CLAVE_ORIGEN))
+    finally:
+        copia.close()
+        origen.close()
+    os.replace(temporal, destino)
+    return destino
+
+
+def migrar(destino: str = RUTA_BASE_DATOS) -> int:
+    """
+    Lleva una base de una versión anterior del esquema a VERSION_ESQUEMA
+    conservando sus datos. Los pasos son los mismos que construir_plantilla
+    aplica tras init_db.py (FTS5 y triggers, tabla versiones) y no repiten lo
+    que ya existe.
+
+    Returns:
+        Versión de la que partía la base
+
+    Raises:
+        ErrorEsquema: Si la base es de una versión posterior o le faltan
+            tablas de init_db.py
+    """
+    version = version_esquema(destino)
+    if version > VERSION_ESQUEMA:
+        raise ErrorEsquema(f"{destino} tiene el esquema v{version}, posterior a v{VERSION_ESQUEMA}")
+    conn = sqlite3.connect(destino)
+    try:
+        tablas = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    faltan = [tabla for tabla in TABLAS_BASE if tabla not in tablas]
+    if faltan:
+        raise ErrorEsquema(f"{destino} no tiene las tablas {', '.join(faltan)}")
+
+    db = DatabaseConnection.nueva()
+    db.connect(destino)
+    try:
+        BusquedaRepository(db).asegurar_esquema()
+        VersionRegistry.asegurar_esquema(db)
+        db.get_connection().execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        db.confirmar()
+    finally:
+        db.close()
+    return version
+
+
+def asegurar_base_datos(destino: str = RUTA_BASE_DATOS, plantilla: str = RUTA_PLANTILLA) -> str:
+    """
+    Restaura la plantilla si `destino` no existe. Una base existente no se
+    reemplaza nunca (tiene los datos del despliegue): si es de una versión
+    anterior del esquema se migra.
+
+    Returns:
+        'restaurada', 'vigente' o 'migrada desde vN'
+
+    Raises:
+        ErrorEsquema: Si la base existente no se puede migrar
+    """
+    if not os.path.exists(destino):
+        restaurar(destino, plantilla)
+        return 'restaurada'
+    if version_esquema(destino) == VERSION_ESQUEMA:
+        return 'vigente'
+    return f'migrada desde v{migrar(destino)}'
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('accion', choices=('construir', 'restaurar', 'verificar', 'migrar'))
+    parser.add_argument('--plantilla', default=RUTA_PLANTILLA)
+    parser.add_argument('--destino', default=RUTA_BASE_DATOS)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.accion == 'construir':
+        construir_plantilla(args.plantilla)
+        print(f"[OK] Plantilla v{VERSION_ESQUEMA} construida: {args.plantilla} "
+              f"({os.path.getsize(args.plantilla) / 1024:.0f} KB)")
+    elif args.accion == 'restaurar':
+        restaurar(args.destino, args.plantilla)
+        print(f"[OK] {args.destino} restaurada desde {args.plantilla}")
+    elif args.accion == 'migrar':
+        try:
+            anterior = migrar(args.destino)
+        except ErrorEsquema as e:
+            print(f"[ERROR] {e}")
+            return 1
+        print(f"[OK] Esquema v{anterior} -> v{VERSION_ESQUEMA}")
+    else:
+        version = version_esquema(args.destino)
+        if version != VERSION_ESQUEMA:
+            print(f"Esquema v{version} en {args.destino}, se esperaba v{VERSION_ESQUEMA}")
+            return 1
+        print(f"[OK] Esquema v{version}")
+    print(f"    {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
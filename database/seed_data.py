@@ -13,10 +13,15 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
 
-def poblar_datos():
-    """Inserta datos de prueba en la base de datos"""
+def poblar_datos(db_path=None):
+    """
+    Inserta datos de prueba en la base de datos
 
-    db_path = os.path.join(os.path.dirname(__file__), 'universidad.db')
+    Args:
+        db_path: Ruta del archivo (por defecto database/universidad.db)
+    """
+
+    db_path = db_path or os.path.join(os.path.dirname(__file__), 'universidad.db')
 
     if not os.path.exists(db_path):
         print("Error: La base de datos no existe. Ejecuta init_db.py primero.")
@@ -54,13 +59,11 @@ def poblar_datos():
          'Especialista en teoría de probabilidades.'),
     ]
 
-    for docente in docentes:
-        cursor.execute("""
-            INSERT INTO docentes (nombre_completo, email, password, telefono, oficina,
-                                departamento, especialidad, biografia)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (docente[0], docente[1], hash_password(docente[2]), docente[3],
-              docente[4], docente[5], docente[6], docente[7]))
+    cursor.executemany("""
+        INSERT INTO docentes (nombre_completo, email, password, telefono, oficina,
+                            departamento, especialidad, biografia)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(d[0], d[1], hash_password(d[2]), *d[3:]) for d in docentes])
 
     print(f"[OK] {len(docentes)} docentes insertados")
 
@@ -71,13 +74,11 @@ def poblar_datos():
          'Profesional en Administración de empresas con especialización en gestión educativa y experiencia en planeación académica universitaria.')
     ]
 
-    for admin in administrativos:
-        cursor.execute("""
-            INSERT INTO administrativos (nombre_completo, email, password, telefono, oficina,
-                                        departamento, cargo, biografia)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (admin[0], admin[1], hash_password(admin[2]), admin[3],
-              admin[4], admin[5], admin[6], admin[7]))
+    cursor.executemany("""
+        INSERT INTO administrativos (nombre_completo, email, password, telefono, oficina,
+                                    departamento, cargo, biografia)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(a[0], a[1], hash_password(a[2]), *a[3:]) for a in administrativos])
 
     print(f"[OK] {len(administrativos)} administrativos insertados")
 
@@ -96,11 +97,10 @@ def poblar_datos():
         ('Asesorías', 'ASE001', 'Oficina 12', 2, 'Asesorías personalizadas'),
     ]
 
-    for materia in materias:
-        cursor.execute("""
-            INSERT INTO materias (nombre, codigo, aula, creditos, descripcion)
-            VALUES (?, ?, ?, ?, ?)
-        """, materia)
+    cursor.executemany("""
+        INSERT INTO materias (nombre, codigo, aula, creditos, descripcion)
+        VALUES (?, ?, ?, ?, ?)
+    """, materias)
 
     print(f"[OK] {len(materias)} materias insertadas")
 
@@ -112,8 +112,8 @@ def poblar_datos():
         (4, 1),  # Cálculo Integral -> Dr. Carlos
     ]
 
-    for materia_id, docente_id in asignaciones:
-        cursor.execute("UPDATE materias SET docente_id = ? WHERE id = ?", (docente_id, materia_id))
+    cursor.executemany("UPDATE materias SET docente_id = ? WHERE id = ?",
+                       [(docente_id, materia_id) for materia_id, docente_id in asignaciones])
 
     print(f"[OK] {len(asignaciones)} asignaciones realizadas")
 
@@ -149,11 +149,10 @@ def poblar_datos():
         (11, 'Jueves', '16:00', '18:00'),
     ]
 
-    for horario in horarios:
-        cursor.execute("""
-            INSERT INTO horarios (materia_id, dia_semana, hora_inicio, hora_fin)
-            VALUES (?, ?, ?, ?)
-        """, horario)
+    cursor.executemany("""
+        INSERT INTO horarios (materia_id, dia_semana, hora_inicio, hora_fin)
+        VALUES (?, ?, ?, ?)
+    """, horarios)
 
     print(f"[OK] {len(horarios)} horarios insertados")
 
@@ -167,11 +166,10 @@ def poblar_datos():
         (1, 7, 'Viernes', '08:00 - 12:00', 'Aprobada'),
     ]
 
-    for pref in preferencias:
-        cursor.execute("""
-            INSERT INTO preferencias (docente_id, materia_id, dia_semana, horario, estado)
-            VALUES (?, ?, ?, ?, ?)
-        """, pref)
+    cursor.executemany("""
+        INSERT INTO preferencias (docente_id, materia_id, dia_semana, horario, estado)
+        VALUES (?, ?, ?, ?, ?)
+    """, preferencias)
 
     print(f"[OK] {len(preferencias)} preferencias insertadas")
 
@@ -181,11 +179,10 @@ def poblar_datos():
         (1, 'Preferencia Aprobada', 'Tu preferencia para Álgebra Lineal ha sido aprobada', 'success'),
     ]
 
-    for notif in notificaciones:
-        cursor.execute("""
-            INSERT INTO notificaciones (usuario_id, titulo, mensaje, tipo)
-            VALUES (?, ?, ?, ?)
-        """, notif)
+    cursor.executemany("""
+        INSERT INTO notificaciones (usuario_id, titulo, mensaje, tipo)
+        VALUES (?, ?, ?, ?)
+    """, notificaciones)
 
     print(f"[OK] {len(notificaciones)} notificaciones insertadas")
 
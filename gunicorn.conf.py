@@ -0,0 +1,52 @@
+"""
+Configuración de gunicorn (se carga sola desde el directorio de trabajo).
+
+Con preload (por defecto) el maestro importa la aplicación, compila las
+plantillas y llena las cachés de catálogo una sola vez. Después cierra la
+conexión a la base de datos y congela el recolector (gc.freeze). Los workers
+heredan todo eso por copy-on-write, y cada uno abre su propia conexión en
+post_fork. Sin gc.freeze, la primera recolección de cada worker escribiría
+en todos los objetos heredados y las páginas compartidas dejarían de serlo.
+
+Variables de entorno:
+    PORT               Puerto (por defecto 8000)
+    WEB_CONCURRENCY    Número de workers (por defecto 1)
+    GUNICORN_PRELOAD   0 para que cada worker arranque la aplicación por su cuenta
+
+La memoria única por worker se mide con benchmarks/memoria_workers.py.
+"""
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def _aplicacion(server):
+    # Con preload, la aplicación que el maestro ya cargó
+    return server.app.wsgi()
+
+
+def when_ready(server):
+    """Maestro, antes de lanzar el primer worker"""
+    if not server.cfg.preload_app:
+        return
+    import main
+
+    app = _aplicacion(server)
+    main.precargar(app)
+    app.extensions[main.EXTENSION].antes_de_fork()
+    gc.collect()
+    gc.freeze()
+    server.log.info("Aplicación precargada; objetos congelados: %d", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    """Worker recién creado: conexión propia a la base de datos"""
+    if not server.cfg.preload_app:
+        return
+    import main
+
+    _aplicacion(server).extensions[main.EXTENSION].tras_fork()
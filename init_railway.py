@@ -3,27 +3,39 @@ Inicialización automática de base de datos para Railway
 Se ejecuta antes de iniciar gunicorn
 """
 import os
+import shutil
 import sys
 
-# Verificar si la base de datos existe
-db_path = 'database/universidad.db'
-
-if not os.path.exists(db_path):
-    print("[Railway] Base de datos no existe. Inicializando...")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from application.patterns.singleton import VERSION_ESQUEMA
+from application.utils.recursos_estaticos import construir_recursos
+from database.plantilla import ErrorEsquema, asegurar_base_datos
 
-    # Crear directorio si no existe
-    os.makedirs('database', exist_ok=True)
-
-    # Inicializar base de datos
-    print("[Railway] Ejecutando init_db.py...")
-    os.system('python database/init_db.py')
+# Base de datos: copia de database/plantilla.db (se construye si falta); una
+# base existente conserva sus datos y se migra si su user_version es anterior.
+# Si no se puede usar, gunicorn no llega a arrancar.
+db_path = 'database/universidad.db'
+try:
+    estado = asegurar_base_datos(db_path)
+except ErrorEsquema as e:
+    print(f"[Railway] Error: {e}")
+    sys.exit(1)
+if estado == 'restaurada':
+    print(f"[Railway] Base de datos restaurada desde la plantilla (esquema v{VERSION_ESQUEMA})")
+elif estado == 'vigente':
+    print("[Railway] Base de datos ya existe")
+else:
+    print(f"[Railway] Base de datos existente {estado} a v{VERSION_ESQUEMA}")
 
-    # Poblar con datos demo
-    print("[Railway] Ejecutando seed_data.py...")
-    os.system('python database/seed_data.py')
+# Compilar CSS/JS (minificados, con huella y precomprimidos)
+manifiesto = construir_recursos(os.path.join('application', 'static'))
+print(f"[Railway] Recursos estáticos compilados: {len(manifiesto)}")
 
-    print("[Railway] Base de datos inicializada correctamente")
-else:
-    print("[Railway] Base de datos ya existe")
+# Métricas: los archivos de los workers del arranque anterior no deben sumarse
+metricas_dir = os.environ.get('METRICAS_DIR')
+if metricas_dir:
+    shutil.rmtree(metricas_dir, ignore_errors=True)
+    os.makedirs(metricas_dir, exist_ok=True)
+    print(f"[Railway] Directorio de métricas preparado: {metricas_dir}")
 
 print("[Railway] Listo para iniciar gunicorn")
@@ -1,65 +1,367 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import (Flask, render_template, request, redirect, url_for, session, flash, jsonify,
+                   abort, Response, make_response, send_from_directory, g, current_app)
 import os
 import sys
 import re
+import time
+import hashlib
+import hmac
+import uuid
+import tempfile
 import logging
+import mimetypes
+import click
+from datetime import date
 from functools import wraps
+from typing import Mapping, Optional
+from flask.cli import with_appcontext
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from application.patterns.singleton import DatabaseConnection, SessionManager
-from application.repositories.usuario_repository import UsuarioRepository
-from application.repositories.materia_repository import MateriaRepository, HorarioRepository
-from application.repositories.preferencia_repository import PreferenciaRepository
-from application.repositories.notificacion_repository import NotificacionRepository
-from application.services.auth_service import AuthService
-from application.services.docente_service import DocenteService
-from application.services.administrativo_service import AdministrativoService
-
-try:
-    os.makedirs('logs', exist_ok=True)
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('logs/app.log'),
-            logging.StreamHandler()
-        ]
-    )
-except:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[logging.StreamHandler()]
-    )
-logger = logging.getLogger(__name__)
-
-template_dir = os.path.join(os.path.dirname(__file__), 'application', 'templates')
-static_dir = os.path.join(os.path.dirname(__file__), 'application', 'static')
-app = Flask(__name__, template_folder='application/templates', static_folder='application/static')
-
-app.secret_key = os.environ.get('SECRET_KEY', 'clave-secreta-super-segura-12345')
-app.config['DATABASE'] = os.environ.get('DATABASE_PATH', 'database/universidad.db')
-
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-app.config['SESSION_COOKIE_SECURE'] = False
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+from application.models.materia import HorarioClase
+from application.services.busqueda_service import BusquedaService
+from application.contenedor import EXTENSION, ContenedorServicios, componente
+from application.controllers.api_v1 import crear_api_v1
+from application.controllers.rutas import RutasDiferidas
+from application.utils.ocurrencias import PeriodoAcademico
+from application.utils.franjas import a_minutos
+from application.utils.cache_plantillas import CacheFragmentos, CompactarHtml, crear_cache_bytecode
+from application.utils.compresion import CompresionRespuestas
+from application.utils.recursos_estaticos import construir_recursos
+from application.utils.consultas_sql import CABECERA_CONSULTAS, CABECERA_PRESUPUESTO, presupuesto_de, presupuesto_sql
+from application.utils.perfilado import CABECERA_PERFILAR, PARAMETRO_PERFILAR
+from application.utils.metricas import CONTENIDO_PROMETHEUS
+from application.utils.registro import configurar_registro, parsear_muestreo
 
-db = DatabaseConnection()
-db.connect(app.config['DATABASE'])
+logger = logging.getLogger(__name__)
+
+# Rutas y hooks de la aplicación web; create_app() los registra
+rutas = RutasDiferidas()
+
+# Componentes del contenedor de la aplicación en curso (se crean en su primer uso)
+db = componente('db')
+usuario_repo = componente('usuario_repo')
+horario_repo = componente('horario_repo')
+preferencia_repo = componente('preferencia_repo')
+notificacion_repo = componente('notificacion_repo')
+auth_service = componente('auth_service')
+calendario_service = componente('calendario_service')
+docente_service = componente('docente_service')
+administrativo_service = componente('administrativo_service')
+revision_preferencias_service = componente('revision_preferencias_service')
+autocompletado_service = componente('autocompletado_service')
+busqueda_service = componente('busqueda_service')
+disponibilidad_service = componente('disponibilidad_service')
+demanda_service = componente('demanda_service')
+calendario_ics_service = componente('calendario_ics_service')
+versiones = componente('versiones')
+contador_sql = componente('contador_sql')
+metricas = componente('metricas')
+perfilador = componente('perfilador')
+trazador = componente('trazador')
+manifiesto_recursos = componente('manifiesto_recursos')
+
+RECURSOS_MAX_AGE = 365 * 24 * 3600
+_registro = None
+
+
+def configuracion_entorno() -> dict:
+    """Configuración a partir de las variables de entorno (create_app la completa)"""
+    return {
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'clave-secreta-super-segura-12345'),
+        'DATABASE': os.environ.get('DATABASE_PATH', 'database/universidad.db'),
+
+        'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,
+        'SESSION_COOKIE_SECURE': False,
+        'SESSION_COOKIE_HTTPONLY': True,
+        'SESSION_COOKIE_SAMESITE': 'Lax',
+
+        # Registro: las peticiones solo encolan los mensajes; un hilo los escribe en
+        # LOG_ARCHIVO (una línea JSON por mensaje, rotado por tamaño; un archivo por
+        # proceso: logs/app.<pid>.log) y en la consola.
+        # LOG_MUESTREO='acceso=0.1' guarda 1 de cada 10 líneas de acceso (los WARNING
+        # y superiores siempre)
+        'LOG_ARCHIVO': os.environ.get('LOG_ARCHIVO', os.path.join('logs', 'app.log')),
+        'LOG_NIVEL': os.environ.get('LOG_NIVEL', 'INFO'),
+        'LOG_MAX_BYTES': int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        'LOG_COPIAS': int(os.environ.get('LOG_COPIAS', 5)),
+        'LOG_MUESTREO': parsear_muestreo(os.environ.get('LOG_MUESTREO', '')),
+
+        # Periodo académico (AAAA-MM-DD); sin fechas se usa el semestre en curso
+        'PERIODO_INICIO': os.environ.get('PERIODO_INICIO'),
+        'PERIODO_FIN': os.environ.get('PERIODO_FIN'),
+        'DIAS_FESTIVOS': PeriodoAcademico.parsear_fechas(os.environ.get('DIAS_FESTIVOS')),
+
+        # Plantillas: fragmentos cacheados ({% cache %}) y bytecode compartido entre workers
+        'JINJA_CACHE_DIR': os.environ.get('JINJA_CACHE_DIR',
+                                          os.path.join(tempfile.gettempdir(), 'universidad-jinja')),
+
+        # Compresión de respuestas (gzip, o brotli si está instalado)
+        'COMPRESION_NIVEL_GZIP': int(os.environ.get('COMPRESION_NIVEL_GZIP', 6)),
+        'COMPRESION_NIVEL_BROTLI': int(os.environ.get('COMPRESION_NIVEL_BROTLI', 4)),
+        'COMPRESION_MINIMO': int(os.environ.get('COMPRESION_MINIMO', 500)),
+
+        # Trazas: con TRAZAS_MUESTREO=0.1 se traza 1 de cada 10 peticiones (0 =
+        # desactivado). Cada traza lleva un span para la ruta y uno por cada método de
+        # servicio y repositorio llamado, y se añade como una línea OTLP/JSON a
+        # TRAZAS_ARCHIVO (uno por proceso, logs/trazas.<pid>.jsonl, rotado por
+        # tamaño). Una petición con traceparent continúa esa traza; si viene
+        # muestreado se traza siempre, pero como mucho TRAZAS_FORZADAS_POR_SEGUNDO
+        # veces por segundo (la cabecera la puede enviar cualquier cliente)
+        'TRAZAS_MUESTREO': float(os.environ.get('TRAZAS_MUESTREO', 0)),
+        'TRAZAS_ARCHIVO': os.environ.get('TRAZAS_ARCHIVO', os.path.join('logs', 'trazas.jsonl')),
+        'TRAZAS_FORZADAS_POR_SEGUNDO': float(os.environ.get('TRAZAS_FORZADAS_POR_SEGUNDO', 1)),
+        'TRAZAS_MAX_BYTES': int(os.environ.get('TRAZAS_MAX_BYTES', 10 * 1024 * 1024)),
+        'TRAZAS_COPIAS': int(os.environ.get('TRAZAS_COPIAS', 5)),
+
+        # Presupuesto de consultas SQL por ruta (@presupuesto_sql): con
+        # VERIFICAR_PRESUPUESTO_SQL=1 cada respuesta indica cuántas sentencias ejecutó
+        # y se avisa en el log de las rutas que superan su presupuesto
+        'VERIFICAR_PRESUPUESTO_SQL': os.environ.get('VERIFICAR_PRESUPUESTO_SQL') == '1',
+
+        # Perfilado bajo demanda: un administrativo lo pide con ?perfilar=1 o la
+        # cabecera X-Perfilar: 1; con PERFILAR_CADA_N=N se perfila además una de
+        # cada N peticiones. Los perfiles se listan en /admin/perfiles
+        'PERFILES_DIR': os.environ.get('PERFILES_DIR', os.path.join('logs', 'perfiles')),
+        'PERFILAR_CADA_N': int(os.environ.get('PERFILAR_CADA_N', 0)),
+        'PERFILES_MAXIMO': int(os.environ.get('PERFILES_MAXIMO', 50)),
+
+        # Métricas en formato Prometheus en /metrics. Con varios workers, METRICAS_DIR
+        # es un directorio compartido donde cada proceso mapea su archivo y /metrics
+        # suma los de todos; sin él cada proceso expone solo lo suyo. Con
+        # METRICAS_TOKEN, /metrics exige la cabecera Authorization: Bearer <token>
+        'METRICAS_DIR': os.environ.get('METRICAS_DIR'),
+        'METRICAS_TOKEN': os.environ.get('METRICAS_TOKEN'),
+    }
+
+
+def create_app(config: Optional[Mapping] = None) -> Flask:
+    """
+    Construye una aplicación. No abre la base de datos ni crea repositorios
+    ni servicios: lo hace su contenedor en el primer uso.
+
+    Args:
+        config: Valores que sustituyen a los de configuracion_entorno()
+
+    Cada aplicación tiene su conexión, sus métricas y su trazador: varias en
+    el mismo proceso pueden usar bases de datos distintas.
+    """
+    global _registro
+
+    app = Flask(__name__, template_folder='application/templates', static_folder='application/static')
+    app.config.from_mapping(configuracion_entorno())
+    app.config.from_mapping(config or {})
+
+    # El registro es del proceso: se configura con la primera aplicación
+    if _registro is None:
+        _registro = configurar_registro(app.config['LOG_ARCHIVO'], nivel=app.config['LOG_NIVEL'],
+                                        max_bytes=app.config['LOG_MAX_BYTES'],
+                                        copias=app.config['LOG_COPIAS'],
+                                        muestreo=app.config['LOG_MUESTREO'])
+
+    servicios = ContenedorServicios(app.config, app.static_folder)
+    app.extensions[EXTENSION] = servicios
+
+    app.jinja_env.trim_blocks = True
+    app.jinja_env.lstrip_blocks = True
+    app.jinja_env.add_extension(CacheFragmentos)
+    app.jinja_env.add_extension(CompactarHtml)
+    app.jinja_env.bytecode_cache = crear_cache_bytecode(app.config['JINJA_CACHE_DIR'], app.jinja_env)
+    app.jinja_env.globals['version'] = lambda clave: servicios.versiones.obtener(clave)
+    app.jinja_env.cache_fragmentos_observador = lambda acierto: servicios.metricas.cache.incrementar(
+        cache='fragmentos', resultado='acierto' if acierto else 'fallo')
+
+    app.wsgi_app = CompresionRespuestas(app.wsgi_app,
+                                        nivel_gzip=app.config['COMPRESION_NIVEL_GZIP'],
+                                        nivel_brotli=app.config['COMPRESION_NIVEL_BROTLI'],
+                                        minimo=app.config['COMPRESION_MINIMO'])
+
+    rutas.registrar(app)
+    if app.config['VERIFICAR_PRESUPUESTO_SQL']:
+        app.before_request(iniciar_conteo_sql)
+        app.after_request(verificar_presupuesto_sql)
+    app.register_blueprint(crear_api_v1(auth_service, docente_service, administrativo_service,
+                                        condicional_por_version))
+    app.cli.add_command(construir_recursos_comando)
+    return app
+
+
+def precargar(app: Flask):
+    """
+    Compila todas las plantillas y crea los servicios con sus cachés de
+    catálogo. gunicorn.conf.py lo llama en el maestro antes del fork: los
+    workers comparten esas páginas de memoria en lugar de construirlas cada uno.
+    """
+    with app.app_context():
+        for nombre in app.jinja_env.list_templates():
+            app.jinja_env.get_template(nombre)
+        app.extensions[EXTENSION].precargar()
+
+
+def __getattr__(nombre):
+    """
+    main.app se construye en el primer acceso (gunicorn main:app, flask --app
+    main): importar main no crea ninguna aplicación.
+    """
+    if nombre == 'app':
+        aplicacion = globals().get('_app')
+        if aplicacion is None:
+            aplicacion = globals()['_app'] = create_app()
+        return aplicacion
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+@rutas.template_global()
+def recurso(filename):
+    """url_for('static') que usa la versión compilada del recurso si existe"""
+    publicado = manifiesto_recursos.resolver(filename)
+    if publicado is None:
+        return url_for('static', filename=filename)
+    return url_for('recursos_estaticos', nombre=publicado)
+
+
+@click.command('construir-recursos')
+@with_appcontext
+def construir_recursos_comando():
+    """Minifica, firma y precomprime los CSS/JS de application/static"""
+    manifiesto = construir_recursos(current_app.static_folder)
+    manifiesto_recursos.recargar()
+    for nombre, publicado in sorted(manifiesto.items()):
+        click.echo(f'{nombre} -> {publicado}')
+
+# Id de petición (el X-Request-ID del proxy o uno nuevo): va en cada línea del
+# log de la petición y se devuelve en la respuesta
+registro_acceso = logging.getLogger('acceso')
+
+
+@rutas.before_request
+def iniciar_peticion():
+    g.id_peticion = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.inicio_peticion = time.perf_counter()
+
+
+@rutas.before_request
+def sincronizar_versiones():
+    """
+    Versiones escritas por otros workers (ver repositories/versiones.py),
+    antes de que las cachés o el ETag las consulten. Va antes de empezar a
+    contar el presupuesto SQL: cuesta lo mismo en todas las rutas.
+    """
+    current_app.extensions[EXTENSION].sincronizar_versiones()
+
+
+@rutas.after_request
+def registrar_acceso(respuesta):
+    respuesta.headers['X-Request-ID'] = g.id_peticion
+    # Los 5xx como WARNING: el muestreo nunca los descarta
+    registro_acceso.log(logging.WARNING if respuesta.status_code >= 500 else logging.INFO,
+                        f"{request.method} {request.full_path.rstrip('?')} {respuesta.status_code}",
+                        extra={'estado': respuesta.status_code,
+                               'duracion_ms': round((time.perf_counter() - g.inicio_peticion) * 1000, 2)})
+    return respuesta
+
+
+@rutas.before_request
+def iniciar_traza():
+    traza = trazador.iniciar_traza(
+        f"{request.method} {request.endpoint or 'sin_ruta'}",
+        {'http.request.method': request.method, 'url.path': request.path,
+         'http.route': request.url_rule.rule if request.url_rule else '', 'id_peticion': g.id_peticion},
+        traceparent=request.headers.get('traceparent'))
+    if traza is not None:
+        g.traza = traza
+        g.id_traza = traza.traza.trace_id
+
+
+@rutas.after_request
+def estado_traza(respuesta):
+    if 'traza' in g:
+        g.estado_traza = respuesta.status_code
+    return respuesta
+
+
+@rutas.teardown_request
+def terminar_traza(error=None):
+    traza = g.pop('traza', None)
+    if traza is not None:
+        estado = g.pop('estado_traza', None)
+        trazador.terminar_traza(traza, {'http.response.status_code': estado} if estado else None, error)
+
+
+# Solo con VERIFICAR_PRESUPUESTO_SQL (los registra create_app)
+def iniciar_conteo_sql():
+    contador_sql.iniciar()
+
+
+def verificar_presupuesto_sql(respuesta):
+    sentencias = contador_sql.terminar()
+    presupuesto = presupuesto_de(current_app.view_functions.get(request.endpoint))
+    respuesta.headers[CABECERA_CONSULTAS] = str(len(sentencias))
+    if presupuesto is not None:
+        respuesta.headers[CABECERA_PRESUPUESTO] = str(presupuesto)
+        if len(sentencias) > presupuesto:
+            logger.warning(f"{request.endpoint}: {len(sentencias)} consultas SQL "
+                           f"(presupuesto {presupuesto})")
+    return respuesta
+
+
+@rutas.before_request
+def iniciar_perfilado():
+    if request.endpoint in ('static', 'recursos_estaticos'):
+        return
+    solicitado = '1' in (request.args.get(PARAMETRO_PERFILAR), request.headers.get(CABECERA_PERFILAR))
+    if perfilador.debe_perfilar(solicitado and auth_service.tiene_rol('administrativo')):
+        g.perfil = perfilador.iniciar()
+
+
+@rutas.after_request
+def terminar_perfilado(respuesta):
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return respuesta
+    perfil.detener()
+    datos = (request.method, request.full_path.rstrip('?'), request.endpoint, respuesta.status_code)
+    # El proxy solo se resuelve dentro del contexto de la aplicación
+    destino = perfilador._get_current_object()
+
+    def guardar():
+        # Después de enviar la respuesta: escribir el perfil no suma a su latencia
+        try:
+            destino.guardar(perfil, *datos)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el perfil de {datos[1]}: {e}")
+
+    respuesta.call_on_close(guardar)
+    return respuesta
+
+
+@rutas.teardown_request
+def descartar_perfilado(error=None):
+    # La vista lanzó una excepción y no pasó por after_request
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        perfil.detener()
+
+
+@rutas.before_request
+def iniciar_metricas():
+    g.en_curso = True
+    metricas.en_curso.incrementar()
+
+
+@rutas.after_request
+def registrar_metricas(respuesta):
+    # El endpoint (no la URL) como etiqueta: las URL con ids no multiplican las series
+    metricas.peticiones.observar(time.perf_counter() - g.inicio_peticion,
+                                 ruta=request.endpoint or 'sin_ruta', metodo=request.method,
+                                 estado=respuesta.status_code)
+    return respuesta
 
-usuario_repo = UsuarioRepository(db)
-materia_repo = MateriaRepository(db)
-horario_repo = HorarioRepository(db)
-preferencia_repo = PreferenciaRepository(db)
-notificacion_repo = NotificacionRepository(db)
 
-auth_service = AuthService(usuario_repo)
-docente_service = DocenteService(usuario_repo, materia_repo, preferencia_repo,
-                                 horario_repo, notificacion_repo)
-administrativo_service = AdministrativoService(usuario_repo, materia_repo,
-                                               preferencia_repo, notificacion_repo)
+@rutas.teardown_request
+def terminar_metricas(error=None):
+    if g.pop('en_curso', False):
+        metricas.en_curso.decrementar()
 
 
 def validar_email(email):
@@ -107,7 +409,59 @@ def requiere_rol(rol_requerido):
     return decorador_rol
 
 
-@app.route('/')
+# Las versiones están en la base de datos y son las mismas en todos los
+# workers, así que el ETag también: incluye el despliegue (las plantillas
+# cambian con él) y el origen de las versiones, no el proceso.
+DESPLIEGUE = os.environ.get('DEPLOY_ID') or os.environ.get('RAILWAY_DEPLOYMENT_ID', 'local')
+
+
+def condicional_por_version(*claves, variable=None):
+    """
+    GET condicional: responde 304 sin consultar repositorios ni renderizar
+    si no cambió ninguna de las versiones de las que depende la página.
+
+    Args:
+        claves: Claves del VersionRegistry; '{id}' se sustituye por el usuario actual
+        variable: Función opcional (usuario -> valor) para datos que dependen del tiempo
+    """
+    def decorador_condicional(f):
+        @wraps(f)
+        def decorador(*args, **kwargs):
+            # Los mensajes flash se consumen al renderizar: nunca responder 304 con ellos
+            if session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            usuario = auth_service.obtener_usuario_actual() or {}
+            partes = [DESPLIEGUE, versiones.origen, request.full_path, sorted(usuario.items())]
+            partes.extend(versiones.obtener(clave.format(id=usuario.get('id'))) for clave in claves)
+            if variable is not None:
+                partes.append(variable(usuario))
+            etag = hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:20]
+
+            acierto = request.if_none_match.contains_weak(etag)
+            metricas.cache.incrementar(cache='etag', resultado='acierto' if acierto else 'fallo')
+            if acierto:
+                respuesta = Response(status=304)
+            else:
+                respuesta = make_response(f(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag, weak=True)
+            respuesta.cache_control.private = True
+            respuesta.cache_control.no_cache = True
+            respuesta.vary.add('Cookie')
+            return respuesta
+        return decorador
+    return decorador_condicional
+
+
+def _proxima_clase(usuario):
+    """Inicio de la próxima clase: las listas de próximas clases cambian cuando empieza"""
+    return [s.inicio for s in calendario_service.proximas_clases(usuario['id'], 1)]
+
+
+@rutas.route('/')
+@presupuesto_sql(2)
 def index():
     if auth_service.esta_autenticado():
         usuario = auth_service.obtener_usuario_actual()
@@ -118,17 +472,20 @@ def index():
     return redirect(url_for('login_docente'))
 
 
-@app.route('/login/docente')
+@rutas.route('/login/docente')
+@presupuesto_sql(2)
 def login_docente():
     return render_template('auth/login_docente.html')
 
 
-@app.route('/login/administrativo')
+@rutas.route('/login/administrativo')
+@presupuesto_sql(2)
 def login_administrativo():
     return render_template('auth/login_administrativo.html')
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@rutas.route('/login', methods=['GET', 'POST'])
+@presupuesto_sql(5)
 def login():
     if request.method == 'GET':
         return redirect(url_for('login_docente'))
@@ -151,7 +508,8 @@ def login():
         return redirect(request.referrer or url_for('login_docente'))
 
 
-@app.route('/logout')
+@rutas.route('/logout')
+@presupuesto_sql(2)
 def logout():
     auth_service.cerrar_sesion()
     session.clear()
@@ -159,9 +517,12 @@ def logout():
     return redirect(url_for('login_docente'))
 
 
-@app.route('/docente/dashboard')
+@rutas.route('/docente/dashboard')
+@presupuesto_sql(7)
 @requiere_autenticacion
 @requiere_rol('docente')
+@condicional_por_version('horario_docente:{id}', 'preferencias:{id}', 'notificaciones:{id}',
+                         variable=_proxima_clase)
 def docente_dashboard():
     usuario = auth_service.obtener_usuario_actual()
     resumen = docente_service.obtener_resumen_dashboard(usuario['id'])
@@ -173,9 +534,11 @@ def docente_dashboard():
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/docente/perfil')
+@rutas.route('/docente/perfil')
+@presupuesto_sql(4)
 @requiere_autenticacion
 @requiere_rol('docente')
+@condicional_por_version('catalogo', 'notificaciones:{id}')
 def docente_perfil():
     usuario = auth_service.obtener_usuario_actual()
     docente = docente_service.obtener_perfil(usuario['id'])
@@ -187,7 +550,8 @@ def docente_perfil():
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/docente/perfil/actualizar', methods=['POST'])
+@rutas.route('/docente/perfil/actualizar', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('docente')
 def docente_actualizar_perfil():
@@ -207,77 +571,125 @@ def docente_actualizar_perfil():
     return redirect(url_for('docente_perfil'))
 
 
-@app.route('/docente/calendario')
+@rutas.route('/docente/calendario')
+@presupuesto_sql(5)
 @requiere_autenticacion
 @requiere_rol('docente')
+@condicional_por_version('horario_docente:{id}', 'notificaciones:{id}', variable=_proxima_clase)
 def docente_calendario():
     usuario = auth_service.obtener_usuario_actual()
     horario_data = docente_service.obtener_horario_semanal(usuario['id'])
     notificaciones_count = docente_service.obtener_notificaciones_no_leidas(usuario['id'])
 
+    url_suscripcion = url_for('calendario_ics', docente_id=usuario['id'],
+                              token=calendario_ics_service.generar_token(usuario['id']),
+                              _external=True)
+
     return render_template('docente/calendario.html',
                          usuario=usuario,
                          horario_data=horario_data,
+                         proximas_clases=calendario_service.proximas_clases(usuario['id']),
+                         url_suscripcion=url_suscripcion,
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/docente/asignaturas')
+@rutas.route('/calendario/<int:docente_id>/<token>.ics')
+@presupuesto_sql(4)
+def calendario_ics(docente_id, token):
+    """Suscripción iCalendar del docente; autenticada por token, sin sesión"""
+    if not calendario_ics_service.verificar_token(docente_id, token):
+        abort(404)
+    feed = calendario_ics_service.obtener_feed(docente_id)
+    if feed is None:
+        abort(404)
+
+    respuesta = Response(feed.contenido, mimetype='text/calendar')
+    respuesta.set_etag(feed.etag)
+    respuesta.last_modified = feed.modificado
+    respuesta.cache_control.private = True
+    respuesta.cache_control.max_age = 900
+    return respuesta.make_conditional(request)
+
+
+@rutas.route('/docente/asignaturas')
+@presupuesto_sql(5)
 @requiere_autenticacion
 @requiere_rol('docente')
+@condicional_por_version('horario_docente:{id}', 'notificaciones:{id}',
+                         variable=lambda usuario: calendario_service.periodo_actual().clave)
 def docente_asignaturas():
     usuario = auth_service.obtener_usuario_actual()
     materias = docente_service.obtener_materias_asignadas(usuario['id'])
     notificaciones_count = docente_service.obtener_notificaciones_no_leidas(usuario['id'])
 
+    horarios_por_materia = {}
+    for horario, _ in horario_repo.obtener_por_docente(usuario['id']):
+        horarios_por_materia.setdefault(horario.materia_id, []).append(horario)
+
     materias_con_horarios = []
     for materia in materias:
-        horarios = horario_repo.obtener_por_materia(materia.id)
+        horarios = horarios_por_materia.get(materia.id, [])
         materias_con_horarios.append({
             'materia': materia,
-            'horarios': horarios
+            'horarios': horarios,
+            'horas': sum(a_minutos(h.hora_fin) - a_minutos(h.hora_inicio) for h in horarios) / 60
         })
 
     return render_template('docente/asignaturas.html',
                          usuario=usuario,
                          materias=materias_con_horarios,
+                         periodo=calendario_service.periodo_actual(),
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/docente/preferencias')
+@rutas.route('/docente/preferencias')
+@presupuesto_sql(4)
 @requiere_autenticacion
 @requiere_rol('docente')
+@condicional_por_version('catalogo', 'preferencias:{id}', 'notificaciones:{id}')
 def docente_preferencias():
     usuario = auth_service.obtener_usuario_actual()
     preferencias = docente_service.obtener_preferencias(usuario['id'])
-    materias = materia_repo.obtener_todos()
     notificaciones_count = docente_service.obtener_notificaciones_no_leidas(usuario['id'])
 
     return render_template('docente/preferencias.html',
                          usuario=usuario,
                          preferencias=preferencias,
-                         materias=materias,
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/docente/preferencias/crear', methods=['POST'])
+@rutas.route('/docente/preferencias/crear', methods=['POST'])
+@presupuesto_sql(3)
 @requiere_autenticacion
 @requiere_rol('docente')
 def docente_crear_preferencia():
     usuario = auth_service.obtener_usuario_actual()
 
-    materia_id = request.form.get('materia_id')
-    dia_semana = request.form.get('dia_semana')
-    horario = request.form.get('horario')
+    materia_id = validar_entero(request.form.get('materia_id'), 'materia_id')
+    franjas = request.form.getlist('franja')
 
-    exito, mensaje = docente_service.crear_preferencia(
-        usuario['id'], int(materia_id), dia_semana, horario
-    )
+    if materia_id is None:
+        flash('Selecciona una materia de la lista', 'danger')
+        return redirect(url_for('docente_preferencias'))
+
+    if franjas:
+        # Rejilla semanal: cada casilla marcada llega como "Día|HH:MM - HH:MM"
+        solicitudes = []
+        for franja in franjas:
+            dia_semana, _, horario = franja.partition('|')
+            solicitudes.append((materia_id, dia_semana, horario))
+        exito, mensaje = docente_service.crear_preferencias(usuario['id'], solicitudes)
+    else:
+        exito, mensaje = docente_service.crear_preferencia(
+            usuario['id'], materia_id, request.form.get('dia_semana'), request.form.get('horario')
+        )
 
     flash(mensaje, 'success' if exito else 'danger')
     return redirect(url_for('docente_preferencias'))
 
 
-@app.route('/docente/preferencias/eliminar/<int:preferencia_id>', methods=['POST'])
+@rutas.route('/docente/preferencias/eliminar/<int:preferencia_id>', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('docente')
 def docente_eliminar_preferencia(preferencia_id):
@@ -287,9 +699,11 @@ def docente_eliminar_preferencia(preferencia_id):
     return redirect(url_for('docente_preferencias'))
 
 
-@app.route('/docente/notificaciones')
+@rutas.route('/docente/notificaciones')
+@presupuesto_sql(4)
 @requiere_autenticacion
 @requiere_rol('docente')
+@condicional_por_version('notificaciones:{id}')
 def docente_notificaciones():
     """Notificaciones del docente"""
     usuario = auth_service.obtener_usuario_actual()
@@ -302,7 +716,8 @@ def docente_notificaciones():
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/docente/notificaciones/marcar-leida/<int:notificacion_id>', methods=['POST'])
+@rutas.route('/docente/notificaciones/marcar-leida/<int:notificacion_id>', methods=['POST'])
+@presupuesto_sql(5)
 @requiere_autenticacion
 @requiere_rol('docente')
 def docente_marcar_notificacion_leida(notificacion_id):
@@ -314,11 +729,30 @@ def docente_marcar_notificacion_leida(notificacion_id):
     return redirect(url_for('docente_notificaciones'))
 
 
+@rutas.route('/api/docente/sesiones')
+@presupuesto_sql(3)
+@requiere_autenticacion
+@requiere_rol('docente')
+@condicional_por_version('horario_docente:{id}')
+def api_docente_sesiones():
+    """Sesiones concretas del docente entre dos fechas (desde, hasta: AAAA-MM-DD)"""
+    usuario = auth_service.obtener_usuario_actual()
+    try:
+        desde = date.fromisoformat(request.args.get('desde', ''))
+        hasta = date.fromisoformat(request.args.get('hasta', ''))
+        sesiones = calendario_service.sesiones_entre(usuario['id'], desde, hasta)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify([sesion.to_dict() for sesion in sesiones])
+
+
 # ==================== RUTAS ADMINISTRATIVO ====================
 
-@app.route('/admin/dashboard')
+@rutas.route('/admin/dashboard')
+@presupuesto_sql(5)
 @requiere_autenticacion
 @requiere_rol('administrativo')
+@condicional_por_version('catalogo', 'notificaciones:{id}')
 def admin_dashboard():
     """Dashboard administrativo"""
     usuario = auth_service.obtener_usuario_actual()
@@ -331,9 +765,11 @@ def admin_dashboard():
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/admin/perfil')
+@rutas.route('/admin/perfil')
+@presupuesto_sql(4)
 @requiere_autenticacion
 @requiere_rol('administrativo')
+@condicional_por_version('catalogo', 'notificaciones:{id}')
 def admin_perfil():
     """Perfil del administrativo"""
     usuario = auth_service.obtener_usuario_actual()
@@ -346,7 +782,8 @@ def admin_perfil():
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/admin/perfil/actualizar', methods=['POST'])
+@rutas.route('/admin/perfil/actualizar', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('administrativo')
 def admin_actualizar_perfil():
@@ -365,7 +802,8 @@ def admin_actualizar_perfil():
     return redirect(url_for('admin_perfil'))
 
 
-@app.route('/admin/perfil/cambiar-contrasena', methods=['POST'])
+@rutas.route('/admin/perfil/cambiar-contrasena', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('administrativo')
 def admin_cambiar_contrasena():
@@ -393,9 +831,11 @@ def admin_cambiar_contrasena():
     return redirect(url_for('admin_perfil'))
 
 
-@app.route('/admin/docentes')
+@rutas.route('/admin/docentes')
+@presupuesto_sql(5)
 @requiere_autenticacion
 @requiere_rol('administrativo')
+@condicional_por_version('catalogo', 'notificaciones:{id}')
 def admin_docentes():
     """Gestión de docentes"""
     usuario = auth_service.obtener_usuario_actual()
@@ -408,7 +848,8 @@ def admin_docentes():
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/admin/docentes/crear', methods=['POST'])
+@rutas.route('/admin/docentes/crear', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('administrativo')
 def admin_crear_docente():
@@ -431,7 +872,8 @@ def admin_crear_docente():
     return redirect(url_for('admin_docentes'))
 
 
-@app.route('/admin/docentes/editar/<int:docente_id>', methods=['POST'])
+@rutas.route('/admin/docentes/editar/<int:docente_id>', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('administrativo')
 def admin_editar_docente(docente_id):
@@ -454,7 +896,8 @@ def admin_editar_docente(docente_id):
     return redirect(url_for('admin_docentes'))
 
 
-@app.route('/admin/docentes/eliminar/<int:docente_id>', methods=['POST'])
+@rutas.route('/admin/docentes/eliminar/<int:docente_id>', methods=['POST'])
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('administrativo')
 def admin_eliminar_docente(docente_id):
@@ -464,31 +907,34 @@ def admin_eliminar_docente(docente_id):
     return redirect(url_for('admin_docentes'))
 
 
-@app.route('/admin/asignaciones')
+@rutas.route('/admin/asignaciones')
+@presupuesto_sql(3)
 @requiere_autenticacion
 @requiere_rol('administrativo')
+@condicional_por_version('catalogo', 'notificaciones:{id}')
 def admin_asignaciones():
     """Gestión de asignaciones"""
     usuario = auth_service.obtener_usuario_actual()
-    materias = materia_repo.obtener_todos()
-    docentes = usuario_repo.obtener_docentes()
     notificaciones_count = administrativo_service.obtener_notificaciones_no_leidas(usuario['id'])
 
     return render_template('administrativo/asignaciones.html',
                          usuario=usuario,
-                         materias=materias,
-                         docentes=docentes,
                          notificaciones_count=notificaciones_count)
 
 
-@app.route('/admin/asignar', methods=['POST'])
+@rutas.route('/admin/asignar', methods=['POST'])
+@presupuesto_sql(9)
 @requiere_autenticacion
 @requiere_rol('administrativo')
 def admin_asignar():
     """Asigna una materia a un docente"""
-    materia_id = int(request.form.get('materia_id'))
+    materia_id = validar_entero(request.form.get('materia_id'), 'materia_id')
     docente_id = request.form.get('docente_id')
-    docente_id = int(docente_id) if docente_id else None
+    docente_id = validar_entero(docente_id, 'docente_id') if docente_id else None
+
+    if materia_id is None:
+        flash('Selecciona una materia de la lista', 'danger')
+        return redirect(url_for('admin_asignaciones'))
 
     exito, mensaje = administrativo_service.asignar_materia_docente(materia_id, docente_id)
     flash(mensaje, 'success' if exito else 'danger')
@@ -496,18 +942,222 @@ def admin_asignar():
     return redirect(url_for('admin_asignaciones'))
 
 
-@app.route('/admin/calendario')
+@rutas.route('/admin/preferencias')
+@presupuesto_sql(4)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+@condicional_por_version('preferencias', 'catalogo', 'notificaciones:{id}')
+def admin_preferencias():
+    """Cola de revisión de preferencias pendientes"""
+    usuario = auth_service.obtener_usuario_actual()
+    notificaciones_count = administrativo_service.obtener_notificaciones_no_leidas(usuario['id'])
+
+    return render_template('administrativo/preferencias.html',
+                         usuario=usuario,
+                         cola=revision_preferencias_service.obtener_cola(),
+                         notificaciones_count=notificaciones_count)
+
+
+@rutas.route('/admin/preferencias/revisar', methods=['POST'])
+@presupuesto_sql(6)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+def admin_revisar_preferencias():
+    """Aprueba o rechaza en bloque las preferencias seleccionadas"""
+    accion = request.form.get('accion')
+    ids = [i for i in (validar_entero(v, 'preferencia_id') for v in request.form.getlist('preferencia_id'))
+           if i is not None]
+    if accion not in ('aprobar', 'rechazar') or not ids:
+        flash('Selecciona al menos una preferencia', 'warning')
+        return redirect(url_for('admin_preferencias'))
+
+    resultado = revision_preferencias_service.revisar(ids, aprobar=accion == 'aprobar')
+    verbo = 'aprobada(s)' if accion == 'aprobar' else 'rechazada(s)'
+    flash(f"{resultado['actualizadas']} preferencia(s) {verbo}", 'success')
+    for conflicto in resultado['conflictos']:
+        flash(f"{conflicto['docente']} - {conflicto['materia']}: {conflicto['motivo']}", 'warning')
+    if resultado['omitidas']:
+        flash(f"{resultado['omitidas']} preferencia(s) ya no estaban pendientes", 'info')
+    return redirect(url_for('admin_preferencias'))
+
+
+@rutas.route('/admin/calendario')
+@presupuesto_sql(6)
 @requiere_autenticacion
 @requiere_rol('administrativo')
+@condicional_por_version('catalogo', 'notificaciones:{id}', variable=lambda usuario: date.today())
 def admin_calendario():
     """Calendario administrativo"""
     usuario = auth_service.obtener_usuario_actual()
     notificaciones_count = administrativo_service.obtener_notificaciones_no_leidas(usuario['id'])
-    return render_template('administrativo/calendario.html', 
+
+    consulta = {
+        'dia': request.args.get('dia', 'Lunes'),
+        'inicio': request.args.get('inicio', '08:00'),
+        'fin': request.args.get('fin', '10:00')
+    }
+    disponibilidad = None
+    if 'dia' in request.args:
+        try:
+            disponibilidad = disponibilidad_service.libres(
+                consulta['dia'], consulta['inicio'], consulta['fin'])
+        except ValueError as e:
+            flash(str(e), 'danger')
+
+    return render_template('administrativo/calendario.html',
+                         usuario=usuario,
+                         consulta=consulta,
+                         dias=HorarioClase.DIAS_SEMANA,
+                         disponibilidad=disponibilidad,
+                         mes=calendario_service.dias_del_mes(),
+                         notificaciones_count=notificaciones_count)
+
+
+@rutas.route('/api/disponibilidad')
+@presupuesto_sql(2)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+@condicional_por_version('catalogo')
+def api_disponibilidad():
+    """Docentes y aulas libres en una franja (dia, inicio, fin)"""
+    try:
+        resultado = disponibilidad_service.libres(
+            request.args.get('dia', ''), request.args.get('inicio', ''), request.args.get('fin', ''))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(resultado)
+
+
+
+@rutas.route('/api/admin/demanda')
+@presupuesto_sql(4)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+@condicional_por_version('preferencias', 'materias')
+def api_admin_demanda():
+    """Mapa de calor de la demanda de preferencias (opcional: materia_id o docente_id)"""
+    return jsonify(demanda_service.mapa_calor(
+        materia_id=request.args.get('materia_id', type=int),
+        docente_id=request.args.get('docente_id', type=int)))
+
+@rutas.route('/admin/buscar')
+@presupuesto_sql(6)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+@condicional_por_version('catalogo', 'notificaciones:{id}')
+def admin_buscar():
+    """Búsqueda de texto completo"""
+    usuario = auth_service.obtener_usuario_actual()
+    consulta = request.args.get('q', '').strip()
+    resultados = busqueda_service.buscar(consulta, usuario['id'])
+    notificaciones_count = administrativo_service.obtener_notificaciones_no_leidas(usuario['id'])
+
+    return render_template('administrativo/buscar.html',
                          usuario=usuario,
+                         consulta=consulta,
+                         resultados=resultados,
                          notificaciones_count=notificaciones_count)
 
 
+@rutas.route('/admin/perfiles')
+@presupuesto_sql(3)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+def admin_perfiles():
+    """Perfiles de rendimiento recientes con sus funciones más costosas"""
+    usuario = auth_service.obtener_usuario_actual()
+    notificaciones_count = administrativo_service.obtener_notificaciones_no_leidas(usuario['id'])
+
+    return render_template('administrativo/perfiles.html',
+                         usuario=usuario,
+                         perfiles=perfilador.recientes(),
+                         cada_n=perfilador.cada_n,
+                         notificaciones_count=notificaciones_count)
+
+
+@rutas.route('/admin/perfiles/<nombre>')
+@presupuesto_sql(2)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+def admin_perfil_archivo(nombre):
+    """Descarga un perfil (.pstats, .folded o .json)"""
+    archivo = perfilador.archivo(nombre)
+    if archivo is None:
+        abort(404)
+    return send_from_directory(os.path.abspath(perfilador.directorio), archivo, as_attachment=True)
+
+
+# ==================== RUTAS AUTOCOMPLETADO Y BÚSQUEDA ====================
+
+@rutas.route('/api/autocompletar/materias')
+@presupuesto_sql(3)
+@requiere_autenticacion
+@condicional_por_version('catalogo')
+def api_autocompletar_materias():
+    """Sugerencias de materias por prefijo de nombre o código"""
+    consulta = request.args.get('q', '')
+    limite = validar_entero(request.args.get('limite', 10), 'limite') or 10
+    return jsonify(autocompletado_service.sugerir_materias(consulta, limite))
+
+
+@rutas.route('/api/autocompletar/docentes')
+@presupuesto_sql(3)
+@requiere_autenticacion
+@requiere_rol('administrativo')
+@condicional_por_version('catalogo')
+def api_autocompletar_docentes():
+    """Sugerencias de docentes por prefijo de nombre o email"""
+    consulta = request.args.get('q', '')
+    limite = validar_entero(request.args.get('limite', 10), 'limite') or 10
+    return jsonify(autocompletado_service.sugerir_docentes(consulta, limite))
+
+
+@rutas.route('/api/buscar')
+@presupuesto_sql(5)
+@requiere_autenticacion
+@condicional_por_version('catalogo', 'notificaciones:{id}')
+def api_buscar():
+    """Búsqueda de texto completo en formato JSON"""
+    usuario = auth_service.obtener_usuario_actual()
+    consulta = request.args.get('q', '')
+    tipos = request.args.get('tipo')
+    permitidas = BusquedaService.CATEGORIAS_POR_ROL.get(usuario['rol'], ())
+    categorias = [tipo for tipo in tipos.split(',') if tipo in permitidas] if tipos else permitidas
+    limite = validar_entero(request.args.get('limite', 10), 'limite') or 10
+    return jsonify(busqueda_service.buscar(consulta, usuario['id'], categorias, limite))
+
+
+# ==================== MÉTRICAS ====================
+
+@rutas.route('/metrics')
+@presupuesto_sql(3)
+def metricas_prometheus():
+    """Métricas de todos los workers en el formato de texto de Prometheus"""
+    token = current_app.config['METRICAS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    return Response(metricas.registro.exponer(), content_type=CONTENIDO_PROMETHEUS)
+
+
+# ==================== RECURSOS ESTÁTICOS ====================
+
+@rutas.route('/recursos/<path:nombre>')
+def recursos_estaticos(nombre):
+    """Recurso compilado: el nombre lleva la huella del contenido, así que es inmutable"""
+    if nombre not in manifiesto_recursos.publicados:
+        abort(404)
+    archivo, codificacion = manifiesto_recursos.variante(nombre, request.accept_encodings)
+    respuesta = send_from_directory(manifiesto_recursos.directorio, archivo,
+                                    mimetype=mimetypes.guess_type(nombre)[0],
+                                    max_age=RECURSOS_MAX_AGE)
+    if codificacion:
+        respuesta.headers['Content-Encoding'] = codificacion
+    respuesta.vary.add('Accept-Encoding')
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
@@ -527,4 +1177,4 @@ if __name__ == '__main__':
     print("  Password: admin123")
     print("=" * 60 + "\n")
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)